@@ -0,0 +1,72 @@
+"""Memory held by a parsed program as node objects versus the flat array form.
+
+    python -m benchmarks.ast_memory [--functions N]
+
+The program is generated: N functions with arithmetic, branches, loops and calls,
+plus a class per 10 functions.
+"""
+import argparse
+import os
+import pickle
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.core.scanner import Scanner
+from src.core.parser import Parser
+from src.ast.flat import FlatAst
+
+def generate_program(functions):
+    parts = []
+    for n in range(functions):
+        parts.append(f"""
+fun f{n}(a, b) {{
+  var total = 0;
+  var i = 0;
+  while (i < a) {{
+    if (i * 2 > b) total = total + i / 2; else total = total - (i + {n});
+    i = i + 1;
+  }}
+  print "f{n}: " + total;
+  return total + a * b - {n};
+}}""")
+        if n % 10 == 9:
+            parts.append(f"""
+class C{n} {{
+  init(x) {{ this.x = x; }}
+  value() {{ return this.x + f{n}(1, 2); }}
+}}""")
+    return "\n".join(parts)
+
+def retained(build):  # Result of build() and the memory it holds, in MB
+    tracemalloc.start()
+    result = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, size / (1024 * 1024)
+
+def main():
+    arguments = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arguments.add_argument("--functions", type=int, default=5000)
+    options = arguments.parse_args()
+
+    source = generate_program(options.functions)
+    print(f"source: {len(source) / (1024 * 1024):.1f} MB, {options.functions} functions")
+
+    tree, tree_size = retained(lambda: Parser(Scanner(source).iter_tokens()).parse())
+    flat, flat_size = retained(lambda: FlatAst.from_nodes(tree))
+    print(f"{'node objects':16} {tree_size:8.1f} MB")
+    print(f"{'flat arrays':16} {flat_size:8.1f} MB  ({len(flat)} nodes)")
+    print(f"{'pickled tree':16} {len(pickle.dumps(tree, pickle.HIGHEST_PROTOCOL)) / (1024 * 1024):8.1f} MB")
+    print(f"{'pickled flat':16} {len(pickle.dumps(flat, pickle.HIGHEST_PROTOCOL)) / (1024 * 1024):8.1f} MB")
+
+    start = time.perf_counter()
+    counts = [0] * 256
+    for kind in flat.kinds:  # Whole-program traversal without touching node objects
+        counts[kind] += 1
+    print(f"{'flat scan':16} {(time.perf_counter() - start) * 1000:8.1f} ms")
+
+if __name__ == "__main__":
+    main()
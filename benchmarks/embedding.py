@@ -0,0 +1,68 @@
+"""Requests per second when embedding Lox: a fresh interpreter per request versus a RuntimePool.
+
+    python -m benchmarks.embedding [--functions N] [--requests N] [--sample N] [--threads N] [--backends tree,vm,closures]
+
+Each request runs a short script that uses a library (the generated program from
+benchmarks/ast_memory.py) and one input global. Fresh, every request builds an interpreter and
+runs the library and the script through the front end, as the Lox class does. Pooled, the
+library is the runtimes' prelude and the script is compiled once per runtime, so a request is
+a reset plus a run. The pooled requests come from --threads threads. The fresh rate is measured
+on the first --sample requests, and their outputs must match the pooled ones.
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from benchmarks.ast_memory import generate_program
+from benchmarks.run import BACKENDS
+from src.core.lox import Lox, RECURSION_LIMIT
+from src.core.runtime import RuntimePool
+
+REQUEST = "var total = 0;\nvar i = 0;\nwhile (i < n) { total = total + f7(i, 1); i = i + 1; }\nprint total;\n"
+
+def fresh(library, backend, n):  # Output of one request on a new interpreter
+    Lox.reset(backend())
+    Lox.use_cache = False
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        Lox.run(f"{library}var n = {n};\n{REQUEST}")
+    return output.getvalue()
+
+def main():
+    arguments = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arguments.add_argument("--functions", type=int, default=200)
+    arguments.add_argument("--requests", type=int, default=200)
+    arguments.add_argument("--sample", type=int, default=20)
+    arguments.add_argument("--threads", type=int, default=4)
+    arguments.add_argument("--backends", default="tree,vm,closures")
+    options = arguments.parse_args()
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), RECURSION_LIMIT))
+
+    library = generate_program(options.functions)
+    inputs = [n % 20 for n in range(options.requests)]
+    print(f"library: {options.functions} functions; {options.requests} requests; {options.threads} threads")
+    print(f"{'backend':10} {'fresh':>12} {'pooled':>12} {'speedup':>8}")
+    for name in options.backends.split(","):
+        backend = BACKENDS[name][0]
+        start = time.perf_counter()
+        expected = [fresh(library, backend, n) for n in inputs[:options.sample]]
+        fresh_rate = len(expected) / (time.perf_counter() - start)
+
+        pool = RuntimePool(options.threads, backend=backend, prelude=library, use_cache=False)
+        start = time.perf_counter()
+        with ThreadPoolExecutor(options.threads) as executor:
+            results = list(executor.map(lambda n: pool.run(REQUEST, {"n": n}), inputs))
+        pooled_rate = len(inputs) / (time.perf_counter() - start)
+        if [result.output for result in results[:len(expected)]] != expected:
+            print(f"{name}: pooled output differs from fresh output", file=sys.stderr)
+            sys.exit(1)
+        print(f"{name:10} {fresh_rate:8.0f} r/s {pooled_rate:8.0f} r/s {pooled_rate / fresh_rate:7.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Startup time of a job that needs a prelude: running the prelude first versus loading its image.
+
+    python -m benchmarks.image_startup [--functions N] [--entries N] [--runs N] [--backend tree|vm|closures]
+
+The prelude is the generated program from benchmarks/ast_memory.py plus a loop that fills a
+lookup table, so it costs both front-end time (cached or not) and run time. The job reads one
+table entry and calls one prelude function.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from benchmarks.ast_memory import generate_program
+from benchmarks.run import BACKENDS
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+TABLE = """
+var table = {};
+var k = 0;
+while (k < %d) {
+  table["key" + k] = k * k;
+  k = k + 1;
+}
+"""
+
+JOB = """
+print table["key12"];
+print f7(3, 1);
+"""
+
+def timed_run(*arguments):
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-m", "src.core.lox", *arguments], cwd=ROOT, check=True, stdout=subprocess.DEVNULL)
+    return time.perf_counter() - start
+
+def main():
+    arguments = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arguments.add_argument("--functions", type=int, default=1000)
+    arguments.add_argument("--entries", type=int, default=50000)
+    arguments.add_argument("--runs", type=int, default=5)
+    arguments.add_argument("--backend", default="tree", choices=BACKENDS)
+    options = arguments.parse_args()
+    flags = BACKENDS[options.backend][1]
+
+    with tempfile.TemporaryDirectory() as directory:
+        prelude = generate_program(options.functions) + TABLE % options.entries
+        def write(name, text):
+            path = os.path.join(directory, name)
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(text)
+            return path
+        prelude_script = write("prelude.lox", prelude)
+        job = write("job.lox", JOB)
+        both = write("both.lox", prelude + JOB)
+        image = os.path.join(directory, "prelude.img")
+        timed_run(*flags, "--save-image", image, prelude_script)
+        print(f"prelude: {options.functions} functions, {options.entries} table entries; image {os.path.getsize(image) / 1024:.0f} KB")
+
+        cold = statistics.median(timed_run(*flags, "--no-cache", both) for _ in range(options.runs))
+        timed_run(*flags, both)  # Fill the script cache
+        cached = statistics.median(timed_run(*flags, both) for _ in range(options.runs))
+        loaded = statistics.median(timed_run(*flags, "--image", image, job) for _ in range(options.runs))
+        print(f"{'prelude + job':24} {cold * 1000:8.0f} ms")
+        print(f"{'prelude + job, cached':24} {cached * 1000:8.0f} ms")
+        print(f"{'image + job':24} {loaded * 1000:8.0f} ms  ({cached / loaded:.1f}x faster than cached)")
+
+if __name__ == "__main__":
+    main()
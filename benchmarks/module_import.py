@@ -0,0 +1,60 @@
+"""Cost of a shared library in many short scripts: pasted into each script versus imported.
+
+    python -m benchmarks.module_import [--functions N] [--scripts N] [--backends tree,vm,closures]
+
+Every script runs in this process on a fresh interpreter, as in `lox serve`. The library is the
+generated program from benchmarks/ast_memory.py. Pasted, each script scans, parses and resolves
+it again. Imported, the first script compiles it and the rest reuse the shared resolved module.
+The on-disk cache is off, so only the in-process sharing is measured.
+"""
+import argparse
+import contextlib
+import io
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from benchmarks.ast_memory import generate_program
+from benchmarks.run import BACKENDS
+from src.core import modules
+from src.core.lox import Lox, RECURSION_LIMIT
+
+JOB = "print f7(3, 1);\n"
+
+def run_script(source, backend, directory):  # Seconds to run one script on a fresh interpreter
+    Lox.reset(backend())
+    Lox.use_cache = False
+    Lox.interpreter.directory = directory
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        Lox.run(source)
+        return time.perf_counter() - start
+
+def main():
+    arguments = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arguments.add_argument("--functions", type=int, default=1000)
+    arguments.add_argument("--scripts", type=int, default=20)
+    arguments.add_argument("--backends", default="tree,vm,closures")
+    options = arguments.parse_args()
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), RECURSION_LIMIT))
+
+    with tempfile.TemporaryDirectory() as directory:
+        library = generate_program(options.functions)
+        with open(os.path.join(directory, "library.lox"), "w", encoding="utf-8") as f:
+            f.write(library)
+        print(f"library: {options.functions} functions; {options.scripts} scripts per row")
+        print(f"{'backend':10} {'mode':10} {'first':>10} {'later (median)':>16}")
+        for name in options.backends.split(","):
+            backend = BACKENDS[name][0]
+            for mode, source in (("pasted", library + JOB), ("imported", 'import "library.lox";\n' + JOB)):
+                modules.compiled.clear()
+                times = [run_script(source, backend, directory) for _ in range(options.scripts)]
+                later = statistics.median(times[1:]) if len(times) > 1 else times[0]
+                print(f"{name:10} {mode:10} {times[0] * 1000:7.1f} ms {later * 1000:13.1f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""Run the Lox benchmark suite on one or more backends.
+
+    python -m benchmarks.run [--backends tree,vm,closures] [--runs N] [--warmup N] [--only NAME,...]
+                             [--save baseline.json] [--compare baseline.json] [--threshold 0.10]
+
+Every script in benchmarks/lox/ is run in this process: --warmup untimed runs, then --runs timed
+ones, each on a fresh interpreter. The columns are:
+- startup: an empty script run as a new `python -m src.core.lox` process.
+- front end: scanning, parsing, resolving and optimizing.
+- run time: median and interquartile range, plus runs per second.
+--save writes the medians as JSON. --compare reads such a file and flags every benchmark whose
+median got slower by more than --threshold; the exit status is then 1.
+"""
+import argparse
+import contextlib
+import gc
+import glob
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.core.closure_compiler import ClosureInterpreter
+from src.core.interpreter import Interpreter
+from src.core.lox import Lox, RECURSION_LIMIT
+from src.core.vm import VM
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+SCRIPTS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "lox")
+BACKENDS = {"tree": (Interpreter, []), "vm": (VM, ["--vm"]), "closures": (ClosureInterpreter, ["--closures"])}
+
+def run_once(source, backend):  # (front-end seconds, run seconds, printed output) on a fresh interpreter
+    Lox.reset(backend())
+    Lox.use_cache = False
+    output = io.StringIO()
+    gc.collect()
+    with contextlib.redirect_stdout(output):
+        start = time.perf_counter()
+        statements, _ = Lox.front_end(source)
+        parsed = time.perf_counter()
+        if statements is None:
+            raise SystemExit("benchmark failed to compile")
+        Lox.interpreter.interpret(statements)
+        finished = time.perf_counter()
+    return parsed - start, finished - parsed, output.getvalue()
+
+def spread(times):  # Interquartile range
+    if len(times) < 2:
+        return 0.0
+    quartiles = statistics.quantiles(times, n=4)
+    return quartiles[2] - quartiles[0]
+
+def startup(flags, runs):  # Median wall time of a new process running an empty script
+    with tempfile.TemporaryDirectory() as directory:
+        empty = os.path.join(directory, "empty.lox")
+        open(empty, "w").close()
+        times = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            subprocess.run([sys.executable, "-m", "src.core.lox", "--no-cache", *flags, empty], cwd=ROOT, check=True)
+            times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+def measure(path, backend, runs, warmup):
+    with open(path, encoding="utf-8") as f:
+        source = f.read()
+    for _ in range(warmup):
+        run_once(source, backend)
+    front_ends, times = [], []
+    for _ in range(runs):
+        front_end, elapsed, output = run_once(source, backend)
+        front_ends.append(front_end)
+        times.append(elapsed)
+    median = statistics.median(times)
+    return {"front_end": statistics.median(front_ends), "median": median, "iqr": spread(times),
+            "throughput": 1 / median if median else 0.0, "output": output}
+
+def compare(results, baseline, threshold):  # Lines describing regressions against a saved baseline
+    regressions = []
+    for backend, benchmarks in results["backends"].items():
+        for name, result in benchmarks.items():
+            before = baseline.get("backends", {}).get(backend, {}).get(name)
+            if before is None or not before["median"]:
+                continue
+            change = result["median"] / before["median"] - 1
+            if change > threshold:
+                regressions.append(f"{backend}/{name}: {before['median'] * 1000:.1f} ms -> {result['median'] * 1000:.1f} ms ({change:+.0%})")
+    return regressions
+
+def main():
+    arguments = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arguments.add_argument("--backends", default="tree,vm,closures")
+    arguments.add_argument("--runs", type=int, default=5)
+    arguments.add_argument("--warmup", type=int, default=1)
+    arguments.add_argument("--only", help="comma-separated benchmark names")
+    arguments.add_argument("--save", metavar="PATH")
+    arguments.add_argument("--compare", metavar="PATH")
+    arguments.add_argument("--threshold", type=float, default=0.10)
+    options = arguments.parse_args()
+
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), RECURSION_LIMIT))
+    paths = sorted(glob.glob(os.path.join(SCRIPTS, "*.lox")))
+    if options.only:
+        wanted = set(options.only.split(","))
+        paths = [path for path in paths if os.path.splitext(os.path.basename(path))[0] in wanted]
+    backends = options.backends.split(",")
+    unknown = [name for name in backends if name not in BACKENDS]
+    if unknown:
+        arguments.error(f"unknown backend: {', '.join(unknown)}")
+
+    results = {"python": platform.python_version(), "runs": options.runs, "startup": {}, "backends": {}}
+    expected = {}  # Benchmark name -> output of the first backend, which the others must match
+    for backend_name in backends:
+        backend, flags = BACKENDS[backend_name]
+        results["startup"][backend_name] = startup(flags, options.runs)
+        print(f"\n{backend_name}  (startup {results['startup'][backend_name] * 1000:.0f} ms)")
+        print(f"{'benchmark':18} {'front end':>10} {'median':>10} {'iqr':>9} {'runs/s':>8}")
+        benchmarks = results["backends"][backend_name] = {}
+        for path in paths:
+            name = os.path.splitext(os.path.basename(path))[0]
+            result = measure(path, backend, options.runs, options.warmup)
+            output = result.pop("output")
+            note = ""
+            if expected.setdefault(name, output) != output:
+                note = f"  output differs from {backends[0]}"
+            benchmarks[name] = result
+            print(f"{name:18} {result['front_end'] * 1000:7.2f} ms {result['median'] * 1000:7.1f} ms "
+                  f"{result['iqr'] * 1000:6.1f} ms {result['throughput']:8.2f}{note}")
+
+    if options.save:
+        with open(options.save, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nsaved {options.save}")
+    if options.compare:
+        with open(options.compare, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), options.threshold)
+        if regressions:
+            print(f"\nregressions over {options.threshold:.0%}:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"\nno regressions over {options.threshold:.0%} against {options.compare}")
+
+if __name__ == "__main__":
+    main()
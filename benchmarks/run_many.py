@@ -0,0 +1,64 @@
+"""Throughput of `lox run-many` against one `lox` process per script.
+
+    python -m benchmarks.run_many [--scripts N] [--workers 1,2,4] [--sample N]
+
+The scripts are small generated programs: a loop, a function call and a class, a few
+milliseconds of work each, which is where process startup dominates. The one-process-per-script
+rate is measured on the first --sample scripts.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+SCRIPT = """
+class Account {{
+  init(balance) {{ this.balance = balance; }}
+  deposit(n) {{ this.balance = this.balance + n; return this; }}
+}}
+fun total(n) {{
+  var account = Account({seed});
+  var i = 0;
+  while (i < n) {{ account.deposit(i); i = i + 1; }}
+  return account.balance;
+}}
+print total({size});
+"""
+
+def lox(*arguments):
+    return subprocess.run([sys.executable, "-m", "src.core.lox", *arguments], cwd=ROOT, check=False,
+                          stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+def main():
+    arguments = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arguments.add_argument("--scripts", type=int, default=1000)
+    arguments.add_argument("--workers", default=",".join(str(n) for n in (1, 2, 4, 8) if n <= (os.cpu_count() or 1)) or "1")
+    arguments.add_argument("--sample", type=int, default=50)
+    options = arguments.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        for n in range(options.scripts):
+            with open(os.path.join(directory, f"job{n:05d}.lox"), "w", encoding="utf-8") as f:
+                f.write(SCRIPT.format(seed=n, size=200 + n % 300))
+        print(f"{options.scripts} scripts, {os.cpu_count()} CPUs")
+
+        scripts = sorted(os.listdir(directory))[:options.sample]
+        start = time.perf_counter()
+        for name in scripts:
+            lox("--no-cache", os.path.join(directory, name))
+        rate = len(scripts) / (time.perf_counter() - start)
+        print(f"{'process per script':22} {rate:8.0f} scripts/s")
+
+        report = os.path.join(directory, "report.jsonl")
+        for workers in map(int, options.workers.split(",")):
+            start = time.perf_counter()
+            lox("run-many", "--workers", str(workers), "--report", report, "--no-cache", directory)
+            rate = options.scripts / (time.perf_counter() - start)
+            print(f"{f'run-many, {workers} workers':22} {rate:8.0f} scripts/s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Scanner throughput in MB/s, memory held by scanned tokens, and peak memory of scanning plus parsing.
+
+    python -m benchmarks.scanner_throughput [--size MB] [--baseline path/to/scanner.py]
+
+The input is a synthetic script built by repeating tests/*.lox until it reaches
+--size megabytes. --baseline loads another scanner module (for example an older
+src/core/scanner.py checked out from git) and times it on the same input.
+"""
+import argparse
+import glob
+import importlib.util
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.core.scanner import Scanner
+from src.core.parser import Parser
+
+def build_source(megabytes):
+    root = os.path.join(os.path.dirname(__file__), "..", "tests")
+    chunk = "\n".join(open(path, encoding="utf-8").read() for path in sorted(glob.glob(os.path.join(root, "*.lox"))))
+    repeat = max(1, int(megabytes * 1024 * 1024 / len(chunk)))
+    return chunk * repeat
+
+def throughput(scan, source, runs=3):  # Best of several runs, in MB/s
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        scan(source)
+        best = min(best, time.perf_counter() - start)
+    return len(source.encode("utf-8")) / (1024 * 1024) / best
+
+def peak_memory(run, source):  # Peak traced allocation in MB
+    tracemalloc.start()
+    run(source)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak / (1024 * 1024)
+
+def retained_memory(scan, source):  # Memory still held by the scanned tokens, in MB
+    tracemalloc.start()
+    tokens = scan(source)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del tokens
+    return size / (1024 * 1024)
+
+def drain(iterator):
+    for _ in iterator:
+        pass
+
+def main():
+    arguments = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arguments.add_argument("--size", type=float, default=4.0, help="input size in MB")
+    arguments.add_argument("--baseline", help="path to another scanner.py to compare against")
+    options = arguments.parse_args()
+
+    source = build_source(options.size)
+    print(f"input: {len(source) / (1024 * 1024):.1f} MB")
+    rows = [
+        ("scan_tokens (list)", lambda text: Scanner(text).scan_tokens()),
+        ("iter_tokens (stream)", lambda text: drain(Scanner(text).iter_tokens())),
+        ("scan_buffer (arrays)", lambda text: Scanner(text).scan_buffer()),
+    ]
+    if options.baseline:
+        spec = importlib.util.spec_from_file_location("baseline_scanner", options.baseline)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        rows.insert(0, ("baseline scan_tokens", lambda text: module.Scanner(text).scan_tokens()))
+    for name, scan in rows:
+        print(f"{name:24} {throughput(scan, source):8.2f} MB/s")
+
+    for name, scan in rows:
+        if "stream" not in name:
+            print(f"{name:24} {retained_memory(scan, source):8.1f} MB retained")
+
+    parse_list = lambda text: Parser(Scanner(text).scan_tokens()).parse()
+    parse_stream = lambda text: Parser(Scanner(text).iter_tokens()).parse()
+    print(f"{'parse from list':24} {peak_memory(parse_list, source):8.1f} MB peak")
+    print(f"{'parse from stream':24} {peak_memory(parse_stream, source):8.1f} MB peak")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Latency of `lox script` run cold versus through a `lox serve` daemon.
+
+    python -m benchmarks.serve_latency [--functions N] [--runs N] [--workers N]
+
+Starts a daemon on a temporary socket, then times the same scripts three ways: a fresh
+`python -m src.core.lox` process, a fresh `python -m src.core.client` process, and a
+request() made from this process (the daemon's share of the round trip).
+"""
+import argparse
+import io
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.ast_memory import generate_program
+from src.core.client import request
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+def timed(function, runs):
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+def wait_for(socket_path, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while not os.path.exists(socket_path):
+        if time.monotonic() > deadline:
+            raise RuntimeError("lox serve did not start")
+        time.sleep(0.05)
+
+def main():
+    arguments = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arguments.add_argument("--functions", type=int, default=500)
+    arguments.add_argument("--runs", type=int, default=10)
+    arguments.add_argument("--workers", type=int, default=2)
+    options = arguments.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        socket_path = os.path.join(directory, "lox.sock")
+        hello = os.path.join(directory, "hello.lox")
+        with open(hello, "w", encoding="utf-8") as f:
+            f.write('print "hello";\n')
+        generated = os.path.join(directory, "generated.lox")
+        with open(generated, "w", encoding="utf-8") as f:
+            f.write(generate_program(options.functions))
+
+        server = subprocess.Popen([sys.executable, "-m", "src.core.lox", "serve", "--socket", socket_path, "--workers", str(options.workers)],
+                                  cwd=ROOT, stderr=subprocess.DEVNULL)
+        try:
+            wait_for(socket_path)
+            print(f"{'script':24} {'cold':>10} {'client':>10} {'in-process':>12}")
+            for name, script in (("hello.lox", hello), (f"{options.functions} functions", generated)):
+                cold = timed(lambda: subprocess.run([sys.executable, "-m", "src.core.lox", script],
+                                                    cwd=ROOT, check=True, stdout=subprocess.DEVNULL), options.runs)
+                client = timed(lambda: subprocess.run([sys.executable, "-m", "src.core.client", "--socket", socket_path, script],
+                                                      cwd=ROOT, check=True, stdout=subprocess.DEVNULL), options.runs)
+                direct = timed(lambda: request([script], socket_path, stdout=io.StringIO()), options.runs)
+                print(f"{name:24} {cold * 1000:8.1f} ms {client * 1000:8.1f} ms {direct * 1000:10.1f} ms")
+        finally:
+            server.terminate()
+            server.wait()
+
+if __name__ == "__main__":
+    main()
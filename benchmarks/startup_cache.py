@@ -0,0 +1,48 @@
+"""Startup time of `lox script` with and without the compiled-script cache.
+
+    python -m benchmarks.startup_cache [--functions N] [--runs N]
+
+The script is the generated program from benchmarks/ast_memory.py: it only defines
+functions and classes, so the time measured is almost all front end.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.ast_memory import generate_program
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+def timed_run(script, *flags):
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-m", "src.core.lox", *flags, script], cwd=ROOT, check=True, stdout=subprocess.DEVNULL)
+    return time.perf_counter() - start
+
+def main():
+    arguments = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arguments.add_argument("--functions", type=int, default=2000)
+    arguments.add_argument("--runs", type=int, default=5)
+    options = arguments.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        script = os.path.join(directory, "generated.lox")
+        with open(script, "w", encoding="utf-8") as f:
+            f.write(generate_program(options.functions))
+        print(f"script: {os.path.getsize(script) / 1024:.0f} KB, {options.functions} functions")
+
+        empty = os.path.join(directory, "empty.lox")
+        open(empty, "w").close()
+        baseline = statistics.median(timed_run(empty, "--no-cache") for _ in range(options.runs))
+        cold = statistics.median(timed_run(script, "--no-cache") for _ in range(options.runs))
+        timed_run(script)  # Fill the cache
+        warm = statistics.median(timed_run(script) for _ in range(options.runs))
+        print(f"{'empty script':20} {baseline * 1000:8.0f} ms")
+        print(f"{'no cache':20} {cold * 1000:8.0f} ms")
+        print(f"{'cache hit':20} {warm * 1000:8.0f} ms  ({(cold - baseline) / max(warm - baseline, 1e-9):.1f}x less front-end time)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""Time to build a string by repeated concatenation, at growing sizes, on each backend.
+
+    python -m benchmarks.string_building [--backends tree,vm,closures] [--sizes 10000,20000,40000,80000]
+
+The script appends a short line to one string n times (`s = s + piece;`), as report-generating
+scripts do. With linear scaling the time per piece stays flat as n doubles; quadratic copying
+shows up as time per piece doubling with n.
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from benchmarks.run import BACKENDS, run_once
+from src.core.lox import RECURSION_LIMIT
+
+SCRIPT = """
+var s = "";
+var i = 0;
+while (i < %d) {
+  s = s + "line " + i + " of the report\\n";
+  i = i + 1;
+}
+print s == "";
+"""
+
+def main():
+    arguments = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arguments.add_argument("--backends", default="tree,vm,closures")
+    arguments.add_argument("--sizes", default="10000,20000,40000,80000")
+    options = arguments.parse_args()
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), RECURSION_LIMIT))
+
+    print(f"{'backend':10} {'pieces':>8} {'time':>10} {'per piece':>11}")
+    for name in options.backends.split(","):
+        backend = BACKENDS[name][0]
+        for size in map(int, options.sizes.split(",")):
+            _, elapsed, _ = run_once(SCRIPT % size, backend)
+            print(f"{name:10} {size:8} {elapsed * 1000:7.1f} ms {elapsed / size * 1e6:8.2f} us")
+
+if __name__ == "__main__":
+    main()
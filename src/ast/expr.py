@@ -1,23 +1,30 @@
-from abc import ABC, abstractmethod
+# Generated by tools/generate_ast.py. Edit the node list there and regenerate.
+
+class Expr:   # Base class for all expr nodes
+    __slots__ = ()
 
-class Expr(ABC):
-    @abstractmethod
     def accept(self, visitor):
-        pass
+        raise NotImplementedError
 
 class Binary(Expr): # Represents a binary expressions
-    def __init__(self, left, operator, right):  
+    __slots__ = ('left', 'operator', 'right')
+    __match_args__ = ('left', 'operator', 'right')  # Child fields, in constructor order
+
+    def __init__(self, left, operator, right):
         self.left = left
         self.operator = operator
         self.right = right
 
-    def accept(self, visitor): # Accepts a visitor for the visitor pattern
+    def accept(self, visitor):
         return visitor.visit_binary_expr(self)
 
-    def __str__(self): 
+    def __str__(self):
         return f"({self.left} {self.operator.lexeme} {self.right})"
 
 class Grouping(Expr): # Represents a grouping expression
+    __slots__ = ('expression',)
+    __match_args__ = ('expression',)  # Child fields, in constructor order
+
     def __init__(self, expression):
         self.expression = expression
 
@@ -28,6 +35,9 @@ class Grouping(Expr): # Represents a grouping expression
         return f"(group {self.expression})"
 
 class Literal(Expr): # Represents a literal expression
+    __slots__ = ('value',)
+    __match_args__ = ('value',)  # Child fields, in constructor order
+
     def __init__(self, value):
         self.value = value
 
@@ -38,6 +48,9 @@ class Literal(Expr): # Represents a literal expression
         return str(self.value) if self.value is not None else "nil"
 
 class Unary(Expr): # Represents a unary expression
+    __slots__ = ('operator', 'right')
+    __match_args__ = ('operator', 'right')  # Child fields, in constructor order
+
     def __init__(self, operator, right):
         self.operator = operator
         self.right = right
@@ -45,10 +58,13 @@ class Unary(Expr): # Represents a unary expression
     def accept(self, visitor):
         return visitor.visit_unary_expr(self)
 
-    def __str__(self): 
-        return f"({self.operator.lexeme} {self.right})" 
-    
+    def __str__(self):
+        return f"({self.operator.lexeme} {self.right})"
+
 class Variable(Expr): # Represents a variable expression
+    __slots__ = ('name',)
+    __match_args__ = ('name',)  # Child fields, in constructor order
+
     def __init__(self, name):
         self.name = name
 
@@ -57,8 +73,11 @@ class Variable(Expr): # Represents a variable expression
 
     def __str__(self):
         return str(self.name)
-    
+
 class Assign(Expr): # Represents an assignment expression
+    __slots__ = ('name', 'value')
+    __match_args__ = ('name', 'value')  # Child fields, in constructor order
+
     def __init__(self, name, value):
         self.name = name
         self.value = value
@@ -68,8 +87,11 @@ class Assign(Expr): # Represents an assignment expression
 
     def __str__(self):
         return f"({self.name} = {self.value})"
-    
+
 class Call(Expr): # Represents a function call expression
+    __slots__ = ('callee', 'paren', 'arguments')
+    __match_args__ = ('callee', 'paren', 'arguments')  # Child fields, in constructor order
+
     def __init__(self, callee, paren, arguments):
         self.callee = callee
         self.paren = paren
@@ -79,9 +101,12 @@ class Call(Expr): # Represents a function call expression
         return visitor.visit_call_expr(self)
 
     def __str__(self):
-        return f"({self.callee}({', '.join(map(str, self.arguments))}))" 
-    
+        return f"({self.callee}({', '.join(map(str, self.arguments))}))"
+
 class Logical(Expr): # Represents a logical expression
+    __slots__ = ('left', 'operator', 'right')
+    __match_args__ = ('left', 'operator', 'right')  # Child fields, in constructor order
+
     def __init__(self, left, operator, right):
         self.left = left
         self.operator = operator
@@ -92,47 +117,121 @@ class Logical(Expr): # Represents a logical expression
 
     def __str__(self):
         return f"({self.left} {self.operator.lexeme} {self.right})"
-    
-class Get(Expr):
+
+class Get(Expr): # Property access
+    __slots__ = ('object', 'name')
+    __match_args__ = ('object', 'name')  # Child fields, in constructor order
+
     def __init__(self, object, name):
         self.object = object
         self.name = name
 
     def accept(self, visitor):
-        return visitor.visit_get_expr(self) 
-    
-    def __str__(self):  
+        return visitor.visit_get_expr(self)
+
+    def __str__(self):
         return f"({self.object}.{self.name.lexeme})"
 
-class Set(Expr):
+class Set(Expr): # Property assignment
+    __slots__ = ('object', 'name', 'value')
+    __match_args__ = ('object', 'name', 'value')  # Child fields, in constructor order
+
     def __init__(self, object, name, value):
         self.object = object
         self.name = name
         self.value = value
 
     def accept(self, visitor):
-        return visitor.visit_set_expr(self) 
-    
-    def __str__(self):  
+        return visitor.visit_set_expr(self)
+
+    def __str__(self):
         return f"({self.object}.{self.name.lexeme} = {self.value})"
 
-class This(Expr):
+class This(Expr): # The 'this' keyword
+    __slots__ = ('keyword',)
+    __match_args__ = ('keyword',)  # Child fields, in constructor order
+
     def __init__(self, keyword):
         self.keyword = keyword
 
     def accept(self, visitor):
-        return visitor.visit_this_expr(self) 
-    
-    def __str__(self):  
+        return visitor.visit_this_expr(self)
+
+    def __str__(self):
         return "this"
 
-class Super(Expr):
+class Super(Expr): # Superclass method access
+    __slots__ = ('keyword', 'method')
+    __match_args__ = ('keyword', 'method')  # Child fields, in constructor order
+
     def __init__(self, keyword, method):
         self.keyword = keyword
         self.method = method
 
     def accept(self, visitor):
-        return visitor.visit_super_expr(self) 
-    
-    def __str__(self):  
-        return f"super.{self.method.lexeme}"
\ No newline at end of file
+        return visitor.visit_super_expr(self)
+
+    def __str__(self):
+        return f"super.{self.method.lexeme}"
+
+class List(Expr): # List literal
+    __slots__ = ('bracket', 'elements')
+    __match_args__ = ('bracket', 'elements')  # Child fields, in constructor order
+
+    def __init__(self, bracket, elements):
+        self.bracket = bracket
+        self.elements = elements
+
+    def accept(self, visitor):
+        return visitor.visit_list_expr(self)
+
+    def __str__(self):
+        return f"[{', '.join(map(str, self.elements))}]"
+
+class Map(Expr): # Map literal
+    __slots__ = ('brace', 'keys', 'values')
+    __match_args__ = ('brace', 'keys', 'values')  # Child fields, in constructor order
+
+    def __init__(self, brace, keys, values):
+        self.brace = brace
+        self.keys = keys
+        self.values = values
+
+    def accept(self, visitor):
+        return visitor.visit_map_expr(self)
+
+    def __str__(self):
+        return f"{{{', '.join(f'{k}: {v}' for k, v in zip(self.keys, self.values))}}}"
+
+class Index(Expr): # Subscript access
+    __slots__ = ('object', 'bracket', 'index')
+    __match_args__ = ('object', 'bracket', 'index')  # Child fields, in constructor order
+
+    def __init__(self, object, bracket, index):
+        self.object = object
+        self.bracket = bracket
+        self.index = index
+
+    def accept(self, visitor):
+        return visitor.visit_index_expr(self)
+
+    def __str__(self):
+        return f"({self.object}[{self.index}])"
+
+class SetIndex(Expr): # Subscript assignment
+    __slots__ = ('object', 'bracket', 'index', 'value')
+    __match_args__ = ('object', 'bracket', 'index', 'value')  # Child fields, in constructor order
+
+    def __init__(self, object, bracket, index, value):
+        self.object = object
+        self.bracket = bracket
+        self.index = index
+        self.value = value
+
+    def accept(self, visitor):
+        return visitor.visit_setindex_expr(self)
+
+    def __str__(self):
+        return f"({self.object}[{self.index}] = {self.value})"
+
+NODE_TYPES = (Binary, Grouping, Literal, Unary, Variable, Assign, Call, Logical, Get, Set, This, Super, List, Map, Index, SetIndex)
@@ -0,0 +1,125 @@
+from array import array
+
+from src.ast import expr, stmt
+from src.core.token1 import Token
+from src.core.token_type import TokenType
+
+NODE_TYPES = expr.NODE_TYPES + stmt.NODE_TYPES  # Position in this tuple is a node's kind code
+KIND_CODES = {node_type: code for code, node_type in enumerate(NODE_TYPES)}
+TOKEN_TYPES = {token_type.value: token_type for token_type in TokenType}
+
+# A field is stored as (payload << 2) | tag
+NODE, TOKEN, LIST, CONSTANT = range(4)
+
+class FlatAst:  # A program held in parallel arrays instead of node objects
+    def __init__(self):
+        self.kinds = array("B")          # Node index -> kind code; children come before their parent
+        self.offsets = array("I")        # Node index -> position of its first field in self.fields
+        self.fields = array("q")
+        self.list_offsets = array("I")   # List index -> position of its first item in self.items
+        self.list_lengths = array("I")
+        self.items = array("q")
+        self.token_types = array("B")
+        self.token_lexemes = array("I")  # Index into self.strings
+        self.token_literals = array("I") # Index into self.constants
+        self.token_lines = array("I")
+        self.strings = []
+        self.constants = []
+        self.roots = 0                   # List index of the top-level statements
+        self._string_index = {}
+        self._constant_index = {}
+        self._token_index = {}
+
+    @classmethod
+    def from_nodes(cls, statements, index=None):  # Flatten a tree; index, if given, is filled with node -> node index
+        flat = cls()
+        flat._node_index = {} if index is None else index
+        flat.roots = flat._encode(statements) >> 2
+        del flat._node_index, flat._string_index, flat._constant_index, flat._token_index
+        return flat
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def __getstate__(self):
+        return {name: value for name, value in vars(self).items() if not name.startswith("_")}
+
+    def __setstate__(self, state):
+        vars(self).update(state)
+
+    def node_type(self, index):
+        return NODE_TYPES[self.kinds[index]]
+
+    def to_nodes(self, nodes=None):  # Rebuild the statement list; nodes, if given, receives every node by index
+        tokens = [self._token(index) for index in range(len(self.token_types))]
+        built = [] if nodes is None else nodes
+        for index, kind in enumerate(self.kinds):
+            node_type = NODE_TYPES[kind]
+            start = self.offsets[index]
+            values = [self._decode(field, built, tokens) for field in self.fields[start:start + len(node_type.__match_args__)]]
+            built.append(node_type(*values))
+        return self._decode((self.roots << 2) | LIST, built, tokens)
+
+    def _decode(self, field, nodes, tokens):
+        payload, tag = field >> 2, field & 3
+        if tag == NODE:
+            return nodes[payload]
+        if tag == TOKEN:
+            return tokens[payload]
+        if tag == CONSTANT:
+            return self.constants[payload]
+        start = self.list_offsets[payload]
+        return [self._decode(item, nodes, tokens) for item in self.items[start:start + self.list_lengths[payload]]]
+
+    def _token(self, index):
+        token_type = TOKEN_TYPES.get(self.token_types[index])
+        return Token(token_type, self.strings[self.token_lexemes[index]], self.constants[self.token_literals[index]], self.token_lines[index])
+
+    def _encode(self, value):
+        if isinstance(value, (expr.Expr, stmt.Stmt)):
+            return (self._node(value) << 2) | NODE
+        if isinstance(value, Token):
+            return (self._add_token(value) << 2) | TOKEN
+        if isinstance(value, list):
+            encoded = [self._encode(item) for item in value]
+            self.list_offsets.append(len(self.items))
+            self.list_lengths.append(len(encoded))
+            self.items.extend(encoded)
+            return ((len(self.list_offsets) - 1) << 2) | LIST
+        return (self._constant(value) << 2) | CONSTANT
+
+    def _node(self, node):
+        if node in self._node_index:  # Shared subtrees (the optimizer may reuse one) are stored once
+            return self._node_index[node]
+        fields = [self._encode(getattr(node, field)) for field in node.__match_args__]
+        index = len(self.kinds)
+        self.kinds.append(KIND_CODES[type(node)])
+        self.offsets.append(len(self.fields))
+        self.fields.extend(fields)
+        self._node_index[node] = index
+        return index
+
+    def _add_token(self, token):
+        index = self._token_index.get(id(token))
+        if index is None:
+            index = self._token_index[id(token)] = len(self.token_types)
+            self.token_types.append(token.type.value if token.type is not None else 0)
+            self.token_lexemes.append(self._string(token.lexeme))
+            self.token_literals.append(self._constant(token.literal))
+            self.token_lines.append(token.line)
+        return index
+
+    def _string(self, text):
+        index = self._string_index.get(text)
+        if index is None:
+            index = self._string_index[text] = len(self.strings)
+            self.strings.append(text)
+        return index
+
+    def _constant(self, value):
+        key = (type(value), repr(value))  # Keeps 1.0 and true, or 0.0 and -0.0, apart
+        index = self._constant_index.get(key)
+        if index is None:
+            index = self._constant_index[key] = len(self.constants)
+            self.constants.append(value)
+        return index
@@ -1,11 +1,15 @@
-from abc import ABC, abstractmethod
+# Generated by tools/generate_ast.py. Edit the node list there and regenerate.
+
+class Stmt:   # Base class for all stmt nodes
+    __slots__ = ()
 
-class Stmt(ABC):
-    @abstractmethod
     def accept(self, visitor):
-        pass
+        raise NotImplementedError
 
 class ExpressionStmt(Stmt): # Expression statement
+    __slots__ = ('expression',)
+    __match_args__ = ('expression',)  # Child fields, in constructor order
+
     def __init__(self, expression):
         self.expression = expression
 
@@ -13,6 +17,9 @@ class ExpressionStmt(Stmt): # Expression statement
         return visitor.visit_expression_stmt(self)
 
 class PrintStmt(Stmt): # Print statement
+    __slots__ = ('expression',)
+    __match_args__ = ('expression',)  # Child fields, in constructor order
+
     def __init__(self, expression):
         self.expression = expression
 
@@ -20,6 +27,9 @@ class PrintStmt(Stmt): # Print statement
         return visitor.visit_print_stmt(self)
 
 class VarStmt(Stmt): # Variable declaration
+    __slots__ = ('name', 'initializer')
+    __match_args__ = ('name', 'initializer')  # Child fields, in constructor order
+
     def __init__(self, name, initializer):
         self.name = name
         self.initializer = initializer
@@ -28,6 +38,9 @@ class VarStmt(Stmt): # Variable declaration
         return visitor.visit_var_stmt(self)
 
 class BlockStmt(Stmt): # Block statement
+    __slots__ = ('statements',)
+    __match_args__ = ('statements',)  # Child fields, in constructor order
+
     def __init__(self, statements):
         self.statements = statements
 
@@ -35,6 +48,9 @@ class BlockStmt(Stmt): # Block statement
         return visitor.visit_block_stmt(self)
 
 class IfStmt(Stmt): # If statement
+    __slots__ = ('condition', 'then_branch', 'else_branch')
+    __match_args__ = ('condition', 'then_branch', 'else_branch')  # Child fields, in constructor order
+
     def __init__(self, condition, then_branch, else_branch):
         self.condition = condition
         self.then_branch = then_branch
@@ -44,35 +60,61 @@ class IfStmt(Stmt): # If statement
         return visitor.visit_if_stmt(self)
 
 class WhileStmt(Stmt): # While statement
-    def __init__(self, condition, body):
+    __slots__ = ('keyword', 'condition', 'body')
+    __match_args__ = ('keyword', 'condition', 'body')  # Child fields, in constructor order
+
+    def __init__(self, keyword, condition, body):
+        self.keyword = keyword
         self.condition = condition
         self.body = body
 
     def accept(self, visitor):
         return visitor.visit_while_stmt(self)
 
-class FunctionStmt(Stmt):
+class FunctionStmt(Stmt): # Function declaration
+    __slots__ = ('name', 'params', 'body')
+    __match_args__ = ('name', 'params', 'body')  # Child fields, in constructor order
+
     def __init__(self, name, params, body):
-        self.name = name          # Token
-        self.params = params      # List[Token]
-        self.body = body          # List[Stmt]
+        self.name = name
+        self.params = params
+        self.body = body
 
     def accept(self, visitor):
         return visitor.visit_function_stmt(self)
 
-class ReturnStmt(Stmt):
+class ReturnStmt(Stmt): # Return statement
+    __slots__ = ('keyword', 'value')
+    __match_args__ = ('keyword', 'value')  # Child fields, in constructor order
+
     def __init__(self, keyword, value):
-        self.keyword = keyword    # Token
-        self.value = value        # Expr or None
+        self.keyword = keyword
+        self.value = value
 
     def accept(self, visitor):
         return visitor.visit_return_stmt(self)
-    
-class ClassStmt(Stmt):
+
+class ClassStmt(Stmt): # Class declaration
+    __slots__ = ('name', 'superclass', 'methods')
+    __match_args__ = ('name', 'superclass', 'methods')  # Child fields, in constructor order
+
     def __init__(self, name, superclass, methods):
         self.name = name
         self.superclass = superclass
         self.methods = methods
 
     def accept(self, visitor):
-        return visitor.visit_class_stmt(self)
\ No newline at end of file
+        return visitor.visit_class_stmt(self)
+
+class ImportStmt(Stmt): # Import statement
+    __slots__ = ('keyword', 'path')
+    __match_args__ = ('keyword', 'path')  # Child fields, in constructor order
+
+    def __init__(self, keyword, path):
+        self.keyword = keyword
+        self.path = path
+
+    def accept(self, visitor):
+        return visitor.visit_import_stmt(self)
+
+NODE_TYPES = (ExpressionStmt, PrintStmt, VarStmt, BlockStmt, IfStmt, WhileStmt, FunctionStmt, ReturnStmt, ClassStmt, ImportStmt)
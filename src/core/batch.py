@@ -0,0 +1,152 @@
+# `lox run-many`: run many scripts on a pool of worker processes and write one JSON line each.
+#
+#   lox run-many --workers 8 --report results.jsonl --vm jobs/ extra.lox
+#
+# Scripts come from the command line, from directories (every .lox file below them, in sorted
+# order) and from --list FILE, one path per line ("-" reads stdin). Flags such as --vm are
+# passed to every script. Workers are forked from a parent that has already imported the
+# interpreter, as `lox serve` does. Each script then runs as `lox [flags] script` would, on
+# fresh Lox state, with its stdout and stderr captured. Report lines come out in input order:
+#
+#   {"script": "jobs/a.lox", "status": 0, "seconds": 0.0031, "stdout": "...", "stderr": ""}
+#
+# The command exits with 1 if any script exited with a nonzero status.
+import gc
+import io
+import json
+import multiprocessing
+import os
+import signal
+import sys
+import time
+import traceback
+
+from src.core import script_cache
+from src.core.flags import VALUE_FLAGS
+from src.core.lox import Lox
+from src.core.main import main as run_command
+# Imported here so forked workers start with everything loaded
+from src.core import closure_compiler, modules, optimizer, parser, resolver, scanner, vm  # noqa: F401
+
+USAGE = "Usage: lox run-many [--workers N] [--report PATH] [--timeout SECONDS] [--list FILE] [lox flags...] (script | directory)..."
+TIMEOUT_STATUS = 124  # Status of a script stopped by --timeout, as with timeout(1)
+
+limit = None  # --timeout in this worker, in seconds
+
+class _Timeout(BaseException):  # Not an Exception, so nothing in the interpreter catches it
+    pass
+
+def _alarm(signum, frame):
+    raise _Timeout
+
+def _init_worker(timeout):
+    global limit
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # The parent handles ^C and terminates the pool
+    signal.signal(signal.SIGALRM, _alarm)
+    script_cache.memory = {}
+    limit = timeout
+
+def run_script(job):  # Run one script in this worker; returns its report record
+    flags, path = job
+    stdout, stderr = io.StringIO(), io.StringIO()
+    saved = sys.stdin, sys.stdout, sys.stderr
+    sys.stdin, sys.stdout, sys.stderr = io.StringIO(), stdout, stderr
+    status = 0
+    start = time.perf_counter()
+    try:
+        if limit:
+            signal.setitimer(signal.ITIMER_REAL, limit)
+        Lox.reset()
+        run_command([*flags, path])
+    except SystemExit as exit:
+        status = exit.code if isinstance(exit.code, int) else (0 if exit.code is None else 1)
+    except _Timeout:
+        print(f"Timed out after {limit:g} seconds.", file=stderr)
+        status = TIMEOUT_STATUS
+    except Exception:
+        traceback.print_exc()
+        status = 1
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        sys.stdin, sys.stdout, sys.stderr = saved
+    return {"script": path, "status": status, "seconds": round(time.perf_counter() - start, 6),
+            "stdout": stdout.getvalue(), "stderr": stderr.getvalue()}
+
+def find_scripts(paths):  # Files as given; directories expanded to the .lox files below them
+    scripts = []
+    for path in paths:
+        if not os.path.isdir(path):
+            scripts.append(path)
+            continue
+        for directory, subdirectories, files in os.walk(path):
+            subdirectories[:] = sorted(name for name in subdirectories if name != script_cache.CACHE_DIR)
+            scripts.extend(os.path.join(directory, name) for name in sorted(files) if name.endswith(".lox"))
+    return scripts
+
+def run_many(scripts, flags=(), workers=None, report=None, timeout=None):  # Run scripts, writing report lines; returns (count, failed)
+    report = report or sys.stdout
+    workers = workers or os.cpu_count() or 1
+    jobs = [(list(flags), path) for path in scripts]
+    chunksize = max(1, min(64, len(jobs) // (workers * 8)))  # Few round trips for tiny scripts, still balanced for slow ones
+    failed = 0
+    gc.freeze()  # Keep the preloaded modules out of the workers' collections and their pages shared
+    try:
+        pool = multiprocessing.get_context("fork").Pool(workers, _init_worker, (timeout,))
+        try:
+            for record in pool.imap(run_script, jobs, chunksize):
+                failed += record["status"] != 0
+                report.write(json.dumps(record) + "\n")
+            pool.close()
+        except KeyboardInterrupt:
+            pool.terminate()
+            raise
+        finally:
+            pool.join()
+    finally:
+        gc.unfreeze()  # The caller's own heap is collected as before
+    return len(jobs), failed
+
+def main(args):
+    workers = report_path = timeout = list_path = None
+    flags, paths = [], []
+    try:
+        while args:
+            arg, args = args[0], args[1:]
+            if arg in ("--workers", "--report", "--timeout", "--list") and args:
+                value, args = args[0], args[1:]
+                if arg == "--workers":
+                    workers = int(value)
+                elif arg == "--report":
+                    report_path = value
+                elif arg == "--timeout":
+                    timeout = float(value)
+                else:
+                    list_path = value
+            elif arg in VALUE_FLAGS and args:
+                flags += [arg, args[0]]
+                args = args[1:]
+            elif arg.startswith("--"):
+                flags.append(arg)
+            else:
+                paths.append(arg)
+    except ValueError:
+        print(USAGE)
+        sys.exit(64)
+    if list_path is not None:
+        with (sys.stdin if list_path == "-" else open(list_path, encoding="utf-8")) as f:
+            paths += [line.strip() for line in f if line.strip()]
+    scripts = find_scripts(paths)
+    if not scripts or (workers is not None and workers < 1) or (timeout is not None and timeout <= 0):
+        print(USAGE)
+        sys.exit(64)
+
+    start = time.perf_counter()
+    if report_path is None:
+        count, failed = run_many(scripts, flags, workers, sys.stdout, timeout)
+    else:
+        with open(report_path, "w", encoding="utf-8") as report:
+            count, failed = run_many(scripts, flags, workers, report, timeout)
+    elapsed = time.perf_counter() - start
+    print(f"run-many: {count} scripts, {failed} failed, {elapsed:.2f} s ({count / elapsed:.0f} scripts/s)", file=sys.stderr)
+    if failed:
+        sys.exit(1)
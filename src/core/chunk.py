@@ -0,0 +1,133 @@
+from enum import IntEnum
+
+class OpCode(IntEnum):
+    # Constants and stack
+    CONSTANT = 0
+    NIL = 1
+    TRUE = 2
+    FALSE = 3
+    POP = 4
+    POPN = 5
+
+    # Variables
+    GET_LOCAL = 6
+    SET_LOCAL = 7
+    GET_CELL = 8
+    SET_CELL = 9
+    BOX = 10
+    GET_UPVALUE = 11
+    SET_UPVALUE = 12
+    GET_GLOBAL = 13
+    DEFINE_GLOBAL = 14
+    SET_GLOBAL = 15
+
+    # Properties
+    GET_PROPERTY = 16
+    SET_PROPERTY = 17
+    CHECK_INSTANCE = 18
+    GET_SUPER = 19
+
+    # Operators
+    EQUAL = 20
+    NOT_EQUAL = 21
+    GREATER = 22
+    GREATER_EQUAL = 23
+    LESS = 24
+    LESS_EQUAL = 25
+    ADD = 26
+    SUBTRACT = 27
+    MULTIPLY = 28
+    DIVIDE = 29
+    NOT = 30
+    NEGATE = 31
+
+    # Statements and control flow (jump operands are absolute code offsets)
+    PRINT = 32
+    JUMP = 33
+    JUMP_IF_FALSE = 34
+
+    # Calls and classes
+    CALL = 35
+    INVOKE = 36
+    SUPER_INVOKE = 37
+    CLOSURE = 38
+    RETURN = 39
+    CLASS = 40
+    INHERIT = 41
+    METHOD = 42
+
+    # Collections
+    BUILD_LIST = 43
+    BUILD_MAP = 44
+    GET_INDEX = 45
+    SET_INDEX = 46
+
+    # Modules
+    IMPORT = 47
+
+    # Loops
+    LOOP = 48  # A while loop's jump back to its condition; counts a step against the run's budget
+
+# Number of operand words that follow each opcode (CLOSURE also carries two words per upvalue)
+OPERAND_COUNTS = {
+    OpCode.CONSTANT: 1, OpCode.POPN: 1,
+    OpCode.GET_LOCAL: 1, OpCode.SET_LOCAL: 1, OpCode.GET_CELL: 1, OpCode.SET_CELL: 1, OpCode.BOX: 1,
+    OpCode.GET_UPVALUE: 1, OpCode.SET_UPVALUE: 1,
+    OpCode.GET_GLOBAL: 1, OpCode.DEFINE_GLOBAL: 1, OpCode.SET_GLOBAL: 1,
+    OpCode.GET_PROPERTY: 1, OpCode.SET_PROPERTY: 1, OpCode.GET_SUPER: 1,
+    OpCode.JUMP: 1, OpCode.JUMP_IF_FALSE: 1,
+    OpCode.CALL: 1, OpCode.INVOKE: 2, OpCode.SUPER_INVOKE: 2,
+    OpCode.CLOSURE: 1, OpCode.CLASS: 1, OpCode.METHOD: 1,
+    OpCode.BUILD_LIST: 1, OpCode.BUILD_MAP: 1,
+    OpCode.IMPORT: 1, OpCode.LOOP: 1,
+}
+
+class Chunk:  # A compiled sequence of instructions with its constant pool and line table
+    def __init__(self):
+        self.code = []       # Opcodes and their operands, one int per word
+        self.lines = []      # Source line of every word in code
+        self.constants = []  # Constant pool
+        self._constant_index = {}
+
+    def write(self, word, line):  # Append one word of bytecode
+        self.code.append(word)
+        self.lines.append(line)
+
+    def add_constant(self, value):  # Add a constant to the pool and return its index
+        key = (type(value), repr(value) if isinstance(value, float) else value)  # repr keeps 0.0 and -0.0 apart
+        if key not in self._constant_index:
+            self._constant_index[key] = len(self.constants)
+            self.constants.append(value)
+        return self._constant_index[key]
+
+    def disassemble(self, name):  # Human readable listing of the chunk, used when debugging the compiler
+        lines = [f"== {name} =="]
+        offset = 0
+        while offset < len(self.code):
+            op = OpCode(self.code[offset])
+            operands = self.code[offset + 1: offset + 1 + OPERAND_COUNTS.get(op, 0)]
+            if op == OpCode.CLOSURE:
+                function = self.constants[operands[0]]
+                operands = self.code[offset + 1: offset + 2 + 2 * function.upvalue_count]
+            text = f"{offset:04d} {self.lines[offset]:4d} {op.name:<16}"
+            text += " ".join(str(operand) for operand in operands)
+            if op in (OpCode.CONSTANT, OpCode.GET_GLOBAL, OpCode.DEFINE_GLOBAL, OpCode.SET_GLOBAL,
+                      OpCode.GET_PROPERTY, OpCode.SET_PROPERTY, OpCode.GET_SUPER, OpCode.INVOKE,
+                      OpCode.SUPER_INVOKE, OpCode.CLOSURE, OpCode.CLASS, OpCode.METHOD):
+                text += f" ({self.constants[operands[0]]})"
+            lines.append(text)
+            offset += 1 + len(operands)
+        return "\n".join(lines)
+
+class FunctionProto:  # Compiled function: its code plus what the VM needs to call it
+    def __init__(self, name, arity, globals):
+        self.name = name
+        self.arity = arity
+        self.globals = globals  # Values of the module's global scope, which the function's code reads and writes
+        self.chunk = Chunk()
+        self.upvalue_count = 0
+
+    def __str__(self):
+        if self.name is None:
+            return "<script>"
+        return f"<fn {self.name}>"
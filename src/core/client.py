@@ -0,0 +1,70 @@
+# Thin client for `lox serve`: forwards a command line to the daemon and replays its output.
+# Kept free of interpreter imports so that starting it is cheap.
+import json
+import os
+import socket
+import stat
+import sys
+import tempfile
+
+from src.core.flags import script_arguments
+
+def default_socket():  # $LOX_SOCKET, else lox.sock in $XDG_RUNTIME_DIR or in a private directory under /tmp
+    path = os.environ.get("LOX_SOCKET")
+    if path:
+        return path
+    directory = os.environ.get("XDG_RUNTIME_DIR") or os.path.join(tempfile.gettempdir(), f"lox-{os.getuid()}")
+    return os.path.join(directory, "lox.sock")
+
+def check_private(directory):  # Refuse a directory that another user owns or can write to: they could plant a daemon there
+    info = os.lstat(directory)
+    if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid() or info.st_mode & 0o077:
+        raise PermissionError(f"{directory} is not a directory private to this user")
+
+def request(args, socket_path=None, stdin=None, stdout=None, stderr=None, source=None):  # Run args on the daemon; returns the exit code
+    # source, if given, is run as the script, so args must not name one
+    stdout = stdout or sys.stdout
+    stderr = stderr or sys.stderr
+    if socket_path is None:
+        socket_path = default_socket()
+        check_private(os.path.dirname(socket_path))
+    connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    connection.connect(socket_path)
+    with connection:
+        message = {"argv": list(args), "cwd": os.getcwd(), "stdin": stdin, "source": source}
+        connection.sendall(json.dumps(message).encode("utf-8") + b"\n")
+        connection.shutdown(socket.SHUT_WR)
+        with connection.makefile("r", encoding="utf-8") as replies:
+            for line in replies:
+                reply = json.loads(line)
+                if "exit" in reply:
+                    return reply["exit"]
+                (stdout if reply["stream"] == "stdout" else stderr).write(reply["data"])
+                (stdout if reply["stream"] == "stdout" else stderr).flush()
+    print("lox: daemon closed the connection without an exit status", file=stderr)
+    return 70
+
+def main(args=None):
+    args = sys.argv[1:] if args is None else args
+    socket_path = None
+    if len(args) >= 2 and args[0] == "--socket":
+        socket_path, args = args[1], args[2:]
+    stdin = None
+    repl = not script_arguments(args)  # Only the REPL reads stdin; forward it when it is piped in
+    if repl and sys.stdin is not None and not sys.stdin.isatty():
+        stdin = sys.stdin.read()
+    try:
+        code = request(args, socket_path, stdin)
+    except (FileNotFoundError, ConnectionRefusedError, PermissionError) as error:  # No daemon: behave exactly like the normal CLI
+        if isinstance(error, PermissionError):
+            print(f"lox: not using the daemon: {error}", file=sys.stderr)
+        if stdin is not None:
+            import io
+            sys.stdin = io.StringIO(stdin)
+        from src.core.main import main as run_locally
+        run_locally(args)
+        return
+    sys.exit(code)
+
+if __name__ == "__main__":
+    main()
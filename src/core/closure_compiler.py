@@ -0,0 +1,633 @@
+from src.ast.expr import *
+from src.ast.stmt import *
+from src.core.containers import LoxList, build_map, get_item, set_item
+from src.core.interpreter import (
+    Interpreter,
+    Environment,
+    RuntimeError,
+    LoxCallable,
+    LoxClass,
+    LoxFunction,
+    LoxInstance,
+    NativeError,
+)
+from src.core.modules import import_module
+from src.core.rope import STRINGS, concat
+from src.core.token_type import TokenType
+
+class CompiledFunction(LoxFunction):  # LoxFunction whose body is a compiled closure instead of statements
+    def __init__(self, declaration, closure, is_initializer, scope_size, globals, body):
+        super().__init__(declaration, closure, is_initializer, scope_size, globals)
+        self.body = body
+        self.padding = [None] * (scope_size - len(declaration.params))  # Slots for the body's own locals
+
+    def bind(self, instance):
+        env = Environment(self.closure, 1)
+        env.values[0] = instance
+        return CompiledFunction(self.declaration, env, self.is_initializer, self.scope_size, self.globals, self.body)
+
+    def __getstate__(self):  # Images hold the declaration; the body is compiled again on the first call after loading
+        state = dict(vars(self))
+        del state["body"], state["padding"]
+        return state
+
+    def __setstate__(self, state):
+        from src.core import image
+        vars(self).update(state)
+        self.body = image.lazy_body(self)
+        self.padding = [None] * (self.scope_size - len(self.declaration.params))
+
+    def call(self, interpreter, arguments):
+        interpreter.fuel -= 1
+        if not interpreter.fuel:
+            interpreter.refuel(self.declaration.name.line)
+        environment = Environment(self.closure)
+        environment.values = arguments + self.padding
+        result = self.body(environment)
+        if self.is_initializer:
+            return self.closure.values[0]
+        if result is None:
+            return None
+        return result[0]
+
+    def call_method(self, interpreter, instance, arguments):
+        interpreter.fuel -= 1
+        if not interpreter.fuel:
+            interpreter.refuel(self.declaration.name.line)
+        this = Environment(self.closure)
+        this.values = [instance]
+        environment = Environment(this)
+        environment.values = arguments + self.padding
+        result = self.body(environment)
+        if self.is_initializer:
+            return instance
+        if result is None:
+            return None
+        return result[0]
+
+class ClosureInterpreter(Interpreter):  # Backend that turns the resolved AST into nested Python closures once
+    def prepare_module(self, statements):  # Global accesses are bound to self.globals as the module compiles
+        program = self.compile_block(statements)
+        globals = self.globals
+        return lambda: program(globals)
+
+    def compile_stmt(self, stmt):
+        return stmt.accept(self)
+
+    def compile_expr(self, expr):
+        return expr.accept(self)
+
+    def compile_block(self, statements):  # A block returns None, or a 1-tuple holding a return value
+        compiled = tuple(self.compile_stmt(stmt) for stmt in statements)
+        if len(compiled) == 1:
+            return compiled[0]
+
+        def block(env):
+            for stmt in compiled:
+                result = stmt(env)
+                if result is not None:
+                    return result
+            return None
+        return block
+
+    def compile_function(self, stmt, is_initializer):  # Returns a closure that creates the function value
+        body = self.compile_block(stmt.body)
+        scope_size = self.scope_sizes[stmt]
+        globals = self.globals
+
+        def make(env):
+            return CompiledFunction(stmt, env, is_initializer, scope_size, globals, body)
+        return make
+
+    def definer(self, stmt, name):  # Closure that stores a declaration's value in its slot or as a global
+        resolved = self.locals.get(stmt)
+        if resolved is None:
+            values = self.globals.values
+
+            def define(env, value):
+                values[name] = value
+            return define
+        slot = resolved[1]
+
+        def define(env, value):
+            env.values[slot] = value
+        return define
+
+    # Statements
+
+    def visit_expression_stmt(self, stmt: ExpressionStmt):
+        expression = self.compile_expr(stmt.expression)
+
+        def run(env):
+            expression(env)
+        return run
+
+    def visit_import_stmt(self, stmt: ImportStmt):
+        def run(env):
+            import_module(self, stmt)
+        return run
+
+    def visit_print_stmt(self, stmt: PrintStmt):
+        expression = self.compile_expr(stmt.expression)
+        to_string = self.to_string
+        interpreter = self
+
+        def run(env):
+            print(to_string(expression(env)), file=interpreter.output)
+        return run
+
+    def visit_var_stmt(self, stmt: VarStmt):
+        define = self.definer(stmt, stmt.name.lexeme)
+        if stmt.initializer is None:
+            def run(env):
+                define(env, None)
+            return run
+        initializer = self.compile_expr(stmt.initializer)
+
+        def run(env):
+            define(env, initializer(env))
+        return run
+
+    def visit_block_stmt(self, stmt: BlockStmt):
+        block = self.compile_block(stmt.statements)
+        size = self.scope_sizes[stmt]
+
+        def run(env):
+            return block(Environment(env, size))
+        return run
+
+    def visit_if_stmt(self, stmt: IfStmt):
+        condition = self.compile_expr(stmt.condition)
+        then_branch = self.compile_stmt(stmt.then_branch)
+        if stmt.else_branch is None:
+            def run(env):
+                value = condition(env)
+                if value is not None and value is not False:
+                    return then_branch(env)
+            return run
+        else_branch = self.compile_stmt(stmt.else_branch)
+
+        def run(env):
+            value = condition(env)
+            if value is not None and value is not False:
+                return then_branch(env)
+            return else_branch(env)
+        return run
+
+    def visit_while_stmt(self, stmt: WhileStmt):
+        condition = self.compile_expr(stmt.condition)
+        body = self.compile_stmt(stmt.body)
+        line = stmt.keyword.line
+        interpreter = self
+
+        def run(env):
+            value = condition(env)
+            while value is not None and value is not False:
+                interpreter.fuel -= 1
+                if not interpreter.fuel:
+                    interpreter.refuel(line)
+                result = body(env)
+                if result is not None:
+                    return result
+                value = condition(env)
+        return run
+
+    def visit_function_stmt(self, stmt: FunctionStmt):
+        define = self.definer(stmt, stmt.name.lexeme)
+        make = self.compile_function(stmt, False)
+        interpreter = self
+
+        def run(env):
+            interpreter.allocated += 1
+            define(env, make(env))
+        return run
+
+    def visit_return_stmt(self, stmt: ReturnStmt):
+        if stmt.value is None:
+            def run(env):
+                return (None,)
+            return run
+        value = self.compile_expr(stmt.value)
+
+        def run(env):
+            return (value(env),)
+        return run
+
+    def visit_class_stmt(self, stmt: ClassStmt):
+        name = stmt.name.lexeme
+        define = self.definer(stmt, name)
+        superclass_expr = self.compile_expr(stmt.superclass) if stmt.superclass is not None else None
+        superclass_token = stmt.superclass.name if stmt.superclass is not None else None
+        methods = [(method.name.lexeme, self.compile_function(method, method.name.lexeme == "init"))
+                   for method in stmt.methods]
+
+        def run(env):
+            superclass = None
+            if superclass_expr is not None:
+                superclass = superclass_expr(env)
+                if not isinstance(superclass, LoxClass):
+                    raise RuntimeError(superclass_token, "Superclass must be a class.")
+            define(env, None)
+            method_env = env
+            if superclass_expr is not None:
+                method_env = Environment(env, 1)
+                method_env.values[0] = superclass
+            klass = LoxClass(name, superclass, {method_name: make(method_env) for method_name, make in methods})
+            define(env, klass)
+        return run
+
+    # Expressions
+
+    def visit_literal_expr(self, expr: Literal):
+        value = expr.value
+
+        def run(env):
+            return value
+        return run
+
+    def visit_grouping_expr(self, expr: Grouping):
+        return self.compile_expr(expr.expression)
+
+    def visit_unary_expr(self, expr: Unary):
+        right = self.compile_expr(expr.right)
+        operator = expr.operator
+        if operator.type == TokenType.MINUS:
+            def run(env):
+                value = right(env)
+                if type(value) is not float:
+                    raise RuntimeError(operator, "Operand must be a number.")
+                return -value
+            return run
+
+        def run(env):
+            value = right(env)
+            return value is None or value is False
+        return run
+
+    def visit_binary_expr(self, expr: Binary):
+        left = self.compile_expr(expr.left)
+        operator = expr.operator
+        kind = operator.type
+        if kind == TokenType.PLUS:
+            right = self.compile_expr(expr.right)
+
+            def run(env):
+                a = left(env)
+                b = right(env)
+                if type(a) is float and type(b) is float:
+                    return a + b
+                if isinstance(a, STRINGS) or isinstance(b, STRINGS):
+                    return concat(a, b)
+                raise RuntimeError(operator, "Operands must be two numbers or two strings.")
+            return run
+        if kind == TokenType.EQUAL_EQUAL:
+            right = self.compile_expr(expr.right)
+            return lambda env: left(env) == right(env)
+        if kind == TokenType.BANG_EQUAL:
+            right = self.compile_expr(expr.right)
+            return lambda env: not left(env) == right(env)
+        if kind == TokenType.SLASH:
+            right = self.compile_expr(expr.right)
+
+            def run(env):
+                a = left(env)
+                b = right(env)
+                if type(a) is not float or type(b) is not float:
+                    raise RuntimeError(operator, "Operands must be numbers.")
+                if b == 0:
+                    raise RuntimeError(operator, "Division by zero.")
+                return a / b
+            return run
+        return self.numeric_binary(left, operator, expr.right)
+
+    def numeric_binary(self, left, operator, right_expr):  # Arithmetic and comparisons on two numbers
+        kind = operator.type
+        if isinstance(right_expr, Literal) and type(right_expr.value) is float:
+            constant = right_expr.value  # A number on the right needs only one type check
+            if kind == TokenType.MINUS:
+                def run(env):
+                    a = left(env)
+                    if type(a) is not float:
+                        raise RuntimeError(operator, "Operands must be numbers.")
+                    return a - constant
+            elif kind == TokenType.STAR:
+                def run(env):
+                    a = left(env)
+                    if type(a) is not float:
+                        raise RuntimeError(operator, "Operands must be numbers.")
+                    return a * constant
+            elif kind == TokenType.LESS:
+                def run(env):
+                    a = left(env)
+                    if type(a) is not float:
+                        raise RuntimeError(operator, "Operands must be numbers.")
+                    return a < constant
+            elif kind == TokenType.LESS_EQUAL:
+                def run(env):
+                    a = left(env)
+                    if type(a) is not float:
+                        raise RuntimeError(operator, "Operands must be numbers.")
+                    return a <= constant
+            elif kind == TokenType.GREATER:
+                def run(env):
+                    a = left(env)
+                    if type(a) is not float:
+                        raise RuntimeError(operator, "Operands must be numbers.")
+                    return a > constant
+            else:
+                def run(env):
+                    a = left(env)
+                    if type(a) is not float:
+                        raise RuntimeError(operator, "Operands must be numbers.")
+                    return a >= constant
+            return run
+
+        right = self.compile_expr(right_expr)
+        if kind == TokenType.MINUS:
+            def run(env):
+                a = left(env)
+                b = right(env)
+                if type(a) is not float or type(b) is not float:
+                    raise RuntimeError(operator, "Operands must be numbers.")
+                return a - b
+        elif kind == TokenType.STAR:
+            def run(env):
+                a = left(env)
+                b = right(env)
+                if type(a) is not float or type(b) is not float:
+                    raise RuntimeError(operator, "Operands must be numbers.")
+                return a * b
+        elif kind == TokenType.LESS:
+            def run(env):
+                a = left(env)
+                b = right(env)
+                if type(a) is not float or type(b) is not float:
+                    raise RuntimeError(operator, "Operands must be numbers.")
+                return a < b
+        elif kind == TokenType.LESS_EQUAL:
+            def run(env):
+                a = left(env)
+                b = right(env)
+                if type(a) is not float or type(b) is not float:
+                    raise RuntimeError(operator, "Operands must be numbers.")
+                return a <= b
+        elif kind == TokenType.GREATER:
+            def run(env):
+                a = left(env)
+                b = right(env)
+                if type(a) is not float or type(b) is not float:
+                    raise RuntimeError(operator, "Operands must be numbers.")
+                return a > b
+        else:
+            def run(env):
+                a = left(env)
+                b = right(env)
+                if type(a) is not float or type(b) is not float:
+                    raise RuntimeError(operator, "Operands must be numbers.")
+                return a >= b
+        return run
+
+    def variable_reader(self, expr, token):  # Closure that reads a variable resolved to a fixed depth and slot
+        resolved = self.locals.get(expr)
+        if resolved is None:
+            values = self.globals.values
+            name = token.lexeme
+
+            def run(env):
+                if name in values:
+                    return values[name]
+                raise RuntimeError(token, f"Undefined variable '{name}'.")
+            return run
+        depth, slot = resolved
+        if depth == 0:
+            def run(env):
+                return env.values[slot]
+        elif depth == 1:
+            def run(env):
+                return env.enclosing.values[slot]
+        elif depth == 2:
+            def run(env):
+                return env.enclosing.enclosing.values[slot]
+        else:
+            def run(env):
+                return env.ancestor(depth).values[slot]
+        return run
+
+    def visit_variable_expr(self, expr: Variable):
+        return self.variable_reader(expr, expr.name)
+
+    def visit_assign_expr(self, expr: Assign):
+        value = self.compile_expr(expr.value)
+        name = expr.name
+        resolved = self.locals.get(expr)
+        if resolved is None:
+            globals = self.globals
+
+            def run(env):
+                result = value(env)
+                globals.assign(name, result)
+                return result
+            return run
+        depth, slot = resolved
+        if depth == 0:
+            def run(env):
+                result = env.values[slot] = value(env)
+                return result
+        else:
+            def run(env):
+                result = env.ancestor(depth).values[slot] = value(env)
+                return result
+        return run
+
+    def visit_call_expr(self, expr: Call):
+        if type(expr.callee) is Get:
+            return self.compile_invoke(expr, expr.callee)
+        if type(expr.callee) is Super:
+            return self.compile_super_invoke(expr, expr.callee)
+        callee = self.compile_expr(expr.callee)
+        arguments = tuple(self.compile_expr(argument) for argument in expr.arguments)
+        paren = expr.paren
+        argc = len(arguments)
+        interpreter = self
+
+        def run(env):
+            function = callee(env)
+            values = [argument(env) for argument in arguments]
+            if type(function) is CompiledFunction:  # Common case: skip the generic checks below
+                if argc != len(function.declaration.params):
+                    raise RuntimeError(paren, f"Expected {function.arity()} arguments but got {argc}.")
+                return function.call(interpreter, values)
+            if not isinstance(function, LoxCallable):
+                raise RuntimeError(paren, "Can only call functions and classes.")
+            if argc != function.arity():
+                raise RuntimeError(paren, f"Expected {function.arity()} arguments but got {argc}.")
+            try:
+                return function.call(interpreter, values)
+            except NativeError as error:  # A native function failed: locate it at this call
+                raise RuntimeError(paren, str(error))
+        return run
+
+    def compile_invoke(self, expr, get):  # obj.name(...) calls the method with obj as "this", no bound method
+        obj = self.compile_expr(get.object)
+        arguments = tuple(self.compile_expr(argument) for argument in expr.arguments)
+        name = get.name
+        field = name.lexeme
+        find_method = self.inline_caches[get].find_method
+        paren = expr.paren
+        argc = len(arguments)
+        interpreter = self
+
+        def run(env):
+            instance = obj(env)
+            if not isinstance(instance, LoxInstance):
+                raise RuntimeError(name, "Only instances have properties.")
+            fields = instance.fields
+            if field in fields:  # A field holding a callable is called like any other value
+                function = fields[field]
+                values = [argument(env) for argument in arguments]
+                if not isinstance(function, LoxCallable):
+                    raise RuntimeError(paren, "Can only call functions and classes.")
+                if argc != function.arity():
+                    raise RuntimeError(paren, f"Expected {function.arity()} arguments but got {argc}.")
+                try:
+                    return function.call(interpreter, values)
+                except NativeError as error:
+                    raise RuntimeError(paren, str(error))
+            method = find_method(instance.klass, field)
+            if not method:
+                raise RuntimeError(name, f"Undefined property '{field}'.")
+            values = [argument(env) for argument in arguments]
+            if argc != len(method.declaration.params):
+                raise RuntimeError(paren, f"Expected {method.arity()} arguments but got {argc}.")
+            return method.call_method(interpreter, instance, values)
+        return run
+
+    def compile_super_invoke(self, expr, callee):
+        distance = self.locals[callee][0]
+        arguments = tuple(self.compile_expr(argument) for argument in expr.arguments)
+        method_token = callee.method
+        method_name = method_token.lexeme
+        find_method = self.inline_caches[callee].find_method
+        paren = expr.paren
+        argc = len(arguments)
+        interpreter = self
+
+        def run(env):
+            superclass = env.ancestor(distance).values[0]
+            instance = env.ancestor(distance - 1).values[0]
+            method = find_method(superclass, method_name)
+            if not method:
+                raise RuntimeError(method_token, f"Undefined property '{method_name}'.")
+            values = [argument(env) for argument in arguments]
+            if argc != len(method.declaration.params):
+                raise RuntimeError(paren, f"Expected {method.arity()} arguments but got {argc}.")
+            return method.call_method(interpreter, instance, values)
+        return run
+
+    def visit_get_expr(self, expr: Get):
+        obj = self.compile_expr(expr.object)
+        name = expr.name
+        field = name.lexeme
+        find_method = self.inline_caches[expr].find_method
+        interpreter = self
+
+        def run(env):
+            instance = obj(env)
+            if not isinstance(instance, LoxInstance):
+                raise RuntimeError(name, "Only instances have properties.")
+            fields = instance.fields
+            if field in fields:
+                return fields[field]
+            method = find_method(instance.klass, field)
+            if method:
+                interpreter.allocated += 1
+                return method.bind(instance)
+            raise RuntimeError(name, f"Undefined property '{field}'.")
+        return run
+
+    def visit_set_expr(self, expr: Set):
+        obj = self.compile_expr(expr.object)
+        value = self.compile_expr(expr.value)
+        name = expr.name
+        field = name.lexeme
+
+        def run(env):
+            instance = obj(env)
+            if not isinstance(instance, LoxInstance):
+                raise RuntimeError(name, "Only instances have fields.")
+            result = instance.fields[field] = value(env)
+            return result
+        return run
+
+    def visit_list_expr(self, expr: List):
+        elements = [self.compile_expr(element) for element in expr.elements]
+        interpreter = self
+
+        def run(env):
+            values = [element(env) for element in elements]
+            interpreter.allocated += 1
+            return LoxList(values)
+        return run
+
+    def visit_map_expr(self, expr: Map):
+        items = []
+        for key, value in zip(expr.keys, expr.values):
+            items.append(self.compile_expr(key))
+            items.append(self.compile_expr(value))
+        interpreter = self
+
+        def run(env):
+            values = [item(env) for item in items]
+            interpreter.allocated += 1
+            return build_map(values)
+        return run
+
+    def visit_index_expr(self, expr: Index):
+        obj = self.compile_expr(expr.object)
+        index = self.compile_expr(expr.index)
+        bracket = expr.bracket
+
+        def run(env):
+            container = obj(env)
+            subscript = index(env)
+            try:
+                return get_item(container, subscript)
+            except NativeError as error:
+                raise RuntimeError(bracket, str(error))
+        return run
+
+    def visit_setindex_expr(self, expr: SetIndex):
+        obj = self.compile_expr(expr.object)
+        index = self.compile_expr(expr.index)
+        value = self.compile_expr(expr.value)
+        bracket = expr.bracket
+
+        def run(env):
+            container = obj(env)
+            subscript = index(env)
+            result = value(env)
+            try:
+                return set_item(container, subscript, result)
+            except NativeError as error:
+                raise RuntimeError(bracket, str(error))
+        return run
+
+    def visit_this_expr(self, expr: This):
+        return self.variable_reader(expr, expr.keyword)
+
+    def visit_super_expr(self, expr: Super):
+        distance = self.locals[expr][0]
+        method_token = expr.method
+        method_name = method_token.lexeme
+        find_method = self.inline_caches[expr].find_method
+        interpreter = self
+
+        def run(env):
+            superclass = env.ancestor(distance).values[0]
+            instance = env.ancestor(distance - 1).values[0]
+            method = find_method(superclass, method_name)
+            if not method:
+                raise RuntimeError(method_token, f"Undefined property '{method_name}'.")
+            interpreter.allocated += 1
+            return method.bind(instance)
+        return run
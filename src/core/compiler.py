@@ -0,0 +1,543 @@
+from src.ast.expr import *
+from src.ast.stmt import *
+from src.core.chunk import OpCode, FunctionProto
+from src.core.token_type import TokenType
+
+class _Local:
+    def __init__(self, name, depth, captured):
+        self.name = name
+        self.depth = depth
+        self.captured = captured  # Captured locals live in a Cell so closures share them
+
+class _FunctionState:  # Per-function compilation state
+    def __init__(self, proto, kind, enclosing):
+        self.proto = proto
+        self.kind = kind  # "script", "function", "method" or "initializer"
+        self.enclosing = enclosing
+        self.locals = []
+        self.upvalues = []  # (is_local, index) pairs
+        self.scope_depth = 0
+
+class CaptureAnalyzer:  # Finds the declarations that are referenced from an inner function
+    def __init__(self):
+        self.scopes = []  # Each scope maps a name to (declaration key, function level)
+        self.level = 0
+        self.captured = set()
+
+    def analyze(self, statements):
+        self._walk(statements)
+        return self.captured
+
+    def _walk(self, statements):
+        for stmt in statements:
+            stmt.accept(self)
+
+    def _declare(self, name, key):
+        if self.scopes:
+            self.scopes[-1][name] = (key, self.level)
+
+    def _reference(self, name):
+        for scope in reversed(self.scopes):
+            if name in scope:
+                key, level = scope[name]
+                if level != self.level:
+                    self.captured.add(key)
+                return
+
+    def _function(self, stmt, is_method):
+        self.level += 1
+        self.scopes.append({})
+        if is_method:
+            self._declare("this", ("this", stmt))
+        for param in stmt.params:
+            self._declare(param.lexeme, param)
+        self._walk(stmt.body)
+        self.scopes.pop()
+        self.level -= 1
+
+    def visit_block_stmt(self, stmt):
+        self.scopes.append({})
+        self._walk(stmt.statements)
+        self.scopes.pop()
+
+    def visit_var_stmt(self, stmt):
+        if stmt.initializer is not None:
+            stmt.initializer.accept(self)
+        self._declare(stmt.name.lexeme, stmt.name)
+
+    def visit_function_stmt(self, stmt):
+        self._declare(stmt.name.lexeme, stmt.name)
+        self._function(stmt, False)
+
+    def visit_class_stmt(self, stmt):
+        self._declare(stmt.name.lexeme, stmt.name)
+        if stmt.superclass is not None:
+            stmt.superclass.accept(self)
+            self.scopes.append({})
+            self._declare("super", ("super", stmt))
+        for method in stmt.methods:
+            self._function(method, True)
+        if stmt.superclass is not None:
+            self.scopes.pop()
+
+    def visit_expression_stmt(self, stmt):
+        stmt.expression.accept(self)
+
+    def visit_print_stmt(self, stmt):
+        stmt.expression.accept(self)
+
+    def visit_import_stmt(self, stmt):
+        pass
+
+    def visit_return_stmt(self, stmt):
+        if stmt.value is not None:
+            stmt.value.accept(self)
+
+    def visit_if_stmt(self, stmt):
+        stmt.condition.accept(self)
+        stmt.then_branch.accept(self)
+        if stmt.else_branch is not None:
+            stmt.else_branch.accept(self)
+
+    def visit_while_stmt(self, stmt):
+        stmt.condition.accept(self)
+        stmt.body.accept(self)
+
+    def visit_variable_expr(self, expr):
+        self._reference(expr.name.lexeme)
+
+    def visit_assign_expr(self, expr):
+        expr.value.accept(self)
+        self._reference(expr.name.lexeme)
+
+    def visit_this_expr(self, expr):
+        self._reference("this")
+
+    def visit_super_expr(self, expr):
+        self._reference("this")
+        self._reference("super")
+
+    def visit_literal_expr(self, expr):
+        pass
+
+    def visit_grouping_expr(self, expr):
+        expr.expression.accept(self)
+
+    def visit_unary_expr(self, expr):
+        expr.right.accept(self)
+
+    def visit_binary_expr(self, expr):
+        expr.left.accept(self)
+        expr.right.accept(self)
+
+    def visit_logical_expr(self, expr):
+        expr.left.accept(self)
+        expr.right.accept(self)
+
+    def visit_call_expr(self, expr):
+        expr.callee.accept(self)
+        for argument in expr.arguments:
+            argument.accept(self)
+
+    def visit_get_expr(self, expr):
+        expr.object.accept(self)
+
+    def visit_set_expr(self, expr):
+        expr.object.accept(self)
+        expr.value.accept(self)
+
+    def visit_list_expr(self, expr):
+        for element in expr.elements:
+            element.accept(self)
+
+    def visit_map_expr(self, expr):
+        for key, value in zip(expr.keys, expr.values):
+            key.accept(self)
+            value.accept(self)
+
+    def visit_index_expr(self, expr):
+        expr.object.accept(self)
+        expr.index.accept(self)
+
+    def visit_setindex_expr(self, expr):
+        expr.object.accept(self)
+        expr.index.accept(self)
+        expr.value.accept(self)
+
+class Compiler:  # Compiles a resolved AST into bytecode for the VM
+    BINARY_OPS = {
+        TokenType.PLUS: OpCode.ADD,
+        TokenType.MINUS: OpCode.SUBTRACT,
+        TokenType.STAR: OpCode.MULTIPLY,
+        TokenType.SLASH: OpCode.DIVIDE,
+        TokenType.GREATER: OpCode.GREATER,
+        TokenType.GREATER_EQUAL: OpCode.GREATER_EQUAL,
+        TokenType.LESS: OpCode.LESS,
+        TokenType.LESS_EQUAL: OpCode.LESS_EQUAL,
+        TokenType.BANG_EQUAL: OpCode.NOT_EQUAL,
+        TokenType.EQUAL_EQUAL: OpCode.EQUAL,
+    }
+
+    def __init__(self, locals, globals):
+        self.locals = locals  # Resolver output: expressions that refer to a local variable
+        self.globals = globals  # Global values of the module being compiled
+        self.captured = set()
+        self.state = None
+        self.line = 1
+
+    def compile(self, statements):  # Compile a program into its top-level script function
+        self.captured = CaptureAnalyzer().analyze(statements)
+        self.state = _FunctionState(FunctionProto(None, 0, self.globals), "script", None)
+        self.state.locals.append(_Local("", 0, False))  # Slot 0 holds the running closure
+        for stmt in statements:
+            self._compile(stmt)
+        self._emit_return()
+        return self.state.proto
+
+    def _compile(self, node):
+        node.accept(self)
+
+    # Emission helpers
+
+    def _emit(self, *words):
+        chunk = self.state.proto.chunk
+        for word in words:
+            chunk.write(int(word), self.line)
+
+    def _constant(self, value):
+        return self.state.proto.chunk.add_constant(value)
+
+    def _emit_jump(self, op):  # Emit a jump with a placeholder target and return the operand position
+        self._emit(op, 0)
+        return len(self.state.proto.chunk.code) - 1
+
+    def _patch_jump(self, position):
+        self.state.proto.chunk.code[position] = len(self.state.proto.chunk.code)
+
+    def _emit_return(self):
+        if self.state.kind == "initializer":
+            self._emit_get_local(0)  # Initializers always return this
+        else:
+            self._emit(OpCode.NIL)
+        self._emit(OpCode.RETURN)
+
+    # Scopes and variables
+
+    def _begin_scope(self):
+        self.state.scope_depth += 1
+
+    def _end_scope(self):
+        state = self.state
+        state.scope_depth -= 1
+        count = 0
+        while state.locals and state.locals[-1].depth > state.scope_depth:
+            state.locals.pop()
+            count += 1
+        if count == 1:
+            self._emit(OpCode.POP)
+        elif count > 1:
+            self._emit(OpCode.POPN, count)
+
+    def _add_local(self, name, key):  # The value on top of the stack becomes the new local
+        captured = key in self.captured
+        self.state.locals.append(_Local(name, self.state.scope_depth, captured))
+        return len(self.state.locals) - 1
+
+    def _box_if_captured(self, slot):
+        if self.state.locals[slot].captured:
+            self._emit(OpCode.BOX, slot)
+
+    def _resolve_local(self, state, name):
+        for i in range(len(state.locals) - 1, -1, -1):
+            if state.locals[i].name == name:
+                return i
+        return -1
+
+    def _resolve_upvalue(self, state, name):
+        if state.enclosing is None:
+            return -1
+        local = self._resolve_local(state.enclosing, name)
+        if local != -1:
+            return self._add_upvalue(state, True, local)
+        upvalue = self._resolve_upvalue(state.enclosing, name)
+        if upvalue != -1:
+            return self._add_upvalue(state, False, upvalue)
+        return -1
+
+    def _add_upvalue(self, state, is_local, index):
+        if (is_local, index) in state.upvalues:
+            return state.upvalues.index((is_local, index))
+        state.upvalues.append((is_local, index))
+        state.proto.upvalue_count = len(state.upvalues)
+        return len(state.upvalues) - 1
+
+    def _emit_get_local(self, slot):
+        if self.state.locals[slot].captured:
+            self._emit(OpCode.GET_CELL, slot)
+        else:
+            self._emit(OpCode.GET_LOCAL, slot)
+
+    def _named_variable(self, expr, name, assign=False):  # Emit a read or write of a variable
+        if expr is not None and expr not in self.locals:
+            self._emit(OpCode.SET_GLOBAL if assign else OpCode.GET_GLOBAL, self._constant(name))
+            return
+        slot = self._resolve_local(self.state, name)
+        if slot != -1:
+            if self.state.locals[slot].captured:
+                self._emit(OpCode.SET_CELL if assign else OpCode.GET_CELL, slot)
+            else:
+                self._emit(OpCode.SET_LOCAL if assign else OpCode.GET_LOCAL, slot)
+            return
+        upvalue = self._resolve_upvalue(self.state, name)
+        if upvalue != -1:
+            self._emit(OpCode.SET_UPVALUE if assign else OpCode.GET_UPVALUE, upvalue)
+        else:
+            self._emit(OpCode.SET_GLOBAL if assign else OpCode.GET_GLOBAL, self._constant(name))
+
+    def _function(self, stmt, kind):  # Compile a function body and emit the closure that creates it
+        proto = FunctionProto(stmt.name.lexeme, len(stmt.params), self.globals)
+        self.state = _FunctionState(proto, kind, self.state)
+        self._begin_scope()
+        if kind in ("method", "initializer"):
+            self._add_local("this", ("this", stmt))
+        else:
+            self.state.locals.append(_Local("", 1, False))
+        for param in stmt.params:
+            self._add_local(param.lexeme, param)
+        for slot in range(len(self.state.locals)):
+            self._box_if_captured(slot)
+        for body_stmt in stmt.body:
+            self._compile(body_stmt)
+        self._emit_return()
+
+        state = self.state
+        self.state = state.enclosing
+        self._emit(OpCode.CLOSURE, self._constant(proto))
+        for is_local, index in state.upvalues:
+            self._emit(1 if is_local else 0, index)
+
+    # Statements
+
+    def visit_expression_stmt(self, stmt: ExpressionStmt):
+        self._compile(stmt.expression)
+        self._emit(OpCode.POP)
+
+    def visit_print_stmt(self, stmt: PrintStmt):
+        self._compile(stmt.expression)
+        self._emit(OpCode.PRINT)
+
+    def visit_import_stmt(self, stmt: ImportStmt):
+        self.line = stmt.keyword.line
+        self._emit(OpCode.IMPORT, self._constant(stmt))
+
+    def visit_var_stmt(self, stmt: VarStmt):
+        self.line = stmt.name.line
+        if stmt.initializer is not None:
+            self._compile(stmt.initializer)
+        else:
+            self._emit(OpCode.NIL)
+        if self.state.scope_depth == 0:
+            self._emit(OpCode.DEFINE_GLOBAL, self._constant(stmt.name.lexeme))
+        else:
+            self._box_if_captured(self._add_local(stmt.name.lexeme, stmt.name))
+
+    def visit_block_stmt(self, stmt: BlockStmt):
+        self._begin_scope()
+        for inner in stmt.statements:
+            self._compile(inner)
+        self._end_scope()
+
+    def visit_if_stmt(self, stmt: IfStmt):
+        self._compile(stmt.condition)
+        else_jump = self._emit_jump(OpCode.JUMP_IF_FALSE)
+        self._compile(stmt.then_branch)
+        if stmt.else_branch is None:
+            self._patch_jump(else_jump)
+            return
+        end_jump = self._emit_jump(OpCode.JUMP)
+        self._patch_jump(else_jump)
+        self._compile(stmt.else_branch)
+        self._patch_jump(end_jump)
+
+    def visit_while_stmt(self, stmt: WhileStmt):
+        loop_start = len(self.state.proto.chunk.code)
+        self._compile(stmt.condition)
+        exit_jump = self._emit_jump(OpCode.JUMP_IF_FALSE)
+        self._compile(stmt.body)
+        self.line = stmt.keyword.line  # Budget errors raised at the loop's back edge point at the "while"
+        self._emit(OpCode.LOOP, loop_start)
+        self._patch_jump(exit_jump)
+
+    def visit_function_stmt(self, stmt: FunctionStmt):
+        self.line = stmt.name.line
+        name = stmt.name.lexeme
+        if self.state.scope_depth == 0:
+            self._function(stmt, "function")
+            self._emit(OpCode.DEFINE_GLOBAL, self._constant(name))
+            return
+        slot = self._add_local(name, stmt.name)
+        if self.state.locals[slot].captured:  # The function can see itself, so its cell must exist first
+            self._emit(OpCode.NIL)
+            self._emit(OpCode.BOX, slot)
+            self._function(stmt, "function")
+            self._emit(OpCode.SET_CELL, slot)
+            self._emit(OpCode.POP)
+        else:
+            self._function(stmt, "function")
+
+    def visit_return_stmt(self, stmt: ReturnStmt):
+        self.line = stmt.keyword.line
+        if stmt.value is None:
+            self._emit_return()
+            return
+        self._compile(stmt.value)
+        self._emit(OpCode.RETURN)
+
+    def visit_class_stmt(self, stmt: ClassStmt):
+        self.line = stmt.name.line
+        name = stmt.name.lexeme
+        name_constant = self._constant(name)
+        slot = -1
+        if self.state.scope_depth > 0:
+            self._emit(OpCode.NIL)
+            slot = self._add_local(name, stmt.name)
+            self._box_if_captured(slot)
+
+        if stmt.superclass is not None:
+            self._begin_scope()
+            self._compile(stmt.superclass)
+            super_slot = self._add_local("super", ("super", stmt))
+            self._box_if_captured(super_slot)
+
+        self._emit(OpCode.CLASS, name_constant)
+        if stmt.superclass is not None:
+            self.line = stmt.superclass.name.line
+            self._emit_get_local(super_slot)
+            self._emit(OpCode.INHERIT)
+
+        for method in stmt.methods:
+            self.line = method.name.line
+            kind = "initializer" if method.name.lexeme == "init" else "method"
+            self._function(method, kind)
+            self._emit(OpCode.METHOD, self._constant(method.name.lexeme))
+
+        if slot == -1:
+            self._emit(OpCode.DEFINE_GLOBAL, name_constant)
+        else:
+            self._emit(OpCode.SET_CELL if self.state.locals[slot].captured else OpCode.SET_LOCAL, slot)
+            self._emit(OpCode.POP)
+
+        if stmt.superclass is not None:
+            self._end_scope()
+
+    # Expressions
+
+    def visit_literal_expr(self, expr: Literal):
+        if expr.value is None:
+            self._emit(OpCode.NIL)
+        elif expr.value is True:
+            self._emit(OpCode.TRUE)
+        elif expr.value is False:
+            self._emit(OpCode.FALSE)
+        else:
+            self._emit(OpCode.CONSTANT, self._constant(expr.value))
+
+    def visit_grouping_expr(self, expr: Grouping):
+        self._compile(expr.expression)
+
+    def visit_unary_expr(self, expr: Unary):
+        self._compile(expr.right)
+        self.line = expr.operator.line
+        if expr.operator.type == TokenType.MINUS:
+            self._emit(OpCode.NEGATE)
+        else:
+            self._emit(OpCode.NOT)
+
+    def visit_binary_expr(self, expr: Binary):
+        self._compile(expr.left)
+        self._compile(expr.right)
+        self.line = expr.operator.line
+        self._emit(self.BINARY_OPS[expr.operator.type])
+
+    def visit_variable_expr(self, expr: Variable):
+        self.line = expr.name.line
+        self._named_variable(expr, expr.name.lexeme)
+
+    def visit_assign_expr(self, expr: Assign):
+        self._compile(expr.value)
+        self.line = expr.name.line
+        self._named_variable(expr, expr.name.lexeme, assign=True)
+
+    def visit_call_expr(self, expr: Call):
+        argc = len(expr.arguments)
+        if isinstance(expr.callee, Get):  # Method calls skip creating a bound method
+            self._compile(expr.callee.object)
+            for argument in expr.arguments:
+                self._compile(argument)
+            self.line = expr.paren.line
+            self._emit(OpCode.INVOKE, self._constant(expr.callee.name.lexeme), argc)
+            return
+        if isinstance(expr.callee, Super):
+            self._named_variable(expr.callee, "this")
+            for argument in expr.arguments:
+                self._compile(argument)
+            self._named_variable(expr.callee, "super")
+            self.line = expr.paren.line
+            self._emit(OpCode.SUPER_INVOKE, self._constant(expr.callee.method.lexeme), argc)
+            return
+        self._compile(expr.callee)
+        for argument in expr.arguments:
+            self._compile(argument)
+        self.line = expr.paren.line
+        self._emit(OpCode.CALL, argc)
+
+    def visit_get_expr(self, expr: Get):
+        self._compile(expr.object)
+        self.line = expr.name.line
+        self._emit(OpCode.GET_PROPERTY, self._constant(expr.name.lexeme))
+
+    def visit_set_expr(self, expr: Set):
+        self._compile(expr.object)
+        self.line = expr.name.line
+        if not isinstance(expr.object, This):  # Report a non-instance before evaluating the value
+            self._emit(OpCode.CHECK_INSTANCE)
+        self._compile(expr.value)
+        self.line = expr.name.line
+        self._emit(OpCode.SET_PROPERTY, self._constant(expr.name.lexeme))
+
+    def visit_list_expr(self, expr: List):
+        for element in expr.elements:
+            self._compile(element)
+        self.line = expr.bracket.line
+        self._emit(OpCode.BUILD_LIST, len(expr.elements))
+
+    def visit_map_expr(self, expr: Map):
+        for key, value in zip(expr.keys, expr.values):
+            self._compile(key)
+            self._compile(value)
+        self.line = expr.brace.line
+        self._emit(OpCode.BUILD_MAP, len(expr.keys))
+
+    def visit_index_expr(self, expr: Index):
+        self._compile(expr.object)
+        self._compile(expr.index)
+        self.line = expr.bracket.line
+        self._emit(OpCode.GET_INDEX)
+
+    def visit_setindex_expr(self, expr: SetIndex):
+        self._compile(expr.object)
+        self._compile(expr.index)
+        self._compile(expr.value)
+        self.line = expr.bracket.line
+        self._emit(OpCode.SET_INDEX)
+
+    def visit_this_expr(self, expr: This):
+        self.line = expr.keyword.line
+        self._named_variable(expr, "this")
+
+    def visit_super_expr(self, expr: Super):
+        self.line = expr.keyword.line
+        self._named_variable(expr, "this")
+        self._named_variable(expr, "super")
+        self.line = expr.method.line
+        self._emit(OpCode.GET_SUPER, self._constant(expr.method.lexeme))
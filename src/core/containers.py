@@ -0,0 +1,199 @@
+# List and Map: native collections backed by a Python list and dict. Literals build them and
+# subscripts read and write them, in every backend:
+#
+#   var xs = [1, 2, 3];  xs[0] = 10;  xs.push(4);  print xs.len();      // 4
+#   var m = {"a": 1, true: "yes"};  m["b"] = 2;  print m[true];         // yes
+#   print m.has("c");  print m["c"];  print m.keys();                   // False, nil, ["a", True, "b"]
+#
+# Indexing is O(1). A missing map key reads as nil. Map keys follow Lox equality: numbers,
+# strings, nil and booleans by value, everything else by identity. Python would merge true
+# with 1 and false with 0, so booleans are stored as distinct sentinel keys.
+from src.core.interpreter import LoxClass, LoxInstance
+from src.core.native import Members, allocates, error, index
+from src.core.numarray import NumArray
+from src.core.rope import Rope
+
+class BoolKey:  # Map key standing for a boolean
+    __slots__ = ("name",)
+
+    def __init__(self, name):
+        self.name = name
+
+    def __reduce__(self):  # Pickled by name, so a map in an image still finds its boolean keys
+        return self.name
+
+TRUE_KEY = BoolKey("TRUE_KEY")
+FALSE_KEY = BoolKey("FALSE_KEY")
+_showing = set()  # ids of collections being printed, so a collection that contains itself prints as [...]
+
+def key(value):  # Dict key for a Lox value
+    if value is True:
+        return TRUE_KEY
+    if value is False:
+        return FALSE_KEY
+    if type(value) is Rope:
+        return str(value)
+    return value
+
+def unkey(value):  # Lox value of a dict key
+    if value is TRUE_KEY:
+        return True
+    if value is FALSE_KEY:
+        return False
+    return value
+
+def show(value):  # How a value prints inside a collection: as print shows it, with strings quoted
+    if value is None:
+        return "nil"
+    if type(value) is float:
+        text = str(value)
+        return text[:-2] if text.endswith(".0") else text
+    if type(value) is str or type(value) is Rope:
+        return f'"{value}"'
+    return str(value)
+
+def get_item(container, subscript):  # container[subscript]
+    kind = type(container)
+    if kind is LoxList:
+        values = container.values
+        return values[index(subscript, len(values))]
+    if kind is LoxMap:
+        return container.entries.get(key(subscript))
+    if kind is str or kind is Rope:
+        return str(container)[index(subscript, len(container))]
+    if kind is NumArray:
+        return container.get_item(subscript)
+    raise error("Only lists, maps, strings and NumArrays can be indexed.")
+
+def set_item(container, subscript, value):  # container[subscript] = value
+    kind = type(container)
+    if kind is LoxList:
+        values = container.values
+        values[index(subscript, len(values))] = value
+    elif kind is LoxMap:
+        container.entries[key(subscript)] = value
+    elif kind is NumArray:
+        container.set_item(subscript, value)
+    else:
+        raise error("Only lists, maps and NumArrays can be assigned by index.")
+    return value
+
+def build_map(items):  # Map from a flat sequence of key, value, key, value, ...
+    entries = {}
+    iterator = iter(items)
+    for name, value in zip(iterator, iterator):
+        entries[key(name)] = value
+    return LoxMap(entries)
+
+class LoxList(LoxInstance):
+    def __init__(self, values):
+        self.klass = LIST_CLASS
+        self.fields = Members(self)
+        self.values = values
+
+    def __len__(self):
+        return len(self.values)
+
+    def __str__(self):
+        if id(self) in _showing:
+            return "[...]"
+        _showing.add(id(self))
+        try:
+            return f"[{', '.join(map(show, self.values))}]"
+        finally:
+            _showing.discard(id(self))
+
+    # Methods reachable from Lox; each takes Lox values and returns one
+
+    def length(self):
+        return float(len(self.values))
+
+    def push(self, value):
+        self.values.append(value)
+        return None
+
+    def pop(self):
+        if not self.values:
+            raise error("List is empty.")
+        return self.values.pop()
+
+    def insert(self, i, value):
+        self.values.insert(index(i, len(self.values), end=True), value)
+        return None
+
+    def remove(self, i):
+        return self.values.pop(index(i, len(self.values)))
+
+    @allocates
+    def slice(self, start, end):
+        start = index(start, len(self.values), end=True)
+        end = index(end, len(self.values), end=True)
+        return LoxList(self.values[start:max(start, end)])
+
+    @allocates
+    def copy(self):
+        return LoxList(list(self.values))
+
+class LoxMap(LoxInstance):
+    def __init__(self, entries):
+        self.klass = MAP_CLASS
+        self.fields = Members(self)
+        self.entries = entries
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __str__(self):
+        if id(self) in _showing:
+            return "{...}"
+        _showing.add(id(self))
+        try:
+            return "{" + ", ".join(f"{show(unkey(name))}: {show(value)}" for name, value in self.entries.items()) + "}"
+        finally:
+            _showing.discard(id(self))
+
+    def length(self):
+        return float(len(self.entries))
+
+    def has(self, name):
+        return key(name) in self.entries
+
+    def remove(self, name):  # Returns the removed value, or nil if the key was absent
+        return self.entries.pop(key(name), None)
+
+    @allocates
+    def keys(self):  # In insertion order
+        return LoxList([unkey(name) for name in self.entries])
+
+    @allocates
+    def values(self):
+        return LoxList(list(self.entries.values()))
+
+    @allocates
+    def copy(self):
+        return LoxMap(dict(self.entries))
+
+LIST_METHODS = {  # Lox name -> (function taking the List first, arity)
+    "len": (LoxList.length, 0),
+    "push": (LoxList.push, 1),
+    "pop": (LoxList.pop, 0),
+    "insert": (LoxList.insert, 2),
+    "remove": (LoxList.remove, 1),
+    "slice": (LoxList.slice, 2),
+    "copy": (LoxList.copy, 0),
+}
+
+MAP_METHODS = {
+    "len": (LoxMap.length, 0),
+    "has": (LoxMap.has, 1),
+    "remove": (LoxMap.remove, 1),
+    "keys": (LoxMap.keys, 0),
+    "values": (LoxMap.values, 0),
+    "copy": (LoxMap.copy, 0),
+}
+
+LoxList.METHODS = LIST_METHODS
+LoxMap.METHODS = MAP_METHODS
+
+LIST_CLASS = LoxClass("List", None, {})
+MAP_CLASS = LoxClass("Map", None, {})
@@ -0,0 +1,159 @@
+# Execution counts and line coverage. Instrumentation lives entirely in subclasses that
+# --coverage swaps in, so a normal run's Parser and Interpreter do no extra work.
+import json
+import os
+import sys
+from collections import Counter
+
+from src.ast.expr import Expr
+from src.ast.stmt import Stmt, FunctionStmt
+from src.core.interpreter import Interpreter
+from src.core.lox import Lox, RECURSION_LIMIT
+from src.core.parser import Parser
+from src.core.resolver import Resolver
+from src.core.scanner import Scanner
+from src.core.token1 import Token
+
+class LineParser(Parser):  # Parser that remembers the line each statement starts on
+    def __init__(self, tokens):
+        super().__init__(tokens)
+        self.lines = {}  # Statement -> line
+
+    def declaration(self):
+        line = self.current.line
+        stmt = super().declaration()
+        if stmt is not None:
+            self.lines[stmt] = line
+        return stmt
+
+    def statement(self):  # Branch and loop bodies are parsed here without going through declaration()
+        line = self.current.line
+        stmt = super().statement()
+        self.lines[stmt] = line
+        return stmt
+
+class InstrumentedInterpreter(Interpreter):  # Tree-walker that counts every node it runs and every function call
+    def __init__(self):
+        super().__init__()
+        self.counts = Counter()  # Statement or expression -> times executed or evaluated
+        self.calls = Counter()   # FunctionStmt -> times called
+        self.bodies = {}         # id(function body) -> FunctionStmt, to recognize calls in execute_block
+
+    def interpret(self, statements):
+        for node in walk(statements):
+            if type(node) is FunctionStmt:
+                self.bodies[id(node.body)] = node
+        super().interpret(statements)
+
+    def execute(self, stmt):
+        self.counts[stmt] += 1
+        return stmt.accept(self)
+
+    def evaluate(self, expr):
+        self.counts[expr] += 1
+        return expr.accept(self)
+
+    def execute_block(self, statements, environment):
+        function = self.bodies.get(id(statements))
+        if function is not None:
+            self.calls[function] += 1
+        return super().execute_block(statements, environment)
+
+def walk(node):  # Every statement and expression in a tree or list of trees, parents first
+    if isinstance(node, list):
+        for item in node:
+            yield from walk(item)
+    elif isinstance(node, (Expr, Stmt)):
+        yield node
+        for field in node.__match_args__:
+            yield from walk(getattr(node, field))
+
+def token_line(node):  # Line of the first token among a node's fields, or None
+    for field in node.__match_args__:
+        value = getattr(node, field)
+        if type(value) is Token:
+            return value.line
+    return None
+
+def node_lines(statements, stmt_lines):  # Node -> line: where the parser saw it start, else its token, else its parent's
+    lines = {}
+
+    def visit(node, line):
+        if isinstance(node, list):
+            for item in node:
+                visit(item, line)
+        elif isinstance(node, (Expr, Stmt)):
+            line = stmt_lines.get(node) or token_line(node) or line
+            lines[node] = line
+            for field in node.__match_args__:
+                visit(getattr(node, field), line)
+
+    visit(statements, 0)
+    return lines
+
+class Coverage:  # Counts from one instrumented run, keyed by source line
+    def __init__(self, path, source, statements, stmt_lines, interpreter):
+        self.path = path
+        self.source = source
+        self.nodes = node_lines(statements, stmt_lines)
+        self.counts = interpreter.counts
+        self.calls = interpreter.calls
+        self.lines = {}  # Line with code -> count of its most executed node
+        for node, line in self.nodes.items():
+            self.lines[line] = max(self.lines.get(line, 0), self.counts[node])
+
+    def functions(self):
+        return [{"name": function.name.lexeme, "line": function.name.line, "calls": self.calls[function]}
+                for function in self.nodes if type(function) is FunctionStmt]
+
+    def covered(self):  # Lines with code that ran at least once
+        return sum(1 for count in self.lines.values() if count)
+
+    def to_json(self):
+        return {
+            "script": self.path,
+            "summary": {"lines": len(self.lines), "covered": self.covered()},
+            "lines": {str(line): count for line, count in sorted(self.lines.items())},
+            "functions": self.functions(),
+            "nodes": [{"kind": type(node).__name__, "line": line, "count": self.counts[node]}
+                      for node, line in self.nodes.items()],
+        }
+
+    def annotate(self):  # Source listing with counts in the gcov style: "-" no code, "#####" never run
+        out = []
+        for number, text in enumerate(self.source.splitlines(), 1):
+            count = self.lines.get(number)
+            mark = "-" if count is None else "#####" if count == 0 else str(count)
+            out.append(f"{mark:>9}:{number:5}: {text}")
+        return "\n".join(out) + "\n"
+
+    def summary(self):
+        covered = self.covered()
+        return f"coverage: {covered}/{len(self.lines)} lines ({covered / (len(self.lines) or 1):.1%})"
+
+def run_file(path, output=None):  # Run a script instrumented and write <output>.json and <output>.cov
+    with open(path, encoding="utf-8") as f:
+        source = f.read()
+    interpreter = InstrumentedInterpreter()
+    interpreter.directory = os.path.dirname(os.path.abspath(path))  # Imports are relative to the script
+    Lox.interpreter = interpreter
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), RECURSION_LIMIT))
+    parser = LineParser(Scanner(source).iter_tokens())
+    statements = parser.parse()
+    if not Lox.had_error:
+        Resolver(interpreter).resolve(statements)  # Not optimized: folded-away branches still show as dead code
+    if Lox.had_error:
+        sys.exit(65)
+
+    try:
+        interpreter.interpret(statements)
+    finally:
+        coverage = Coverage(path, source, statements, parser.lines, interpreter)
+        output = output or os.path.basename(path)
+        with open(output + ".json", "w", encoding="utf-8") as f:
+            json.dump(coverage.to_json(), f, indent=2)
+        with open(output + ".cov", "w", encoding="utf-8") as f:
+            f.write(coverage.annotate())
+        print(f"{coverage.summary()}, written to {output}.json and {output}.cov", file=sys.stderr)
+    if Lox.had_runtime_error:
+        sys.exit(70)
@@ -0,0 +1,9 @@
+# The flags of the lox command line. Kept apart from main.py, which imports the interpreter,
+# so the client can find the script argument without paying for that import.
+VALUE_FLAGS = {"--stack-limit", "--max-steps", "--time-limit", "--max-allocations", "--image", "--save-image"}
+
+def script_arguments(args):  # What follows the leading flags and their values: the script path, if any
+    i = 0
+    while i < len(args) and args[i].startswith("--"):
+        i += 2 if args[i] in VALUE_FLAGS else 1
+    return args[i:]
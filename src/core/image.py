@@ -0,0 +1,148 @@
+# Heap images: the global state left behind by a prelude script, saved so that later runs
+# start from it instead of running the prelude again.
+#
+#   lox --save-image prelude.img prelude.lox     # run the prelude, then save its globals
+#   lox --image prelude.img job.lox              # start from the saved globals
+#
+# An image holds every global value (classes, functions with their closure environments,
+# instances, collections) and every imported module, together with the resolver data of the
+# code those functions run. It is two pickles written by one pickler, so nodes shared between
+# them stay shared: first the resolver tables, then the globals and modules. The interpreter's GlobalEnvironment is written as a
+# reference and loads as the new interpreter's own, so top-level functions close over it.
+# Images belong to one backend and one interpreter version, like script cache files.
+import os
+import pickle
+import sys
+
+from src.ast.expr import NODE_TYPES as EXPR_NODES
+from src.ast.stmt import NODE_TYPES as STMT_NODES
+from src.core.script_cache import LAYOUT
+
+FORMAT_VERSION = 3
+MAGIC = f"lox-image {FORMAT_VERSION} {LAYOUT} py{sys.version_info[0]}.{sys.version_info[1]}"
+GLOBALS = "globals"  # Persistent id of the interpreter's GlobalEnvironment
+GLOBAL_VALUES = "globals.values"  # ... and of its dict of values
+
+loading = None  # Interpreter an image is being loaded into, for objects that rebuild derived state
+bodies = {}     # FunctionStmt -> (stand-in body, functions using it) during this load (closure backend)
+
+class ImageError(Exception):
+    pass
+
+class _Pickler(pickle.Pickler):
+    def __init__(self, file, interpreter):
+        super().__init__(file, pickle.HIGHEST_PROTOCOL)
+        self.environment = interpreter.globals
+
+    def persistent_id(self, obj):
+        if obj is self.environment:
+            return GLOBALS
+        if obj is self.environment.values:  # Held by VM functions
+            return GLOBAL_VALUES
+        return None
+
+class _Unpickler(pickle.Unpickler):  # Images may only rebuild interpreter objects and a few plain types
+    ALLOWED = {  # (module, name) of everything the image writer emits; nothing else is looked up
+        ("array", "_array_reconstructor"), ("array", "array"),
+        ("builtins", "float"), ("builtins", "str"), ("builtins", "bool"),
+        ("src.core.token1", "Token"), ("src.core.token_type", "TokenType"),
+        ("src.core.interpreter", "Clock"), ("src.core.interpreter", "Environment"),
+        ("src.core.interpreter", "GlobalEnvironment"), ("src.core.interpreter", "InlineCache"),
+        ("src.core.interpreter", "LoxClass"), ("src.core.interpreter", "LoxFunction"),
+        ("src.core.interpreter", "LoxInstance"),
+        ("src.core.closure_compiler", "CompiledFunction"),
+        ("src.core.chunk", "Chunk"), ("src.core.chunk", "FunctionProto"),
+        ("src.core.vm", "BoundMethod"), ("src.core.vm", "Cell"), ("src.core.vm", "Closure"),
+        ("src.core.containers", "LoxList"), ("src.core.containers", "LoxMap"),
+        ("src.core.containers", "TRUE_KEY"), ("src.core.containers", "FALSE_KEY"),
+        ("src.core.modules", "Module"),
+        ("src.core.native", "Native"), ("src.core.native", "Members"), ("src.core.native", "bound_method"),
+        ("src.core.numarray", "NumArrayType"), ("src.core.numarray", "restore"),
+        ("src.core.numarray", "filled"), ("src.core.numarray", "numbers"),
+        ("src.core.rope", "Rope"),
+    } | {(node.__module__, node.__name__) for node in (*EXPR_NODES, *STMT_NODES)}
+
+    def __init__(self, file, interpreter):
+        super().__init__(file)
+        self.environment = interpreter.globals
+
+    def persistent_load(self, pid):
+        if pid == GLOBALS:
+            return self.environment
+        if pid == GLOBAL_VALUES:
+            return self.environment.values
+        raise pickle.UnpicklingError(f"unknown persistent id {pid!r}")
+
+    def find_class(self, module, name):
+        if "." in name or (module, name) not in self.ALLOWED:  # pickle would follow a dotted name through any attribute
+            raise pickle.UnpicklingError(f"{module}.{name} is not allowed in an image")
+        return super().find_class(module, name)
+
+def backend_name(interpreter):
+    return type(interpreter).__name__
+
+def save(interpreter, path):
+    temporary = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temporary, "wb") as f:
+            f.write(f"{MAGIC} {backend_name(interpreter)}\n".encode())
+            pickler = _Pickler(f, interpreter)
+            pickler.dump((interpreter.locals, interpreter.scope_sizes, interpreter.inline_caches))
+            pickler.dump((dict(interpreter.globals.values), interpreter.modules))  # A copy: the dict itself is a reference
+        os.replace(temporary, path)
+    except (OSError, pickle.PicklingError, TypeError, AttributeError, RecursionError) as error:
+        try:
+            os.remove(temporary)
+        except OSError:
+            pass
+        if isinstance(error, RecursionError):
+            error = "the heap is nested too deeply"
+        elif not isinstance(error, OSError):
+            error = f"a global holds a value that cannot be saved ({error})"
+        raise ImageError(f"Cannot save image {path}: {error}") from None
+
+def load(interpreter, path):  # Replace the interpreter's globals with an image's
+    global loading
+    try:
+        with open(path, "rb") as f:
+            header = f.readline().decode("utf-8", "replace").split()
+            if " ".join(header[:-1]) != MAGIC:
+                raise ImageError(f"Cannot load image {path}: saved by a different interpreter version")
+            if header[-1] != backend_name(interpreter):
+                raise ImageError(f"Cannot load image {path}: saved by the {header[-1]} backend, not {backend_name(interpreter)}")
+            unpickler = _Unpickler(f, interpreter)
+            locals, scope_sizes, caches = unpickler.load()
+            interpreter.locals.update(locals)
+            interpreter.scope_sizes.update(scope_sizes)
+            interpreter.inline_caches.update(caches)
+            loading = interpreter
+            try:
+                values, modules = unpickler.load()
+            finally:
+                loading = None
+                bodies.clear()
+    except (OSError, EOFError, IndexError, KeyError, AttributeError, TypeError, ValueError, RecursionError,
+            pickle.UnpicklingError) as error:
+        if isinstance(error, RecursionError):
+            error = "the heap is nested too deeply"
+        elif isinstance(error, (KeyError, AttributeError)):  # A damaged file names a member the class does not have
+            error = f"the file is damaged ({error})"
+        raise ImageError(f"Cannot load image {path}: {error}") from None
+    interpreter.globals.values.update(values)
+    interpreter.modules.update(modules)
+
+def lazy_body(function):  # Stand-in for a loaded closure-backend function's body: compiles the real one when first called
+    declaration = function.declaration
+    entry = bodies.get(declaration)
+    if entry is None:
+        interpreter, globals, owners, compiled = loading, function.globals, [], []
+        def body(environment):
+            if not compiled:  # Bound copies made before the first call keep calling the stand-in
+                compiled.append(interpreter.in_module(globals, interpreter.compile_block, declaration.body))
+                for owner in owners:  # Every loaded function sharing the declaration switches to the compiled body
+                    owner.body = compiled[0]
+                owners.clear()
+            return compiled[0](environment)
+        entry = bodies[declaration] = (body, owners)
+    entry[1].append(function)
+    return entry[0]
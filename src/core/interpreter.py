@@ -11,6 +11,10 @@ from src.ast.expr import (
     Set,
     This,
     Super,
+    List,
+    Map,
+    Index,
+    SetIndex,
 )
 
 from src.ast.stmt import (
@@ -24,19 +28,119 @@ from src.ast.stmt import (
     FunctionStmt,
     ReturnStmt,
     ClassStmt, 
+    ImportStmt,
 )
 
+from src.core.rope import STRINGS, concat
+from src.core.token1 import Token
 from src.core.token_type import TokenType
+import sys
 import time
+import weakref
 
 class RuntimeError(Exception):  # Custom exception for runtime errors 
     def __init__(self, token, message):
         super().__init__(message)
         self.token = token
 
-class ReturnException(Exception): # Custom exception for return statements
-    def __init__(self, value):
-        self.value = value
+class StackOverflow(RuntimeError):  # Lox calls nested deeper than the backend allows
+    def __init__(self, line):
+        super().__init__(Token(None, "", None, line), "Stack overflow.")
+
+class NativeError(RuntimeError):  # Raised by native code, which has no token; the backend re-raises it at the Lox expression
+    def __init__(self, message):
+        super().__init__(Token(None, "", None, 0), message)
+
+class BudgetExceeded(RuntimeError):  # A run went over one of the limits of its Budget
+    def __init__(self, line, message):
+        super().__init__(Token(None, "", None, line), message)
+
+BUDGET_INTERVAL = 1000  # Steps between budget checks
+
+class Budget:  # Limits on each run; None means unlimited. Only limits live here, so runtimes can share one
+    # A step is a loop iteration or a call. The backends count steps down from the number granted
+    # by Interpreter.start_budget, at the cost of one decrement, and call Interpreter.refuel at
+    # zero. Only then is the clock read and the allocation count compared, so a run can pass its
+    # time or allocation limit by up to BUDGET_INTERVAL steps. The step limit is exact.
+    # Allocations are the instances a run creates plus the environments that outlive a call:
+    # those kept by closures and bound methods.
+    def __init__(self, steps=None, seconds=None, allocations=None):
+        self.steps = steps
+        self.seconds = seconds
+        self.allocations = allocations
+
+def call_line(traceback):  # Line of the innermost Lox call in a RecursionError's traceback
+    line = 0
+    while traceback is not None:
+        names = traceback.tb_frame.f_locals
+        if type(names.get("expr")) is Call:  # Tree-walker call visitors
+            line = names["expr"].paren.line
+        elif isinstance(names.get("paren"), Token):  # Call closures of the closure backend
+            line = names["paren"].line
+        traceback = traceback.tb_next
+    return line
+
+class InlineCache: # Per-site method lookup cache, keyed on the class the lookup starts from
+    LIMIT = 4  # Classes remembered before the site is treated as megamorphic
+
+    __slots__ = ("entries", "hits", "misses", "megamorphic")
+
+    def __init__(self):
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+        self.megamorphic = False
+
+    def __getstate__(self):  # Heap images save caches empty, so the AST never drags runtime values along
+        return None, {"entries": {}, "hits": 0, "misses": 0, "megamorphic": False}
+
+    def find_method(self, klass, name): # Classes never change their methods, so entries need no invalidation
+        entries = self.entries
+        if klass in entries:
+            self.hits += 1
+            return entries[klass]
+        self.misses += 1
+        method = klass.find_method(name)
+        if len(entries) < self.LIMIT:
+            entries[klass] = method
+        else:
+            self.megamorphic = True
+        return method
+
+class ResolverTables:  # The front end's output for one program or module, kept apart so it can be installed and removed as a unit
+    def __init__(self):
+        self.locals = {}
+        self.scope_sizes = {}
+        self.sites = []
+        self.installed = weakref.WeakSet()  # Interpreters that already hold these tables
+
+    def resolve(self, expr, depth, slot):
+        self.locals[expr] = (depth, slot)
+
+    def size_scope(self, node, size):
+        self.scope_sizes[node] = size
+
+    def cache_site(self, expr):
+        self.sites.append(expr)
+
+    def defines_functions(self):  # Whether running the code can leave values behind that still need the tables
+        return any(type(node) is FunctionStmt for node in self.scope_sizes)
+
+    def install(self, interpreter):
+        self.installed.add(interpreter)
+        interpreter.locals.update(self.locals)
+        interpreter.scope_sizes.update(self.scope_sizes)
+        for node in self.sites:
+            interpreter.cache_site(node)
+
+    def uninstall(self, interpreter):
+        self.installed.discard(interpreter)
+        for node in self.locals:
+            interpreter.locals.pop(node, None)
+        for node in self.scope_sizes:
+            interpreter.scope_sizes.pop(node, None)
+        for node in self.sites:
+            interpreter.inline_caches.pop(node, None)
 
 class LoxCallable: # Base class for callable objects
     def arity(self):
@@ -67,9 +171,10 @@ class LoxClass(LoxCallable): # Class representation
 
     def call(self, interpreter, arguments): # Create an instance of the class
         instance = LoxInstance(self)
+        interpreter.allocated += 1
         initializer = self.find_method("init")
         if initializer:
-            initializer.bind(instance).call(interpreter, arguments)
+            initializer.call_method(interpreter, instance, arguments)
         return instance
 
     def arity(self): # Get the number of parameters for the initializer
@@ -99,65 +204,68 @@ class LoxInstance: # Instance of a class
         return f"{self.klass.name} instance"
 
 class LoxFunction(LoxCallable): # Function representation
-    def __init__(self, declaration, closure, is_initializer=False):
+    def __init__(self, declaration, closure, is_initializer, scope_size, globals):
         self.declaration = declaration
         self.closure = closure
         self.is_initializer = is_initializer
+        self.scope_size = scope_size  # Slots needed by a call: parameters plus body locals
+        self.globals = globals  # GlobalEnvironment of the module that defined the function
 
     def bind(self, instance):  # Bind instance to function
-        env = Environment(self.closure)
-        env.define("this", instance)
-        return LoxFunction(self.declaration, env, self.is_initializer)
+        env = Environment(self.closure, 1)
+        env.values[0] = instance  # "this" is the only slot of the bound scope
+        return LoxFunction(self.declaration, env, self.is_initializer, self.scope_size, self.globals)
 
     def arity(self):
         return len(self.declaration.params)
 
     def call(self, interpreter, arguments):  # Call the function
+        if self.globals is not interpreter.globals:  # Defined in another module: run with that module's globals
+            return interpreter.in_module(self.globals, self.call, interpreter, arguments)
+        interpreter.fuel -= 1
+        if not interpreter.fuel:
+            interpreter.refuel(self.declaration.name.line)
         environment = Environment(self.closure)
-        for i in range(len(self.declaration.params)):
-            environment.define(self.declaration.params[i].lexeme, arguments[i])
-        try:
-            interpreter.execute_block(self.declaration.body, environment)
-        except ReturnException as return_value:
-            if self.is_initializer:
-                return self.closure.get("this")
-            return return_value.value
+        environment.values = arguments + [None] * (self.scope_size - len(arguments))  # Parameters occupy the first slots
+        completion = interpreter.execute_block(self.declaration.body, environment)
         if self.is_initializer:
-            return self.closure.get("this")
-        return None
+            return self.closure.values[0]
+        if completion is None:
+            return None
+        return completion[0]
+
+    def call_method(self, interpreter, instance, arguments):  # Call with "this" bound, without allocating a bound method
+        if self.globals is not interpreter.globals:
+            return interpreter.in_module(self.globals, self.call_method, interpreter, instance, arguments)
+        interpreter.fuel -= 1
+        if not interpreter.fuel:
+            interpreter.refuel(self.declaration.name.line)
+        this = Environment(self.closure)
+        this.values = [instance]
+        environment = Environment(this)
+        environment.values = arguments + [None] * (self.scope_size - len(arguments))
+        completion = interpreter.execute_block(self.declaration.body, environment)
+        if self.is_initializer:
+            return instance
+        if completion is None:
+            return None
+        return completion[0]
 
     def __str__(self):
         return f"<fn {self.declaration.name.lexeme}>"
 
-class Environment:  # Environment for variable storage
-    def __init__(self, enclosing=None):
-        self.values = {}
-        self.enclosing = enclosing
+class Environment:  # Local scope: a fixed number of slots assigned by the resolver
+    __slots__ = ("values", "enclosing")
 
-    def define(self, name, value):  # Define a variable in the environment
-        self.values[name] = value
- 
-    def get(self, name):  # Get a variable from the environment
-        if name in self.values:
-            return self.values[name]
-        if self.enclosing:
-            return self.enclosing.get(name)
-        raise RuntimeError(name, f"Undefined variable '{name}'.")
-
-    def assign(self, name, value): # Assign a value to a variable
-        if name in self.values:
-            self.values[name] = value
-            return
-        if self.enclosing:
-            self.enclosing.assign(name, value)
-            return
-        raise RuntimeError(name, f"Undefined variable '{name}'.")
+    def __init__(self, enclosing=None, size=0):
+        self.values = [None] * size
+        self.enclosing = enclosing
 
-    def get_at(self, distance, name):   # Get a variable from a specific distance in the environment chain
-        return self.ancestor(distance).values[name]
+    def get_at(self, distance, slot):   # Get a variable from a specific distance in the environment chain
+        return self.ancestor(distance).values[slot]
 
-    def assign_at(self, distance, name, value):   # Assign a value to a variable at a specific distance in the environment chain
-        self.ancestor(distance).values[name] = value
+    def assign_at(self, distance, slot, value):   # Assign a value to a variable at a specific distance in the environment chain
+        self.ancestor(distance).values[slot] = value
 
     def ancestor(self, distance):   # Get the ancestor environment at a specific distance
         env = self
@@ -165,29 +273,156 @@ class Environment:  # Environment for variable storage
             env = env.enclosing
         return env
 
+class GlobalEnvironment:  # Top-level scope: globals are late bound, so they stay keyed by name
+    def __init__(self):
+        self.values = {}
+
+    def define(self, name, value):  # Define a variable in the environment
+        self.values[name] = value
+ 
+    def get(self, name):  # Get a variable by its name token, which locates the error if it is undefined
+        if name.lexeme in self.values:
+            return self.values[name.lexeme]
+        raise RuntimeError(name, f"Undefined variable '{name.lexeme}'.")
+
+    def assign(self, name, value): # Assign a value to a variable by its name token
+        if name.lexeme in self.values:
+            self.values[name.lexeme] = value
+            return
+        raise RuntimeError(name, f"Undefined variable '{name.lexeme}'.")
+
 class Interpreter: # Main interpreter class
     def __init__(self):
-        self.globals = Environment()
+        self.globals = GlobalEnvironment()
+        self.environment = self.globals
+        self.locals = {}  # Resolved node -> (depth, slot)
+        self.scope_sizes = {}  # BlockStmt/FunctionStmt -> number of slots its environment needs
+        self.inline_caches = {}  # Get/Super node -> InlineCache; a side table, since imported modules share nodes
+        self.modules = {}  # Resolved path -> Module imported by this interpreter
+        self.directory = None  # Where the running file lives, for relative imports; None is the working directory
+        self.output = None  # Stream that print writes to; None is sys.stdout at the time of printing
+        self.host = None  # Front-end settings and error sink for imports; None is the Lox class (see Lox.front_end)
+        self.budget = None  # Budget for each run; None is unlimited
+        self.fuel = BUDGET_INTERVAL  # Steps until the next call to refuel
+        self.granted = 0  # Steps granted since start_budget; all but fuel of them have run
+        self.deadline = None  # perf_counter() value at which the time limit runs out
+        self.allocated = 0  # Instances and kept environments created since start_budget
+        self.reset_globals()
+
+    def reset_globals(self):  # Back to fresh built-ins only. The GlobalEnvironment stays, so compiled code bound to it stays valid
+        from src.core.numarray import NumArrayType  # numarray builds on the classes in this module
+        self.builtins = {"clock": Clock(), "NumArray": NumArrayType()}  # Every module's global scope starts with these
+        values = self.globals.values
+        values.clear()
+        values.update(self.builtins)
         self.environment = self.globals
-        self.locals = {}  
-        self.globals.define("clock", Clock())
+        self.modules.clear()
+        for cache in self.inline_caches.values():  # Forget classes from earlier runs, and what their methods hold on to
+            cache.entries.clear()
+            cache.megamorphic = False
 
     def interpret(self, statements):  # Interpret a list of statements
         try:
-            for stmt in statements:
-                self.execute(stmt)
+            self.execute_module(statements)
         except RuntimeError as error:
-            print(f"Runtime error: {error}")
+            self.report_runtime_error(error)
+        except RecursionError as error:
+            self.report_runtime_error(StackOverflow(call_line(error.__traceback__)))
 
-    def resolve(self, expr, depth):   # Resolve a variable expression to its depth in the environment chain
-        self.locals[expr] = depth
+    def execute_module(self, statements):  # Run a script or module's top level; runtime errors propagate
+        self.prepare_module(statements)()
+
+    def prepare_module(self, statements):  # A function that runs statements' top level, compiled once for repeated runs
+        def run():
+            for stmt in statements:
+                self.execute(stmt)
+        return run
+
+    def start_budget(self):  # Count the code about to run against self.budget from zero
+        budget = self.budget
+        self.allocated = 0
+        self.granted = 0
+        self.deadline = None if budget is None or budget.seconds is None else time.perf_counter() + budget.seconds
+        self.fuel = self.grant_steps()
+
+    def refuel(self, line):  # The granted steps have run, the last at line: raise BudgetExceeded or grant more
+        budget = self.budget
+        if budget is not None:
+            if budget.steps is not None and self.granted > budget.steps:
+                raise BudgetExceeded(line, f"Step limit of {budget.steps} exceeded.")
+            if self.deadline is not None and time.perf_counter() > self.deadline:
+                raise BudgetExceeded(line, f"Time limit of {budget.seconds:g} seconds exceeded.")
+            if budget.allocations is not None and self.allocated > budget.allocations:
+                raise BudgetExceeded(line, f"Allocation limit of {budget.allocations} exceeded.")
+        self.fuel = self.grant_steps()
+        return self.fuel
+
+    def grant_steps(self):  # Steps until the next check: at most BUDGET_INTERVAL, and one past the step limit at most
+        budget = self.budget
+        steps = BUDGET_INTERVAL
+        if budget is not None and budget.steps is not None:
+            steps = min(steps, budget.steps + 1 - self.granted)
+        self.granted += steps
+        return steps
+
+    def in_module(self, globals, call, *arguments):  # Make call with another module's global scope in effect
+        previous = self.globals
+        self.globals = globals
+        try:
+            return call(*arguments)
+        finally:
+            self.globals = previous
+
+    def report_runtime_error(self, error):  # The host reports it and remembers to exit with status 70
+        from src.core.lox import Lox
+        (self.host or Lox).runtime_error(error)
+
+    def resolve(self, expr, depth, slot):   # Resolve a variable expression to its depth and slot in the environment chain
+        self.locals[expr] = (depth, slot)
+
+    def size_scope(self, node, size):   # Record how many slots a block or function scope needs
+        self.scope_sizes[node] = size
+
+    def cache_site(self, expr):   # Give a Get or Super node an inline cache of this interpreter's own
+        self.inline_caches[expr] = InlineCache()
+
+    def retain_tables(self, kept):   # Drop the resolver data of every node outside the ResolverTables in kept
+        locals = {node: self.locals[node] for tables in kept for node in tables.locals}
+        scope_sizes = {node: self.scope_sizes[node] for tables in kept for node in tables.scope_sizes}
+        caches = {node: self.inline_caches[node] for tables in kept for node in tables.sites}
+        for table, entries in ((self.locals, locals), (self.scope_sizes, scope_sizes), (self.inline_caches, caches)):
+            table.clear()  # In place: compiled code may hold on to the dictionaries
+            table.update(entries)
+
+    def inline_cache_stats(self):  # Totals over all cache sites
+        caches = self.inline_caches.values()
+        return {
+            "sites": len(caches),
+            "hits": sum(cache.hits for cache in caches),
+            "misses": sum(cache.misses for cache in caches),
+            "polymorphic": sum(1 for cache in caches if len(cache.entries) > 1),
+            "megamorphic": sum(1 for cache in caches if cache.megamorphic),
+        }
 
     def look_up_variable(self, name, expr):  # Look up a variable in the environment
-        if expr in self.locals:
-            return self.environment.get_at(self.locals[expr], name.lexeme)
-        return self.globals.get(name.lexeme)
+        resolved = self.locals.get(expr)
+        if resolved is None:
+            return self.globals.get(name)
+        depth, slot = resolved
+        env = self.environment
+        while depth:
+            env = env.enclosing
+            depth -= 1
+        return env.values[slot]
+
+    def define(self, stmt, name, value):  # Bind a declaration in its slot, or as a global at top level
+        resolved = self.locals.get(stmt)
+        if resolved is None:
+            self.globals.define(name, value)
+        else:
+            self.environment.values[resolved[1]] = value
 
-    def execute(self, stmt):  # Execute a statement
+    def execute(self, stmt):  # Execute a statement; returns None, or a 1-tuple holding a return value
         return stmt.accept(self)
 
     def evaluate(self, expr): # Evaluate an expression
@@ -198,7 +433,10 @@ class Interpreter: # Main interpreter class
         try:
             self.environment = environment
             for stmt in statements:
-                self.execute(stmt)
+                completion = self.execute(stmt)
+                if completion is not None:  # A return statement ran: stop and pass it outwards
+                    return completion
+            return None
         finally:
             self.environment = previous
 
@@ -207,36 +445,46 @@ class Interpreter: # Main interpreter class
 
     def visit_print_stmt(self, stmt: PrintStmt):  # Print statement
         value = self.evaluate(stmt.expression)
-        print(self.to_string(value))
+        print(self.to_string(value), file=self.output)
 
     def visit_var_stmt(self, stmt: VarStmt):  # Variable declaration statement
         value = None
         if stmt.initializer is not None:
             value = self.evaluate(stmt.initializer)
-        self.environment.define(stmt.name.lexeme, value)
+        self.define(stmt, stmt.name.lexeme, value)
 
     def visit_block_stmt(self, stmt: BlockStmt):  # Block statement
-        self.execute_block(stmt.statements, Environment(self.environment))
+        return self.execute_block(stmt.statements, Environment(self.environment, self.scope_sizes[stmt]))
 
     def visit_if_stmt(self, stmt: IfStmt):  # If statement
         if self.is_truthy(self.evaluate(stmt.condition)):
-            self.execute(stmt.then_branch)
+            return self.execute(stmt.then_branch)
         elif stmt.else_branch:
-            self.execute(stmt.else_branch)
+            return self.execute(stmt.else_branch)
 
     def visit_while_stmt(self, stmt: WhileStmt): # While statement
         while self.is_truthy(self.evaluate(stmt.condition)):
-            self.execute(stmt.body)
+            self.fuel -= 1
+            if not self.fuel:
+                self.refuel(stmt.keyword.line)
+            completion = self.execute(stmt.body)
+            if completion is not None:
+                return completion
 
     def visit_function_stmt(self, stmt: FunctionStmt):  # Function declaration statement
-        function = LoxFunction(stmt, self.environment)
-        self.environment.define(stmt.name.lexeme, function)
+        function = LoxFunction(stmt, self.environment, False, self.scope_sizes[stmt], self.globals)
+        self.allocated += 1
+        self.define(stmt, stmt.name.lexeme, function)
 
     def visit_return_stmt(self, stmt: ReturnStmt):  # Return statement
         value = None
         if stmt.value is not None:
             value = self.evaluate(stmt.value)
-        raise ReturnException(value)
+        return (value,)  # Completion signal: unwinds through execute_block without raising
+
+    def visit_import_stmt(self, stmt: ImportStmt):  # Import statement
+        from src.core.modules import import_module
+        import_module(self, stmt)
 
     def visit_class_stmt(self, stmt: ClassStmt):   # Class declaration 
         superclass = None
@@ -245,15 +493,15 @@ class Interpreter: # Main interpreter class
             if not isinstance(superclass, LoxClass):
                 raise RuntimeError(stmt.superclass.name, "Superclass must be a class.")
 
-        self.environment.define(stmt.name.lexeme, None)
+        self.define(stmt, stmt.name.lexeme, None)
 
         if stmt.superclass:
-            self.environment = Environment(self.environment)
-            self.environment.define("super", superclass)
+            self.environment = Environment(self.environment, 1)
+            self.environment.values[0] = superclass  # "super" is the only slot of its scope
 
         methods = {}
         for method in stmt.methods:
-            function = LoxFunction(method, self.environment, method.name.lexeme == "init")
+            function = LoxFunction(method, self.environment, method.name.lexeme == "init", self.scope_sizes[method], self.globals)
             methods[method.name.lexeme] = function
 
         klass = LoxClass(stmt.name.lexeme, superclass, methods)
@@ -261,17 +509,18 @@ class Interpreter: # Main interpreter class
         if stmt.superclass:
             self.environment = self.environment.enclosing
 
-        self.environment.assign(stmt.name.lexeme, klass)
+        self.define(stmt, stmt.name.lexeme, klass)
 
     def visit_variable_expr(self, expr: Variable): # Variable expression
         return self.look_up_variable(expr.name, expr)
 
     def visit_assign_expr(self, expr: Assign):
         value = self.evaluate(expr.value)
-        if expr in self.locals:
-            self.environment.assign_at(self.locals[expr], expr.name.lexeme, value)
+        resolved = self.locals.get(expr)
+        if resolved is not None:
+            self.environment.assign_at(resolved[0], resolved[1], value)
         else:
-            self.globals.assign(expr.name.lexeme, value)
+            self.globals.assign(expr.name, value)
         return value
 
     def visit_literal_expr(self, expr: Literal):  # Literal expression
@@ -299,8 +548,8 @@ class Interpreter: # Main interpreter class
             case TokenType.PLUS:
                 if isinstance(left, float) and isinstance(right, float):
                     return left + right
-                if isinstance(left, str) or isinstance(right, str):
-                    return str(left) + str(right)
+                if isinstance(left, STRINGS) or isinstance(right, STRINGS):
+                    return concat(left, right)
                 raise RuntimeError(expr.operator, "Operands must be two numbers or two strings.")
             case TokenType.MINUS:
                 self.check_number_operands(expr.operator, left, right)
@@ -333,19 +582,73 @@ class Interpreter: # Main interpreter class
         return None
 
     def visit_call_expr(self, expr: Call):  # Call expression
+        if type(expr.callee) is Get:
+            return self.invoke(expr, expr.callee)
+        if type(expr.callee) is Super:
+            return self.invoke_super(expr, expr.callee)
         callee = self.evaluate(expr.callee)
         arguments = [self.evaluate(arg) for arg in expr.arguments]
         if not isinstance(callee, LoxCallable):
             raise RuntimeError(expr.paren, "Can only call functions and classes.")
         if len(arguments) != callee.arity():
             raise RuntimeError(expr.paren, f"Expected {callee.arity()} arguments but got {len(arguments)}.")
-        return callee.call(self, arguments)
+        try:
+            return callee.call(self, arguments)
+        except NativeError as error:  # A native function failed: locate it at this call
+            raise RuntimeError(expr.paren, str(error))
+
+    def invoke(self, expr: Call, get: Get):  # obj.name(...): call the method directly with obj as "this"
+        object = self.evaluate(get.object)
+        if not isinstance(object, LoxInstance):
+            raise RuntimeError(get.name, "Only instances have properties.")
+        name = get.name.lexeme
+        fields = object.fields
+        if name in fields:  # A field holding a callable is called like any other value
+            return self.call_value(expr, fields[name])
+        method = self.inline_caches[get].find_method(object.klass, name)
+        if not method:
+            raise RuntimeError(get.name, f"Undefined property '{name}'.")
+        arguments = [self.evaluate(arg) for arg in expr.arguments]
+        if len(arguments) != method.arity():
+            raise RuntimeError(expr.paren, f"Expected {method.arity()} arguments but got {len(arguments)}.")
+        return method.call_method(self, object, arguments)
+
+    def invoke_super(self, expr: Call, callee: Super):  # super.name(...) without binding first
+        distance = self.locals[callee][0]
+        superclass = self.environment.get_at(distance, 0)
+        object = self.environment.get_at(distance - 1, 0)
+        method = self.inline_caches[callee].find_method(superclass, callee.method.lexeme)
+        if not method:
+            raise RuntimeError(callee.method, f"Undefined property '{callee.method.lexeme}'.")
+        arguments = [self.evaluate(arg) for arg in expr.arguments]
+        if len(arguments) != method.arity():
+            raise RuntimeError(expr.paren, f"Expected {method.arity()} arguments but got {len(arguments)}.")
+        return method.call_method(self, object, arguments)
+
+    def call_value(self, expr: Call, callee):  # Evaluate the arguments and call an already evaluated callee
+        arguments = [self.evaluate(arg) for arg in expr.arguments]
+        if not isinstance(callee, LoxCallable):
+            raise RuntimeError(expr.paren, "Can only call functions and classes.")
+        if len(arguments) != callee.arity():
+            raise RuntimeError(expr.paren, f"Expected {callee.arity()} arguments but got {len(arguments)}.")
+        try:
+            return callee.call(self, arguments)
+        except NativeError as error:  # A native function failed: locate it at this call
+            raise RuntimeError(expr.paren, str(error))
 
     def visit_get_expr(self, expr: Get):   # Get expression
         object = self.evaluate(expr.object)
-        if isinstance(object, LoxInstance):
-            return object.get(expr.name)
-        raise RuntimeError(expr.name, "Only instances have properties.")
+        if not isinstance(object, LoxInstance):
+            raise RuntimeError(expr.name, "Only instances have properties.")
+        name = expr.name.lexeme
+        fields = object.fields
+        if name in fields:
+            return fields[name]
+        method = self.inline_caches[expr].find_method(object.klass, name)
+        if method:
+            self.allocated += 1
+            return method.bind(object)
+        raise RuntimeError(expr.name, f"Undefined property '{name}'.")
 
     def visit_set_expr(self, expr: Set):   # Set expression
         object = self.evaluate(expr.object)
@@ -355,16 +658,51 @@ class Interpreter: # Main interpreter class
         object.set(expr.name, value)
         return value
 
+    def visit_list_expr(self, expr: List):   # List literal
+        from src.core.containers import LoxList  # containers builds on the classes in this module
+        values = [self.evaluate(element) for element in expr.elements]
+        self.allocated += 1
+        return LoxList(values)
+
+    def visit_map_expr(self, expr: Map):   # Map literal; keys and values are evaluated in source order
+        from src.core.containers import build_map
+        items = []
+        for key, value in zip(expr.keys, expr.values):
+            items.append(self.evaluate(key))
+            items.append(self.evaluate(value))
+        self.allocated += 1
+        return build_map(items)
+
+    def visit_index_expr(self, expr: Index):   # Subscript expression
+        from src.core.containers import get_item
+        object = self.evaluate(expr.object)
+        index = self.evaluate(expr.index)
+        try:
+            return get_item(object, index)
+        except NativeError as error:
+            raise RuntimeError(expr.bracket, str(error))
+
+    def visit_setindex_expr(self, expr: SetIndex):   # Subscript assignment
+        from src.core.containers import set_item
+        object = self.evaluate(expr.object)
+        index = self.evaluate(expr.index)
+        value = self.evaluate(expr.value)
+        try:
+            return set_item(object, index, value)
+        except NativeError as error:
+            raise RuntimeError(expr.bracket, str(error))
+
     def visit_this_expr(self, expr: This):   # This expression
         return self.look_up_variable(expr.keyword, expr)
 
     def visit_super_expr(self, expr: Super):   # Super expression
-        distance = self.locals[expr]
-        superclass = self.environment.get_at(distance, "super")
-        object = self.environment.get_at(distance - 1, "this")
-        method = superclass.find_method(expr.method.lexeme)
+        distance = self.locals[expr][0]
+        superclass = self.environment.get_at(distance, 0)
+        object = self.environment.get_at(distance - 1, 0)
+        method = self.inline_caches[expr].find_method(superclass, expr.method.lexeme)
         if not method:
             raise RuntimeError(expr.method, f"Undefined property '{expr.method.lexeme}'.")
+        self.allocated += 1
         return method.bind(object)
 
     def is_truthy(self, obj): # Check if an object is truthy
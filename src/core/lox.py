@@ -1,24 +1,62 @@
+import os
 import sys
 
-from src.core.interpreter import Interpreter
-from src.utils.runtime_error import RuntimeError
+from src.core.interpreter import Interpreter, RuntimeError
+
+RECURSION_LIMIT = 10000  # The front end and the tree-walking backends recurse once per nesting level
 
 class Lox:
     had_error = False
     had_runtime_error = False
     interpreter = Interpreter()
+    optimize = True  # Run the AST optimizer between the resolver and the interpreter
+    report_optimizations = False
+    optimization_report = None  # --opt-stats text of the last program optimized, kept with its cache entry
+    use_cache = True  # Keep resolved scripts in __loxcache__ next to the source
     
     @staticmethod
-    def run_file(path):
-        with open(path, 'r', encoding='utf-8') as f:
-            source = f.read()
-        Lox.run(source)
+    def reset(interpreter=None):  # Fresh state for the next script in a long-running process
+        Lox.had_error = False
+        Lox.had_runtime_error = False
+        Lox.interpreter = interpreter or Interpreter()
+        Lox.optimize = True
+        Lox.report_optimizations = False
+        Lox.optimization_report = None
+        Lox.use_cache = True
+
+    @staticmethod
+    def run_file(path, source=None):  # path may be None when source is given, e.g. by a daemon request
+        if source is None:
+            with open(path, 'r', encoding='utf-8') as f:
+                source = f.read()
+        Lox.run(source, path=path)
 
         if Lox.had_error:
             sys.exit(65)
         if Lox.had_runtime_error:
             sys.exit(70)
 
+    @staticmethod
+    def compile_file(path, output):  # Translate a script to a standalone Python module
+        from src.core.scanner import Scanner
+        from src.core.parser import Parser
+        from src.core.resolver import Resolver
+        from src.core.transpiler import Transpiler
+        with open(path, 'r', encoding='utf-8') as f:
+            source = f.read()
+        statements = Parser(Scanner(source).iter_tokens()).parse()
+        if not Lox.had_error:
+            Resolver(Lox.interpreter).resolve(statements)
+        if Lox.had_error:
+            sys.exit(65)
+
+        statements = Lox.optimize_tree(statements)
+        module = Transpiler(Lox.interpreter.locals).transpile(statements, path)
+        if Lox.had_error:
+            sys.exit(65)
+        with open(output, 'w', encoding='utf-8') as f:
+            f.write(module)
+
     @staticmethod
     def run_prompt():
         print("Welcome to PyLox")
@@ -33,30 +71,81 @@ class Lox:
             print("\nGoodbye")
 
     @staticmethod
-    def run(source, Interpreter=None):
-        from src.core.scanner import Scanner  
-        from src.core.parser import Parser 
-        from src.core.resolver import Resolver  
-        scanner = Scanner(source)
-        tokens = scanner.scan_tokens()
+    def run(source, Interpreter=None, path=None):
+        from src.core import script_cache
+        sys.setrecursionlimit(max(sys.getrecursionlimit(), RECURSION_LIMIT))
+        cacheable = path is not None and Lox.use_cache
+        if path is not None:  # Imports are relative to the script
+            Lox.interpreter.directory = os.path.dirname(os.path.abspath(path))
+        cached = None
+        if Lox.use_cache:  # A cache hit skips scanning, parsing, resolving and optimizing
+            cached = script_cache.recall(source, Lox.interpreter, Lox.optimize)
+        if cached is None and cacheable:
+            cached = script_cache.load(path, source, Lox.interpreter, Lox.optimize)
+            if cached is not None:
+                script_cache.remember(source, Lox.interpreter, Lox.optimize, *cached)
+        if cached is not None:
+            statements, report = cached
+            if Lox.report_optimizations and report is not None:  # What the optimizer did when the entry was made
+                print(f"{report}\n(recorded when the script was cached)", file=sys.stderr)
+        else:
+            statements, clean = Lox.front_end(source)
+            if statements is None:
+                return
+            if cacheable and clean:
+                script_cache.store(path, source, Lox.interpreter, Lox.optimize, statements, Lox.optimization_report)
+            if Lox.use_cache and clean:
+                script_cache.remember(source, Lox.interpreter, Lox.optimize, statements, Lox.optimization_report)
 
-        parser = Parser(tokens)
-        statements = parser.parse()
-        
-        if Lox.had_error:
-            return
-        
-        resolver = Resolver(Lox.interpreter)
-        resolver.resolve(statements)
-        
-        if Lox.had_error:
-            return
-        
         try:
+            Lox.interpreter.start_budget()
             Lox.interpreter.interpret(statements)
         except RuntimeError as e:
             Lox.runtime_error(e)
 
+    @staticmethod
+    def front_end(source, interpreter=None, host=None):  # Scan, parse, resolve and optimize; returns (statements or None on error, no diagnostics)
+        # host supplies the settings (optimize, report_optimizations) and receives the errors
+        # (error, had_error, scan_error). It is the Lox class itself unless an embedding
+        # LoxRuntime runs the front end.
+        from src.core.scanner import Scanner  
+        from src.core.parser import Parser 
+        from src.core.resolver import Resolver  
+        interpreter = interpreter or Lox.interpreter  # Receives the resolver's tables
+        host = host or Lox
+        scanner = Scanner(source, None if host is Lox else host.scan_error)
+        parser = Parser(scanner.iter_tokens(), host)  # Tokens are scanned as the parser asks for them
+        try:
+            statements = parser.parse()
+            
+            if host.had_error:
+                return None, False
+            
+            resolver = Resolver(interpreter, host)
+            resolver.resolve(statements)
+            
+            if host.had_error:
+                return None, False
+
+            return Lox.optimize_tree(statements, interpreter, host), scanner.errors == 0
+        except RecursionError:
+            host.error(parser.current.line, "Program nested too deeply.")
+            return None, False
+
+    @staticmethod
+    def optimize_tree(statements, interpreter=None, host=None):  # Simplify the resolved AST unless optimization is turned off
+        host = host or Lox
+        host.optimization_report = None
+        if not host.optimize:
+            return statements
+        from src.core.optimizer import Optimizer
+        optimizer = Optimizer(interpreter or Lox.interpreter)
+        statements = optimizer.optimize(statements)
+        host.optimization_report = optimizer.report()
+        if host.report_optimizations:
+            print(host.optimization_report, file=sys.stderr)
+        return statements
+
     @staticmethod
     def error(token_or_line, message):
         if isinstance(token_or_line, int):  # called with a line number
@@ -74,17 +163,11 @@ class Lox:
         Lox.had_error = True
         
     @staticmethod
-    def runtime_error(error):
-        print(f"{error.message}\n[line {error.token.line}]", file=sys.stderr)
+    def runtime_error(error):  # The message goes to stdout with the script's output, its line to stderr
+        print(f"Runtime error: {error}")
+        print(f"[line {error.token.line}]", file=sys.stderr)
         Lox.had_runtime_error = True
 
 if __name__ == "__main__":
-    import sys
-    args = sys.argv[1:]
-    if len(args) > 1:
-        print("Usage: python lox.py [script]")
-        sys.exit(64)
-    elif len(args) == 1:
-        Lox.run_file(args[0])
-    else:
-        Lox.run_prompt()
+    from src.core.main import main
+    main()
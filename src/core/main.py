@@ -0,0 +1,135 @@
+import os
+import sys
+
+from src.core.flags import VALUE_FLAGS
+from src.core.lox import Lox
+
+USAGE = ("Usage: lox [--vm | --closures] [--ic-stats] [--opt-stats | --no-optimize] [--no-cache] [--stack-limit N] [--profile] [--coverage]\n"
+         "           [--max-steps N] [--time-limit SECONDS] [--max-allocations N] [--image PATH] [--save-image PATH] [script]\n"
+         "       lox compile script.lox [-o output.py]\n"
+         "       lox run-many [--workers N] [--report PATH] [--timeout SECONDS] [--list FILE] [lox flags...] (script | directory)...\n"
+         "       lox serve [--socket PATH] [--workers N]\n"
+         "       lox client [--socket PATH] [lox arguments...]")
+
+def main(args=None, source=None):  # source, if given, runs as the script in place of a path
+    args = sys.argv[1:] if args is None else args
+    if args and args[0] == "serve":  # Daemon with prewarmed workers
+        from src.core.server import main as serve
+        serve(args[1:])
+        return
+    if args and args[0] == "run-many":  # Many scripts on a process pool, with a JSON-lines report
+        from src.core.batch import main as run_many
+        run_many(args[1:])
+        return
+    if args and args[0] == "client":  # Run through the daemon, or locally if none is listening
+        from src.core.client import main as client
+        client(args[1:])
+        return
+    if args and args[0] == "compile":  # Ahead-of-time translation to Python
+        args = args[1:]
+        output = None
+        if len(args) == 3 and args[1] == "-o":
+            output = args[2]
+        elif len(args) != 1:
+            print(USAGE)
+            sys.exit(64)
+        Lox.compile_file(args[0], output or os.path.splitext(args[0])[0] + ".py")
+        return
+
+    ic_stats = False
+    stack_limit = None
+    profiler = None
+    coverage = False
+    image = save_image = None
+    limits = {}  # Budget arguments from --max-steps, --time-limit and --max-allocations
+    while args and args[0].startswith("--"):
+        flag, args = args[0], args[1:]
+        value = None
+        if flag in VALUE_FLAGS:
+            if not args:
+                print(USAGE)
+                sys.exit(64)
+            value, args = args[0], args[1:]
+        if flag == "--vm":  # Run on the bytecode VM instead of the tree-walker
+            from src.core.vm import VM
+            Lox.interpreter = VM()
+        elif flag == "--closures":  # Run the AST compiled to nested Python closures
+            from src.core.closure_compiler import ClosureInterpreter
+            Lox.interpreter = ClosureInterpreter()
+        elif flag == "--ic-stats":  # Report inline cache effectiveness on exit
+            ic_stats = True
+        elif flag == "--opt-stats":  # Report how much each optimizer pass removed
+            Lox.report_optimizations = True
+        elif flag == "--no-optimize":
+            Lox.optimize = False
+        elif flag == "--no-cache":  # Always compile from source and leave __loxcache__ alone
+            Lox.use_cache = False
+        elif flag == "--stack-limit" and value.isdigit():  # Deepest VM call stack before "Stack overflow."
+            stack_limit = int(value)
+        elif flag == "--max-steps" and value.isdigit():  # Stop after N loop iterations and calls
+            limits["steps"] = int(value)
+        elif flag == "--time-limit" and value.replace(".", "", 1).isdigit():  # Stop after SECONDS of running
+            limits["seconds"] = float(value)
+        elif flag == "--max-allocations" and value.isdigit():  # Stop after N instances, closures and bound methods
+            limits["allocations"] = int(value)
+        elif flag == "--profile":  # Sample the Lox call stack; write <script>.folded and print the hottest functions and lines
+            from src.core.profiler import Profiler
+            profiler = Profiler()
+        elif flag == "--coverage":  # Count executions on an instrumented tree-walker; write <script>.json and <script>.cov
+            coverage = True
+        elif flag == "--image":  # Start from the globals saved by --save-image
+            image = value
+        elif flag == "--save-image":  # After the script (or REPL session) ends, save its globals
+            save_image = value
+        else:
+            print(USAGE)
+            sys.exit(64)
+    if len(args) > 1 or (source is not None and args) or (coverage and (len(args) != 1 or image or save_image)):
+        print(USAGE)
+        sys.exit(64)
+    if coverage:
+        from src.core.coverage import run_file
+        run_file(args[0])
+        return
+    if stack_limit is not None:
+        Lox.interpreter.stack_limit = stack_limit
+    if limits:
+        from src.core.interpreter import Budget
+        Lox.interpreter.budget = Budget(**limits)
+    if image is not None:
+        use_image("load", image, 66)
+    if profiler is not None:
+        profiler.start()
+    try:
+        if len(args) == 1 or source is not None:
+            Lox.run_file(args[0] if args else None, source)
+        else:
+            Lox.run_prompt()
+        if save_image is not None:
+            use_image("save", save_image, 73)
+    finally:
+        if ic_stats:
+            print_inline_cache_stats(Lox.interpreter.inline_cache_stats())
+        if profiler is not None:
+            profiler.stop()
+            path = os.path.basename(args[0] if args else "lox") + ".folded"
+            profiler.write_collapsed(path)
+            print(f"{profiler.report()}\ncollapsed stacks written to {path}", file=sys.stderr)
+
+def use_image(action, path, status):  # Load or save a heap image, exiting with status if that fails
+    from src.core import image
+    try:
+        getattr(image, action)(Lox.interpreter, path)
+    except image.ImageError as error:
+        print(error, file=sys.stderr)
+        sys.exit(status)
+
+def print_inline_cache_stats(stats):
+    lookups = stats["hits"] + stats["misses"]
+    rate = stats["hits"] / lookups * 100 if lookups else 0.0
+    print(f"inline caches: {stats['sites']} sites, {stats['hits']} hits, {stats['misses']} misses "
+          f"({rate:.1f}% hit rate), {stats['polymorphic']} polymorphic, {stats['megamorphic']} megamorphic",
+          file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+# Modules: `import "path";` runs another file once and binds the names it defines.
+#
+#   // shapes.lox                           // main.lox
+#   var made = 0;                           import "shapes.lox";
+#   fun square(n) { made = made + 1;       print square(3);      // 9
+#                   return n * n; }         print made;           // 1
+#
+# A path is relative to the file that imports it. A module runs in its own global scope, and
+# its functions keep using that scope wherever they are called from. The importer then gets
+# a copy of every top-level name the module defined, much like Python's `from m import *`.
+# Assigning to one of those names rebinds it in the importer only.
+#
+# Each interpreter runs a module once, keyed by its resolved path and modification time, so a
+# file imported from several places shares one set of globals. The resolved AST is shared
+# further: every interpreter in the process that imports the same unchanged file reuses it,
+# and the __loxcache__ files carry it across processes.
+import os
+
+from src.core.interpreter import GlobalEnvironment, ResolverTables, RuntimeError
+from src.core import script_cache
+
+compiled = {}  # (path, optimized) -> (mtime, statements, tables), shared by every interpreter in the process
+
+class Module:  # A module as imported by one interpreter
+    def __init__(self, path, mtime, globals):
+        self.path = path
+        self.mtime = mtime
+        self.globals = globals  # The module's own GlobalEnvironment
+        self.running = True     # Still running its top level; importing it now would be a cycle
+
+class _ModuleHost:  # Front-end host for an imported file: names the file in its diagnostics, then passes them to the importer's host
+    def __init__(self, host, path):
+        self.host = host
+        self.path = path
+        self.optimize = host.optimize
+        self.report_optimizations = host.report_optimizations
+        self.optimization_report = None
+        self.had_error = False
+
+    def error(self, token_or_line, message):
+        self.had_error = True
+        self.host.error(token_or_line, f"{message} (in '{self.path}')")
+
+    def scan_error(self, line, message):
+        from src.core.lox import Lox
+        from src.core.scanner import Scanner
+        report = Scanner.print_error if self.host is Lox else self.host.scan_error
+        report(line, f"{message} (in '{self.path}')")
+
+def import_module(interpreter, stmt):  # Run stmt's module if needed, then bind its names in the importing scope
+    name = stmt.path.literal
+    path = os.path.normpath(os.path.join(interpreter.directory or os.getcwd(), name))
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError as error:
+        raise RuntimeError(stmt.keyword, f"Cannot import '{name}': {error.strerror}.")
+    module = interpreter.modules.get(path)
+    if module is not None and module.running:
+        raise RuntimeError(stmt.keyword, f"Cannot import '{name}': it is already being imported.")
+    if module is None or module.mtime != mtime:
+        module = load(interpreter, stmt, path, mtime)
+    builtins = interpreter.builtins
+    interpreter.globals.values.update((key, value) for key, value in module.globals.values.items()
+                                      if key not in builtins or builtins[key] is not value)
+
+def load(interpreter, stmt, path, mtime):  # Compile and run a module in a fresh global scope
+    statements = compile_module(interpreter, stmt, path, mtime)
+    if statements is None:
+        raise RuntimeError(stmt.keyword, f"Cannot import '{stmt.path.literal}': it has compile errors.")
+    globals = GlobalEnvironment()
+    globals.values.update(interpreter.builtins)
+    module = interpreter.modules[path] = Module(path, mtime, globals)
+    previous = interpreter.globals, interpreter.environment, interpreter.directory
+    interpreter.globals = interpreter.environment = globals
+    interpreter.directory = os.path.dirname(path)
+    try:
+        interpreter.execute_module(statements)
+    except BaseException:
+        del interpreter.modules[path]  # A failed import leaves nothing behind, so a later one retries
+        raise
+    finally:
+        interpreter.globals, interpreter.environment, interpreter.directory = previous
+        module.running = False
+    return module
+
+def compile_module(interpreter, stmt, path, mtime):  # A module's statements with resolver data installed, or None
+    from src.core.lox import Lox
+    host = interpreter.host or Lox
+    key = (path, host.optimize)
+    entry = compiled.get(key)
+    if entry is None or entry[0] != mtime:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                source = f.read()
+        except (OSError, UnicodeDecodeError) as error:
+            raise RuntimeError(stmt.keyword, f"Cannot import '{stmt.path.literal}': {error}.")
+        tables = ResolverTables()
+        cached = script_cache.load(path, source, tables, host.optimize) if host.use_cache else None
+        if cached is not None:
+            statements = cached[0]
+        else:
+            module_host = _ModuleHost(host, path)
+            statements, clean = Lox.front_end(source, tables, module_host)
+            if statements is None:
+                return None
+            if host.use_cache and clean:
+                script_cache.store(path, source, tables, host.optimize, statements, module_host.optimization_report)
+        entry = compiled[key] = (mtime, statements, tables)
+    _, statements, tables = entry
+    if interpreter not in tables.installed:  # A reset interpreter imports again; its caches list must not grow
+        tables.install(interpreter)
+    return statements
+
+def forget(interpreter):  # The interpreter dropped the modules' resolver data, so its next imports install them again
+    for _, _, tables in compiled.values():
+        tables.installed.discard(interpreter)
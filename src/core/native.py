@@ -0,0 +1,93 @@
+# Building blocks for built-in types written in Python (NumArray, List, Map). Such a type is a
+# LoxInstance whose fields produce bound native methods on demand, so every backend reaches
+# them through its ordinary property access and call paths.
+from src.core.interpreter import LoxCallable, NativeError
+from src.core.rope import Rope
+
+ALLOCATING = set()  # Native functions that return a new List, Map or NumArray
+
+def allocates(function):  # Mark function as ALLOCATING, so calling it counts against an allocation budget
+    ALLOCATING.add(function)
+    return function
+
+def error(message):  # Native code has no token; the backend locates the error at the calling expression
+    return NativeError(message)
+
+def number(value):
+    if type(value) is not float:
+        raise error("Operand must be a number.")
+    return value
+
+def integer(value, what="Index"):
+    if type(value) is not float or not value.is_integer():
+        raise error(f"{what} must be an integer.")
+    return int(value)
+
+def index(value, length, end=False):  # A Lox number used as an index; end allows one past the last element
+    value = integer(value)
+    if not 0 <= value < length + end:
+        raise error("Index out of range.")
+    return value
+
+class Native(LoxCallable):  # Native function of fixed arity, optionally bound to a receiver
+    __slots__ = ("function", "count", "receiver")
+
+    def __init__(self, function, count, receiver=None):
+        self.function = function
+        self.count = count
+        self.receiver = receiver
+
+    def arity(self):
+        return self.count
+
+    def call(self, interpreter, arguments):
+        if Rope in map(type, arguments):  # Natives see plain strings
+            arguments = [str(argument) if type(argument) is Rope else argument for argument in arguments]
+        if self.function in ALLOCATING:
+            interpreter.allocated += 1
+        if self.receiver is None:
+            return self.function(*arguments)
+        return self.function(self.receiver, *arguments)
+
+    def __str__(self):
+        return "<native fn>"
+
+    def __reduce__(self):  # Images save a bound method by its Lox name, so loading never looks up a method function
+        if self.receiver is not None:
+            for name, (function, count) in type(self.receiver).METHODS.items():
+                if function is self.function:
+                    return bound_method, (self.receiver, name)
+        return Native, (self.function, self.count, self.receiver)
+
+def bound_method(receiver, name):  # Rebuilds a Native saved by Native.__reduce__
+    function, count = type(receiver).METHODS[name]
+    return Native(function, count, receiver)
+
+class Members:  # The fields of a native instance: its methods, bound on access, plus any fields a script adds
+    __slots__ = ("owner", "methods", "extra")
+
+    def __init__(self, owner):
+        self.owner = owner
+        self.methods = type(owner).METHODS  # Lox name -> (function taking the owner first, arity)
+        self.extra = None
+
+    def __getstate__(self):  # For images: the method table is found again from the owner's class
+        return self.owner, self.extra
+
+    def __setstate__(self, state):
+        self.owner, self.extra = state
+        self.methods = type(self.owner).METHODS
+
+    def __contains__(self, name):
+        return name in self.methods or (self.extra is not None and name in self.extra)
+
+    def __getitem__(self, name):
+        if self.extra is not None and name in self.extra:
+            return self.extra[name]
+        function, count = self.methods[name]
+        return Native(function, count, self.owner)
+
+    def __setitem__(self, name, value):
+        if self.extra is None:
+            self.extra = {}
+        self.extra[name] = value
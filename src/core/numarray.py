@@ -0,0 +1,226 @@
+# NumArray: a native, packed array of numbers for number-crunching scripts. Values live in
+# an array('d'), or a NumPy float64 array when NumPy is installed, and whole-array operations
+# run in C instead of one interpreter step per element.
+#
+#   var a = NumArray.range(0, 5);     // also NumArray(n) for n zeros and NumArray.filled(n, x)
+#   print a.mul(2).add(a).sum();      // elementwise add/sub/mul/div take a NumArray or a number
+#   a.set(0, 10); print a.get(0); print a.len();
+#   print a.slice(1, 3); print a.sort().max(); print a.dot(a);
+#
+# A NumArray is a native instance (see native.py), so every backend reaches its methods
+# through its ordinary property access and call paths.
+import operator
+from array import array
+from itertools import repeat
+
+from src.core.interpreter import LoxCallable, LoxClass, LoxInstance
+from src.core.native import Members, Native, allocates, error, index, integer, number
+
+_backend = None
+
+def size(value):
+    value = integer(value, "Size")
+    if value < 0:
+        raise error("Size must not be negative.")
+    return value
+
+@allocates
+def filled(length, value):
+    return NumArray(backend().filled(size(length), number(value)))
+
+@allocates
+def numbers(start, end):  # start, start + 1, ... up to but not including end
+    start, end = integer(start, "Bound"), integer(end, "Bound")
+    return NumArray(backend().range(start, max(start, end)))
+
+class PackedBackend:  # Storage and bulk operations on array('d')
+    OPERATORS = {"add": operator.add, "sub": operator.sub, "mul": operator.mul, "div": operator.truediv}
+
+    @staticmethod
+    def filled(length, value):
+        return array("d", [value]) * length
+
+    @staticmethod
+    def range(start, end):
+        return array("d", map(float, range(start, end)))
+
+    @classmethod
+    def elementwise(cls, name, values, other):
+        function = cls.OPERATORS[name]
+        if type(other) is float:
+            if name == "div" and other == 0:
+                raise error("Division by zero.")
+            return array("d", map(function, values, repeat(other, len(values))))
+        if name == "div" and 0.0 in other:
+            raise error("Division by zero.")
+        return array("d", map(function, values, other))
+
+    @staticmethod
+    def dot(values, other):
+        return float(sum(map(operator.mul, values, other)))
+
+    @staticmethod
+    def sort(values):
+        values[:] = array("d", sorted(values))
+
+    @staticmethod
+    def copy(values, start=0, end=None):
+        return values[start:end]
+
+    @staticmethod
+    def from_array(values):  # Storage for values given as an array('d')
+        return values
+
+    sum = staticmethod(lambda values: float(sum(values)))
+    min = staticmethod(lambda values: float(min(values)))
+    max = staticmethod(lambda values: float(max(values)))
+
+class NumpyBackend:  # The same operations on numpy.float64 arrays
+    def __init__(self, numpy):
+        self.numpy = numpy
+
+    def filled(self, length, value):
+        return self.numpy.full(length, value, dtype=self.numpy.float64)
+
+    def range(self, start, end):
+        return self.numpy.arange(start, end, dtype=self.numpy.float64)
+
+    def elementwise(self, name, values, other):
+        if name == "div" and (other == 0 if type(other) is float else (other == 0).any()):
+            raise error("Division by zero.")
+        return getattr(self.numpy, {"add": "add", "sub": "subtract", "mul": "multiply", "div": "true_divide"}[name])(values, other)
+
+    def dot(self, values, other):
+        return float(self.numpy.dot(values, other))
+
+    def sort(self, values):
+        values.sort()
+
+    def copy(self, values, start=0, end=None):
+        return values[start:end].copy()
+
+    def from_array(self, values):
+        return self.numpy.array(values, dtype=self.numpy.float64)
+
+    sum = staticmethod(lambda values: float(values.sum()))
+    min = staticmethod(lambda values: float(values.min()))
+    max = staticmethod(lambda values: float(values.max()))
+
+def backend():  # NumPy is imported on first use, so scripts without arrays never pay for it
+    global _backend
+    if _backend is None:
+        try:
+            import numpy
+        except ImportError:
+            _backend = PackedBackend
+        else:
+            _backend = NumpyBackend(numpy)
+    return _backend
+
+class NumArray(LoxInstance):
+    def __init__(self, values):
+        self.klass = NUMARRAY_CLASS
+        self.fields = Members(self)
+        self.values = values
+
+    def __len__(self):
+        return len(self.values)
+
+    def __reduce__(self):  # Images hold an array('d') whatever the backend, so they load where NumPy is missing or present
+        return restore, (array("d", self.values),), self.fields.extra
+
+    def __setstate__(self, extra):  # Fields a script added; after the array exists, since they may refer back to it
+        self.fields.extra = extra
+
+    def __str__(self):
+        texts = []
+        for value in self.values:
+            text = str(float(value))
+            texts.append(text[:-2] if text.endswith(".0") else text)
+        return f"[{', '.join(texts)}]"
+
+    # Methods reachable from Lox; each takes Lox values and returns one
+
+    def get_item(self, i):  # Not get/set: those are LoxInstance's property accessors
+        return float(self.values[index(i, len(self.values))])
+
+    def set_item(self, i, value):
+        self.values[index(i, len(self.values))] = number(value)
+        return value
+
+    def length(self):
+        return float(len(self.values))
+
+    def combine(self, name, other):
+        if isinstance(other, NumArray):
+            if len(other) != len(self):
+                raise error("NumArrays must have the same length.")
+            other = other.values
+        else:
+            number(other)
+        return NumArray(backend().elementwise(name, self.values, other))
+
+    def reduce(self, name):
+        if not len(self.values):
+            raise error("NumArray is empty.")
+        return getattr(backend(), name)(self.values)
+
+    def dot(self, other):
+        if not isinstance(other, NumArray):
+            raise error("Operand must be a NumArray.")
+        if len(other) != len(self):
+            raise error("NumArrays must have the same length.")
+        return backend().dot(self.values, other.values)
+
+    @allocates
+    def slice(self, start, end):
+        start = index(start, len(self.values), end=True)
+        end = index(end, len(self.values), end=True)
+        return NumArray(backend().copy(self.values, start, max(start, end)))
+
+    def sort(self):  # Sorts in place and returns the array, so calls chain
+        backend().sort(self.values)
+        return self
+
+    @allocates
+    def copy(self):
+        return NumArray(backend().copy(self.values))
+
+METHODS = {  # Lox name -> (function taking the NumArray first, arity)
+    "len": (NumArray.length, 0),
+    "get": (NumArray.get_item, 1),
+    "set": (NumArray.set_item, 2),
+    "add": (allocates(lambda self, other: self.combine("add", other)), 1),
+    "sub": (allocates(lambda self, other: self.combine("sub", other)), 1),
+    "mul": (allocates(lambda self, other: self.combine("mul", other)), 1),
+    "div": (allocates(lambda self, other: self.combine("div", other)), 1),
+    "sum": (lambda self: self.reduce("sum"), 0),
+    "min": (lambda self: self.reduce("min"), 0),
+    "max": (lambda self: self.reduce("max"), 0),
+    "dot": (NumArray.dot, 1),
+    "slice": (NumArray.slice, 2),
+    "sort": (NumArray.sort, 0),
+    "copy": (NumArray.copy, 0),
+}
+
+NumArray.METHODS = METHODS
+
+def restore(values):  # Rebuilds a NumArray from an image
+    return NumArray(backend().from_array(values))
+
+NUMARRAY_CLASS = LoxClass("NumArray", None, {})  # Gives instances a class for printing and inline caches
+
+class NumArrayType(LoxInstance, LoxCallable):  # The global NumArray: NumArray(n) makes n zeros; constructors are fields
+    def __init__(self):
+        self.klass = NUMARRAY_CLASS
+        self.fields = {"filled": Native(filled, 2), "range": Native(numbers, 2)}
+
+    def arity(self):
+        return 1
+
+    def call(self, interpreter, arguments):
+        interpreter.allocated += 1
+        return NumArray(backend().filled(size(arguments[0]), 0.0))
+
+    def __str__(self):
+        return "NumArray"
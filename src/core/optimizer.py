@@ -0,0 +1,320 @@
+from src.ast.expr import *
+from src.ast.stmt import *
+from src.core.token_type import TokenType
+
+def count_nodes(node):  # Number of Expr/Stmt nodes in a tree or list of trees
+    if isinstance(node, list):
+        return sum(count_nodes(child) for child in node)
+    if not isinstance(node, (Expr, Stmt)):
+        return 0
+    return 1 + sum(count_nodes(getattr(node, field)) for field in node.__match_args__)
+
+def is_truthy(value):
+    return value is not None and value is not False
+
+class Pass:  # Rewrites the resolved AST in place; visitors return the node to use instead
+    name = "pass"
+
+    def __init__(self, interpreter):
+        self.interpreter = interpreter
+
+    def run(self, statements):
+        return self.statements(statements)
+
+    def statements(self, statements):  # Optimized list; statements that became None are dropped
+        result = []
+        for stmt in statements:
+            stmt = stmt.accept(self)
+            if stmt is not None:
+                result.append(stmt)
+        return result
+
+    def statement(self, stmt):  # A statement in a position that needs one (if branch, loop body)
+        stmt = stmt.accept(self)
+        if stmt is None:
+            stmt = BlockStmt([])
+            self.interpreter.size_scope(stmt, 0)
+        return stmt
+
+    def expr(self, expr):
+        return expr.accept(self)
+
+    def visit_expression_stmt(self, stmt: ExpressionStmt):
+        stmt.expression = self.expr(stmt.expression)
+        return stmt
+
+    def visit_print_stmt(self, stmt: PrintStmt):
+        stmt.expression = self.expr(stmt.expression)
+        return stmt
+
+    def visit_var_stmt(self, stmt: VarStmt):
+        if stmt.initializer is not None:
+            stmt.initializer = self.expr(stmt.initializer)
+        return stmt
+
+    def visit_block_stmt(self, stmt: BlockStmt):
+        stmt.statements = self.statements(stmt.statements)
+        return stmt
+
+    def visit_if_stmt(self, stmt: IfStmt):
+        stmt.condition = self.expr(stmt.condition)
+        stmt.then_branch = self.statement(stmt.then_branch)
+        if stmt.else_branch is not None:
+            stmt.else_branch = self.statement(stmt.else_branch)
+        return stmt
+
+    def visit_while_stmt(self, stmt: WhileStmt):
+        stmt.condition = self.expr(stmt.condition)
+        stmt.body = self.statement(stmt.body)
+        return stmt
+
+    def visit_function_stmt(self, stmt: FunctionStmt):
+        stmt.body = self.statements(stmt.body)
+        return stmt
+
+    def visit_return_stmt(self, stmt: ReturnStmt):
+        if stmt.value is not None:
+            stmt.value = self.expr(stmt.value)
+        return stmt
+
+    def visit_class_stmt(self, stmt: ClassStmt):
+        for method in stmt.methods:
+            self.visit_function_stmt(method)
+        return stmt
+
+    def visit_import_stmt(self, stmt: ImportStmt):
+        return stmt
+
+    def visit_binary_expr(self, expr: Binary):
+        expr.left = self.expr(expr.left)
+        expr.right = self.expr(expr.right)
+        return expr
+
+    def visit_grouping_expr(self, expr: Grouping):
+        expr.expression = self.expr(expr.expression)
+        return expr
+
+    def visit_literal_expr(self, expr: Literal):
+        return expr
+
+    def visit_unary_expr(self, expr: Unary):
+        expr.right = self.expr(expr.right)
+        return expr
+
+    def visit_variable_expr(self, expr: Variable):
+        return expr
+
+    def visit_assign_expr(self, expr: Assign):
+        expr.value = self.expr(expr.value)
+        return expr
+
+    def visit_call_expr(self, expr: Call):
+        expr.callee = self.expr(expr.callee)
+        expr.arguments = [self.expr(argument) for argument in expr.arguments]
+        return expr
+
+    def visit_get_expr(self, expr: Get):
+        expr.object = self.expr(expr.object)
+        return expr
+
+    def visit_set_expr(self, expr: Set):
+        expr.object = self.expr(expr.object)
+        expr.value = self.expr(expr.value)
+        return expr
+
+    def visit_this_expr(self, expr: This):
+        return expr
+
+    def visit_super_expr(self, expr: Super):
+        return expr
+
+    def visit_list_expr(self, expr: List):
+        expr.elements = [self.expr(element) for element in expr.elements]
+        return expr
+
+    def visit_map_expr(self, expr: Map):
+        expr.keys = [self.expr(key) for key in expr.keys]
+        expr.values = [self.expr(value) for value in expr.values]
+        return expr
+
+    def visit_index_expr(self, expr: Index):
+        expr.object = self.expr(expr.object)
+        expr.index = self.expr(expr.index)
+        return expr
+
+    def visit_setindex_expr(self, expr: SetIndex):
+        expr.object = self.expr(expr.object)
+        expr.index = self.expr(expr.index)
+        expr.value = self.expr(expr.value)
+        return expr
+
+class ConstantFolder(Pass):  # Evaluates operators on literals at compile time, unless they would fail at runtime
+    name = "constant folding"
+
+    def visit_grouping_expr(self, expr: Grouping):
+        inner = self.expr(expr.expression)
+        if isinstance(inner, Literal):
+            return inner
+        expr.expression = inner
+        return expr
+
+    def visit_unary_expr(self, expr: Unary):
+        right = self.expr(expr.right)
+        expr.right = right
+        if not isinstance(right, Literal):
+            return expr
+        if expr.operator.type == TokenType.BANG:
+            return Literal(not is_truthy(right.value))
+        if expr.operator.type == TokenType.MINUS and isinstance(right.value, float):
+            return Literal(-right.value)
+        return expr  # "Operand must be a number." stays a runtime error
+
+    def visit_binary_expr(self, expr: Binary):
+        expr.left = self.expr(expr.left)
+        expr.right = self.expr(expr.right)
+        if not isinstance(expr.left, Literal) or not isinstance(expr.right, Literal):
+            return expr
+        left, right = expr.left.value, expr.right.value
+        kind = expr.operator.type
+        numbers = isinstance(left, float) and isinstance(right, float)
+        if kind == TokenType.EQUAL_EQUAL:
+            return Literal(left == right)
+        if kind == TokenType.BANG_EQUAL:
+            return Literal(not left == right)
+        if kind == TokenType.PLUS:
+            if numbers:
+                return Literal(left + right)
+            if isinstance(left, str) or isinstance(right, str):
+                return Literal(str(left) + str(right))
+            return expr
+        if not numbers:
+            return expr  # Type errors are reported when the expression runs
+        match kind:
+            case TokenType.MINUS:
+                return Literal(left - right)
+            case TokenType.STAR:
+                return Literal(left * right)
+            case TokenType.SLASH:
+                if right == 0:
+                    return expr  # Keep "Division by zero." a runtime error
+                return Literal(left / right)
+            case TokenType.GREATER:
+                return Literal(left > right)
+            case TokenType.GREATER_EQUAL:
+                return Literal(left >= right)
+            case TokenType.LESS:
+                return Literal(left < right)
+            case TokenType.LESS_EQUAL:
+                return Literal(left <= right)
+        return expr
+
+class DeadBranchEliminator(Pass):  # Drops branches and loops whose condition is a constant
+    name = "dead branches"
+
+    def visit_if_stmt(self, stmt: IfStmt):
+        super().visit_if_stmt(stmt)
+        if not isinstance(stmt.condition, Literal):
+            return stmt
+        if is_truthy(stmt.condition.value):
+            return stmt.then_branch
+        return stmt.else_branch
+
+    def visit_while_stmt(self, stmt: WhileStmt):
+        super().visit_while_stmt(stmt)
+        if isinstance(stmt.condition, Literal) and not is_truthy(stmt.condition.value):
+            return None
+        return stmt
+
+class UnreachableCodeEliminator(Pass):  # Drops statements that follow a return in the same block
+    name = "unreachable code"
+
+    def statements(self, statements):
+        result = super().statements(statements)
+        for index, stmt in enumerate(result):
+            if isinstance(stmt, ReturnStmt):
+                return result[:index + 1]
+        return result
+
+class CommonSubexpressionDetector:  # Finds pure subexpressions repeated within one statement
+    name = "common subexpressions"
+
+    def run(self, statements):  # Returns how many repeated subexpressions were found
+        self.found = 0
+        self.walk(statements)
+        return self.found
+
+    def walk(self, node):
+        if isinstance(node, list):
+            for child in node:
+                self.walk(child)
+        elif isinstance(node, Stmt):
+            for field in node.__match_args__:
+                value = getattr(node, field)
+                if isinstance(value, Expr):
+                    self.check(value)
+                else:
+                    self.walk(value)
+
+    def check(self, expr):
+        seen = {}
+        self.key(expr, seen)
+        self.found += sum(count - 1 for count in seen.values() if count > 1)
+
+    def key(self, expr, seen):  # Structural key of a pure expression, or None if it has side effects
+        if isinstance(expr, Literal):
+            return ("literal", type(expr.value), repr(expr.value))
+        if isinstance(expr, Variable):
+            return ("variable", expr.name.lexeme)
+        if isinstance(expr, This):
+            return ("this",)
+        if isinstance(expr, Grouping):
+            return self.key(expr.expression, seen)
+        if isinstance(expr, Unary):
+            right = self.key(expr.right, seen)
+            key = None if right is None else ("unary", expr.operator.type, right)
+        elif isinstance(expr, Binary):
+            left = self.key(expr.left, seen)
+            right = self.key(expr.right, seen)
+            key = None if left is None or right is None else ("binary", expr.operator.type, left, right)
+        elif isinstance(expr, Get):
+            target = self.key(expr.object, seen)
+            key = None if target is None else ("get", target, expr.name.lexeme)
+        elif isinstance(expr, Index):
+            target = self.key(expr.object, seen)
+            index = self.key(expr.index, seen)
+            key = None if target is None or index is None else ("index", target, index)
+        else:  # Calls and assignments have side effects; their operands can still repeat
+            for field in expr.__match_args__:
+                value = getattr(expr, field)
+                if isinstance(value, Expr):
+                    self.key(value, seen)
+                elif isinstance(value, list):
+                    for item in value:
+                        self.key(item, seen)
+            return None
+        if key is not None:
+            seen[key] = seen.get(key, 0) + 1
+        return key
+
+class Optimizer:  # Runs the passes in order and records what each one removed
+    PASSES = (ConstantFolder, DeadBranchEliminator, UnreachableCodeEliminator)
+
+    def __init__(self, interpreter):
+        self.interpreter = interpreter
+        self.stats = []  # (pass name, nodes before, nodes after)
+        self.common_subexpressions = 0
+
+    def optimize(self, statements):
+        for pass_type in self.PASSES:
+            before = count_nodes(statements)
+            statements = pass_type(self.interpreter).run(statements)
+            self.stats.append((pass_type.name, before, count_nodes(statements)))
+        self.common_subexpressions = CommonSubexpressionDetector().run(statements)
+        return statements
+
+    def report(self):
+        lines = []
+        for name, before, after in self.stats:
+            lines.append(f"{name}: {before} -> {after} nodes (-{before - after})")
+        lines.append(f"common subexpressions: {self.common_subexpressions} repeated")
+        return "\n".join(lines)
@@ -1,13 +1,15 @@
-from src.ast.expr import Binary, Grouping, Literal, Unary, Expr, Variable, Assign, This, Super, Call, Get, Set
-from src.ast.stmt import ExpressionStmt, PrintStmt, VarStmt, BlockStmt, IfStmt, WhileStmt, FunctionStmt, ReturnStmt, ClassStmt
+from src.ast.expr import Binary, Grouping, Literal, Unary, Expr, Variable, Assign, This, Super, Call, Get, Set, List, Map, Index, SetIndex
+from src.ast.stmt import ExpressionStmt, PrintStmt, VarStmt, BlockStmt, IfStmt, WhileStmt, FunctionStmt, ReturnStmt, ClassStmt, ImportStmt
 from src.core.token_type import TokenType
 from src.core.token1 import Token
 from src.utils.lox_error import ParseError
 
 class Parser:  # Parser class for parsing Lox source code
-    def __init__(self, tokens):
-        self.tokens = tokens
-        self.current = 0
+    def __init__(self, tokens, host=None):
+        self.host = host  # Receives syntax errors through host.error(token, message); None means the Lox class
+        self.tokens = iter(tokens)  # A token list or a lazy stream such as Scanner.iter_tokens()
+        self.current = next(self.tokens)  # Only the current and previous tokens are kept
+        self.last = None
 
     def parse(self):  # Main method to parse the tokens
         statements = []
@@ -25,6 +27,8 @@ class Parser:  # Parser class for parsing Lox source code
                 return self.function("function")
             if self.match(TokenType.VAR):
                 return self.var_declaration()
+            if self.match(TokenType.IMPORT):
+                return self.import_declaration()
             return self.statement()
         except ParseError:
             self.synchronize()
@@ -68,6 +72,12 @@ class Parser:  # Parser class for parsing Lox source code
         self.consume(TokenType.SEMICOLON, "Expect ';' after variable declaration.")
         return VarStmt(name, initializer)
 
+    def import_declaration(self):  # import "path";
+        keyword = self.previous()
+        path = self.consume(TokenType.STRING, "Expect module path string after 'import'.")
+        self.consume(TokenType.SEMICOLON, "Expect ';' after module path.")
+        return ImportStmt(keyword, path)
+
     def statement(self): # Method to parse a statement
         if self.match(TokenType.PRINT):
             return self.print_statement()
@@ -119,11 +129,12 @@ class Parser:  # Parser class for parsing Lox source code
         return IfStmt(condition, then_branch, else_branch)
 
     def while_statement(self):  # Method to parse a while statement
+        keyword = self.previous()
         self.consume(TokenType.LEFT_PAREN, "Expect '(' after 'while'.")
         condition = self.expression()
         self.consume(TokenType.RIGHT_PAREN, "Expect ')' after while condition.")
         body = self.statement()
-        return WhileStmt(condition, body)
+        return WhileStmt(keyword, condition, body)
 
     def expression(self):  # Method to parse an expression
         return self.assignment()
@@ -138,6 +149,8 @@ class Parser:  # Parser class for parsing Lox source code
                 return Assign(name, value)
             elif isinstance(expr, Get):
                 return Set(expr.object, expr.name, value)
+            elif isinstance(expr, Index):
+                return SetIndex(expr.object, expr.bracket, expr.index, value)
             self.error(equals, "Invalid assignment target.")
         return expr 
     
@@ -189,6 +202,10 @@ class Parser:  # Parser class for parsing Lox source code
             elif self.match(TokenType.DOT):
                 name = self.consume(TokenType.IDENTIFIER, "Expect property name after '.'.")
                 expr = Get(expr, name)
+            elif self.match(TokenType.LEFT_BRACKET):
+                index = self.expression()
+                bracket = self.consume(TokenType.RIGHT_BRACKET, "Expect ']' after index.")
+                expr = Index(expr, bracket, index)
             else:
                 break
 
@@ -228,8 +245,34 @@ class Parser:  # Parser class for parsing Lox source code
             expr = self.expression()
             self.consume(TokenType.RIGHT_PAREN, "Expect ')' after expression.")
             return Grouping(expr)
+        if self.match(TokenType.LEFT_BRACKET):
+            return self.list_literal()
+        if self.match(TokenType.LEFT_BRACE):  # A statement starting with '{' is a block, so maps only appear in expressions
+            return self.map_literal()
         raise self.error(self.peek(), "Expect expression.")
 
+    def list_literal(self):  # Method to parse [a, b, ...] after the '['
+        elements = []
+        if not self.check(TokenType.RIGHT_BRACKET):
+            while True:
+                elements.append(self.expression())
+                if not self.match(TokenType.COMMA):
+                    break
+        bracket = self.consume(TokenType.RIGHT_BRACKET, "Expect ']' after list elements.")
+        return List(bracket, elements)
+
+    def map_literal(self):  # Method to parse {key: value, ...} after the '{'
+        keys, values = [], []
+        if not self.check(TokenType.RIGHT_BRACE):
+            while True:
+                keys.append(self.expression())
+                self.consume(TokenType.COLON, "Expect ':' after map key.")
+                values.append(self.expression())
+                if not self.match(TokenType.COMMA):
+                    break
+        brace = self.consume(TokenType.RIGHT_BRACE, "Expect '}' after map entries.")
+        return Map(brace, keys, values)
+
     def match(self, *types): # Method to match token types
         for token_type in types:
             if self.check(token_type):
@@ -249,21 +292,22 @@ class Parser:  # Parser class for parsing Lox source code
 
     def advance(self):  # Method to advance to the next token
         if not self.is_at_end():
-            self.current += 1
+            self.last = self.current
+            self.current = next(self.tokens)
         return self.previous()
 
     def is_at_end(self):  # Method to check if the end of the token stream is reached
         return self.peek().type == TokenType.EOF
 
     def peek(self):  # Method to get the current token
-        return self.tokens[self.current]
+        return self.current
 
     def previous(self):  # Method to get the previous token
-        return self.tokens[self.current - 1]
+        return self.last
 
     def error(self, token, message):  # Method to handle errors
         from src.core.lox import Lox
-        Lox.error(token, message)
+        (self.host or Lox).error(token, message)
         return ParseError()
 
     def synchronize(self):  # Method to synchronize the parser after an error
@@ -274,7 +318,7 @@ class Parser:  # Parser class for parsing Lox source code
             if self.peek().type in (
                 TokenType.CLASS, TokenType.FUN, TokenType.VAR,
                 TokenType.FOR, TokenType.IF, TokenType.WHILE,
-                TokenType.PRINT, TokenType.RETURN
+                TokenType.PRINT, TokenType.RETURN, TokenType.IMPORT
             ):
                 return
             self.advance()
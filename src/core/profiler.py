@@ -0,0 +1,157 @@
+# Sampling profiler for Lox scripts. A background thread periodically looks at the main
+# thread's Python stack and turns it back into the Lox call stack: calls show up as
+# LoxFunction.call frames (tree-walker and closure backends) or as the frame list of VM.run,
+# and lines come from the tokens of the nodes being evaluated.
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+from src.core.closure_compiler import ClosureInterpreter, CompiledFunction
+from src.core.interpreter import Interpreter, LoxFunction
+from src.core.token1 import Token
+from src.core.vm import VM
+
+SCRIPT = "<script>"
+SOURCE_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # Only frames from src/ carry Lox state
+CALL_CODES = {function.__code__ for function in (LoxFunction.call, LoxFunction.call_method,
+                                                  CompiledFunction.call, CompiledFunction.call_method)}
+INTERPRET_CODES = {backend.interpret.__code__ for backend in (Interpreter, ClosureInterpreter, VM)}
+TOKEN_NAMES = ("paren", "operator", "name", "keyword", "method_token", "bracket")  # Tokens held by closure backend frames
+
+def node_line(node):  # Line of the first token among a node's fields, or None
+    for field in getattr(node, "__match_args__", ()):
+        value = getattr(node, field)
+        if type(value) is Token:
+            return value.line
+    return None
+
+def frame_line(names):  # Lox line a Python frame is working on, from its locals
+    for name in ("expr", "stmt"):
+        if name in names:
+            line = node_line(names[name])
+            if line is not None:
+                return line
+    for name in TOKEN_NAMES:
+        if type(names.get(name)) is Token:
+            return names[name].line
+    return None
+
+def vm_stack(names):  # Lox stack held by a running VM.run frame
+    frames = [(closure, ip - 1) for closure, ip, _ in list(names.get("frames", ()))]  # ip - 1: the call instruction
+    frames.append((names["closure"], names["ip"]))
+    return [(closure.function.name or SCRIPT, closure.function.chunk.lines[ip]) for closure, ip in frames]
+
+class StackReader:  # Turns Python stacks into Lox stacks, reusing what lies outside calls seen in the last sample
+    # While a call frame stays on the stack, everything outside it is suspended and cannot change,
+    # so the Lox stack outside it is remembered. A sample then walks only the frames pushed since
+    # the previous one, and reads the locals of about one frame per new Lox call.
+
+    def __init__(self):
+        self.calls = []      # (call frame, function name, Lox stack outside it), outermost first, as of the last sample
+        self.positions = {}  # Call frame -> index in calls
+
+    def read(self, frame):  # [(function name, current line)] from outermost to innermost, or None outside Lox code
+        levels = []  # (function name, line or None, new call frame or None), innermost first
+        line = None
+        outer = vm = None
+        kept = 0     # Entries of calls still on the stack
+        while frame is not None:
+            code = frame.f_code
+            if code in CALL_CODES:
+                position = self.positions.get(frame)
+                if position is not None:
+                    _, name, outside = self.calls[position]
+                    levels.append((name, line, None))
+                    outer, kept = list(outside), position + 1
+                    break
+                levels.append((frame.f_locals["self"].declaration.name.lexeme, line, frame))
+                line = None
+            elif code in INTERPRET_CODES:
+                outer = [(SCRIPT, 0 if line is None else line)]
+                break
+            elif code is VM.run.__code__:
+                names = frame.f_locals
+                if "ip" in names:  # Past the frame setup; the VM keeps the Lox stack itself
+                    vm = vm_stack(names)
+                    levels, line = [], None
+            elif line is None and code.co_filename.startswith(SOURCE_ROOT):
+                line = frame_line(frame.f_locals)
+            frame = frame.f_back
+        if outer is None:  # Starting up, compiling or finished
+            return None
+        if vm is not None:  # The VM's stack replaces the level it runs in
+            return outer[:-1] + vm
+        for call, _, _ in self.calls[kept:]:  # Returned since the last sample
+            del self.positions[call]
+        del self.calls[kept:]
+        stack = outer
+        for name, line, call in reversed(levels):
+            if call is not None:
+                self.positions[call] = len(self.calls)
+                self.calls.append((call, name, tuple(stack)))
+            stack.append((name, stack[-1][1] if line is None else line))  # No line yet: still at its call site
+        return stack
+
+class Profiler:
+    INTERVAL = 0.005  # Seconds between samples
+
+    def __init__(self, interval=INTERVAL):
+        self.interval = interval
+        self.stacks = Counter()  # Tuple of (function, line) pairs -> samples
+        self.samples = 0
+        self.reader = StackReader()
+        self.thread = None
+        self.running = False
+
+    def start(self, thread_id=None):  # Sample the given thread, by default the calling one
+        self.target = thread_id or threading.get_ident()
+        self.running = True
+        self.thread = threading.Thread(target=self.sample_loop, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        if self.thread is not None:
+            self.thread.join()
+
+    def sample_loop(self):
+        while self.running:
+            time.sleep(self.interval)
+            frame = sys._current_frames().get(self.target)
+            stack = None if frame is None else self.reader.read(frame)
+            if stack is None:  # Starting up, compiling or finished
+                continue
+            self.stacks[tuple(stack)] += 1
+            self.samples += 1
+
+    def collapsed(self):  # Lines in the "frame;frame;frame count" format read by flamegraph tools
+        folded = Counter()
+        for stack, count in self.stacks.items():
+            folded[";".join(name for name, _ in stack)] += count
+        return [f"{stack} {count}" for stack, count in sorted(folded.items())]
+
+    def write_collapsed(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("\n".join(self.collapsed()) + "\n")
+
+    def tables(self):  # (functions, lines): each maps a key to [self samples, inclusive samples]
+        functions, lines = {}, {}
+        for stack, count in self.stacks.items():
+            for table, keys in ((functions, [name for name, _ in stack]), (lines, [line for _, line in stack])):
+                for key in set(keys):  # Recursion counts once per sample
+                    table.setdefault(key, [0, 0])[1] += count
+                table.setdefault(keys[-1], [0, 0])[0] += count
+        return functions, lines
+
+    def report(self, top=15):
+        functions, lines = self.tables()
+        total = self.samples or 1
+        out = [f"profile: {self.samples} samples, one every {self.interval * 1000:g} ms"]
+        for title, table, label in (("function", functions, str), ("line", lines, lambda line: f"line {line}")):
+            out.append(f"{title:24} {'self':>7} {'total':>7}")
+            ranked = sorted(table.items(), key=lambda item: (-item[1][0], -item[1][1]))[:top]
+            for key, (own, inclusive) in ranked:
+                out.append(f"{label(key):24} {own / total:7.1%} {inclusive / total:7.1%}")
+        return "\n".join(out)
@@ -17,9 +17,11 @@ class ClassType(Enum):
     SUBCLASS = auto()
 
 class Resolver:
-    def __init__(self, interpreter: Interpreter):
+    def __init__(self, interpreter: Interpreter, host=None):
         self.interpreter = interpreter
+        self.host = host or Lox  # Receives errors through host.error(token, message)
         self.scopes = []  
+        self.slots = []  # Parallel to scopes: name -> slot index in that scope's environment
         self.current_function = FunctionType.NONE
         self.current_class = ClassType.NONE
 
@@ -33,17 +35,17 @@ class Resolver:
     def visit_block_stmt(self, stmt: BlockStmt):
         self._begin_scope()
         self.resolve(stmt.statements)
-        self._end_scope()
+        self.interpreter.size_scope(stmt, self._end_scope())
 
     def visit_var_stmt(self, stmt: VarStmt):
-        self._declare(stmt.name)
+        self._declare(stmt.name, stmt)
         if stmt.initializer is not None:
             self._resolve(stmt.initializer)
         self._define(stmt.name)
 
     def visit_variable_expr(self, expr: Variable):
         if self.scopes and self.scopes[-1].get(expr.name.lexeme) is False:
-            Lox.error(expr.name, "Can't read local variable in its own initializer.")
+            self.host.error(expr.name, "Can't read local variable in its own initializer.")
         self._resolve_local(expr, expr.name)
 
     def visit_assign_expr(self, expr: Assign):
@@ -51,7 +53,7 @@ class Resolver:
         self._resolve_local(expr, expr.name)
 
     def visit_function_stmt(self, stmt: FunctionStmt):
-        self._declare(stmt.name)
+        self._declare(stmt.name, stmt)
         self._define(stmt.name)
         self._resolve_function(stmt, FunctionType.FUNCTION)
 
@@ -69,12 +71,16 @@ class Resolver:
 
     def visit_return_stmt(self, stmt: ReturnStmt):
         if self.current_function == FunctionType.NONE:
-            Lox.error(stmt.keyword, "Can't return from top-level code.")
+            self.host.error(stmt.keyword, "Can't return from top-level code.")
         if stmt.value is not None:
             if self.current_function == FunctionType.INITIALIZER:
-                Lox.error(stmt.keyword, "Can't return a value from an initializer.")
+                self.host.error(stmt.keyword, "Can't return a value from an initializer.")
             self._resolve(stmt.value)
 
+    def visit_import_stmt(self, stmt: ImportStmt):  # Imports bind globals, so they only make sense at top level
+        if self.scopes:
+            self.host.error(stmt.keyword, "Can only import at top level.")
+
     def visit_while_stmt(self, stmt: WhileStmt):
         self._resolve(stmt.condition)
         self._resolve(stmt.body)
@@ -105,20 +111,20 @@ class Resolver:
         enclosing_class = self.current_class
         self.current_class = ClassType.CLASS
         
-        self._declare(stmt.name)
+        self._declare(stmt.name, stmt)
         self._define(stmt.name)
         
         if stmt.superclass is not None:
             if stmt.name.lexeme == stmt.superclass.name.lexeme:
-                Lox.error(stmt.superclass.name, "A class can't inherit from itself.")
+                self.host.error(stmt.superclass.name, "A class can't inherit from itself.")
             self.current_class = ClassType.SUBCLASS
             self._resolve(stmt.superclass)
             
             self._begin_scope()
-            self.scopes[-1]["super"] = True
+            self._declare_slot("super")
         
         self._begin_scope()
-        self.scopes[-1]["this"] = True  
+        self._declare_slot("this")
         
         for method in stmt.methods:
             declaration = FunctionType.METHOD
@@ -135,6 +141,7 @@ class Resolver:
 
     def visit_get_expr(self, expr):
         self._resolve(expr.object)
+        self.interpreter.cache_site(expr)
         return None
 
     def visit_set_expr(self, expr):
@@ -142,49 +149,80 @@ class Resolver:
         self._resolve(expr.object)
         return None
 
+    def visit_list_expr(self, expr: List):
+        for element in expr.elements:
+            self._resolve(element)
+
+    def visit_map_expr(self, expr: Map):
+        for key, value in zip(expr.keys, expr.values):
+            self._resolve(key)
+            self._resolve(value)
+
+    def visit_index_expr(self, expr: Index):
+        self._resolve(expr.object)
+        self._resolve(expr.index)
+
+    def visit_setindex_expr(self, expr: SetIndex):
+        self._resolve(expr.object)
+        self._resolve(expr.index)
+        self._resolve(expr.value)
+
     def visit_this_expr(self, expr: This):
         if self.current_class == ClassType.NONE:
-            Lox.error(expr.keyword, "Can't use 'this' outside of a class.")
+            self.host.error(expr.keyword, "Can't use 'this' outside of a class.")
             return
         self._resolve_local(expr, expr.keyword)
 
     def visit_super_expr(self, expr: Super):
         if self.current_class == ClassType.NONE:
-            Lox.error(expr.keyword, "Can't use 'super' outside of a class.")
+            self.host.error(expr.keyword, "Can't use 'super' outside of a class.")
         elif self.current_class != ClassType.SUBCLASS:
-            Lox.error(expr.keyword, "Can't use 'super' in a class with no superclass.")
+            self.host.error(expr.keyword, "Can't use 'super' in a class with no superclass.")
         self._resolve_local(expr, expr.keyword)
+        self.interpreter.cache_site(expr)
 
     def _resolve_function(self, function: FunctionStmt, function_type: FunctionType):
         enclosing_function = self.current_function
         self.current_function = function_type
         self._begin_scope()
-        for param in function.params:
+        for param in function.params:  # Parameters take the first slots, in order
             self._declare(param)
             self._define(param)
         self.resolve(function.body)
-        self._end_scope()
+        self.interpreter.size_scope(function, self._end_scope())
         self.current_function = enclosing_function
 
     def _resolve_local(self, expr: Expr, name: Token):
         for i in range(len(self.scopes) - 1, -1, -1):
             if name.lexeme in self.scopes[i]:
-                self.interpreter.resolve(expr, len(self.scopes) - 1 - i)
+                self.interpreter.resolve(expr, len(self.scopes) - 1 - i, self.slots[i][name.lexeme])
                 return
 
     def _begin_scope(self):
         self.scopes.append({})
+        self.slots.append({})
 
-    def _end_scope(self):
+    def _end_scope(self):  # Returns the number of slots the scope's environment needs
         self.scopes.pop()
+        return len(self.slots.pop())
 
-    def _declare(self, name: Token):
+    def _declare(self, name: Token, declaration=None):
         if not self.scopes:
             return
         scope = self.scopes[-1]
         if name.lexeme in scope:
-            Lox.error(name, "Already a variable with this name in this scope.")
+            self.host.error(name, "Already a variable with this name in this scope.")
         scope[name.lexeme] = False  
+        slot = self._declare_slot(name.lexeme)
+        if declaration is not None:  # The declaring statement writes straight into its slot
+            self.interpreter.resolve(declaration, 0, slot)
+
+    def _declare_slot(self, name: str):  # Give a name the next free slot in the innermost scope
+        slots = self.slots[-1]
+        if name not in slots:
+            slots[name] = len(slots)
+        self.scopes[-1].setdefault(name, True)
+        return slots[name]
 
     def _define(self, name: Token):
         if not self.scopes:
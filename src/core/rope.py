@@ -0,0 +1,58 @@
+# Strings built by repeated concatenation. `s = s + piece;` in a loop would copy all of s on
+# every iteration, so once a concatenation result gets long it becomes a Rope: the pieces in a
+# list, joined only when the text is needed (printed, compared, hashed, indexed or passed to a
+# native). A Rope behaves as the string it stands for; equality and printing are unchanged.
+#
+# Appending is O(1): the rope a + b shares a's parts list and counts one more part. Appending to
+# a rope that something else already extended joins its text once and starts a new list, so old
+# values never change.
+
+ROPE_MIN = 256  # Shorter results stay plain strings, which are cheaper to copy than to defer
+
+class Rope:
+    __slots__ = ("parts", "count", "length", "text")
+
+    def __init__(self, parts, length):
+        self.parts = parts        # Shared with ropes built by appending to this one
+        self.count = len(parts)   # How many of the parts belong to this rope
+        self.length = length
+        self.text = None          # The joined text, once something asked for it
+
+    def __str__(self):
+        text = self.text
+        if text is None:
+            parts = self.parts
+            text = self.text = "".join(parts if len(parts) == self.count else parts[:self.count])
+        return text
+
+    def __len__(self):
+        return self.length
+
+    def __eq__(self, other):  # Lox equality: equal to a string or rope with the same text, unequal to anything else
+        if type(other) is Rope:
+            other = str(other)
+        return str(self) == other
+
+    def __hash__(self):
+        return hash(str(self))
+
+    def append(self, piece):
+        parts = self.parts
+        if len(parts) != self.count:  # Already extended by another rope
+            parts = [str(self)]
+        parts.append(piece)
+        return Rope(parts, self.length + len(piece))
+
+STRINGS = (str, Rope)  # Types that make + a concatenation
+
+def concat(left, right):  # left + right when either operand is a string
+    if type(left) is Rope:
+        return left.append(right if type(right) is str else str(right))
+    left = str(left)
+    right = str(right)
+    if len(left) + len(right) < ROPE_MIN:
+        return left + right
+    return Rope([left, right], len(left) + len(right))
+
+def flatten(value):  # A Rope's text; any other value unchanged
+    return str(value) if type(value) is Rope else value
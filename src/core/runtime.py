@@ -0,0 +1,211 @@
+# Embedding API: run Lox from Python code such as a request handler.
+#
+#   runtime = LoxRuntime()
+#   runtime.define("name", "Ada")
+#   result = runtime.run('var greeting = "hello " + name; print greeting;')
+#   result.output       # "hello Ada\n"
+#   result.status       # 0; 65 after compile errors and 70 after a runtime error, as for `lox`
+#   result.diagnostics  # [] here; otherwise Diagnostic objects with kind, line and message
+#   runtime.get("greeting")
+#
+# A Budget limits what one run may do: runtime.run(source, Budget(steps=10**6, seconds=0.5))
+# stops the script with a runtime error once it goes over. LoxRuntime(budget=...) sets the
+# default for every run.
+#
+# A runtime owns its interpreter, output and error state and never touches the Lox class, so
+# runtimes in different threads do not interfere. One runtime runs one script at a time.
+# Globals persist from one run to the next until reset(), which goes back to the built-ins
+# and the prelude, if one was given. A runtime remembers the programs it has compiled, keyed by
+# source, so running the same source again skips the front end and the backend's compiler.
+# Each program's resolver data goes into the interpreter's tables and comes out again when the
+# program is dropped: at once if it defines no functions, otherwise at the next reset(), since
+# until then the globals may still hold its functions. reset() keeps only the data of the
+# prelude and of the programs still remembered, so the tables stay bounded.
+#
+# RuntimePool hands pre-built runtimes to concurrent handlers and resets each one as it comes
+# back, so no state carries over from one request to the next:
+#
+#   pool = RuntimePool(8, prelude=library_source, backend=VM)
+#   with pool.runtime() as runtime:
+#       result = runtime.run(request_source)
+import contextlib
+import io
+import queue
+import sys
+import time
+
+from src.core import modules
+from src.core.interpreter import Interpreter, ResolverTables, RuntimeError, StackOverflow, call_line
+from src.core.lox import Lox, RECURSION_LIMIT
+from src.core.rope import flatten
+
+PROGRAMS = 128  # Compiled programs a runtime keeps, oldest dropped first
+
+class Diagnostic:  # One error from scanning, compiling or running a script
+    __slots__ = ("kind", "line", "message", "where")
+
+    def __init__(self, kind, line, message, where=""):
+        self.kind = kind        # "scan", "compile" or "runtime"
+        self.line = line
+        self.message = message
+        self.where = where      # " at 'token'", " at end" or "", as in compile errors on the command line
+
+    def __repr__(self):
+        return f"Diagnostic({self.kind!r}, {self.line}, {self.message!r})"
+
+    def __str__(self):
+        if self.kind == "compile":
+            return f"[line {self.line}] Error{self.where}: {self.message}"
+        return f"[line {self.line}] {self.message}"
+
+class RunResult:  # What one run() produced
+    __slots__ = ("status", "output", "diagnostics", "seconds")
+
+    def __init__(self, status, output, diagnostics, seconds):
+        self.status = status            # 0, 65 (compile errors) or 70 (runtime error)
+        self.output = output            # Everything the script printed
+        self.diagnostics = diagnostics  # Diagnostic list, in the order they happened
+        self.seconds = seconds
+
+    @property
+    def ok(self):
+        return self.status == 0
+
+    def __repr__(self):
+        return f"RunResult(status={self.status}, output={self.output!r}, diagnostics={self.diagnostics!r})"
+
+class LoxRuntime:
+    report_optimizations = False
+    optimization_report = None
+
+    def __init__(self, backend=Interpreter, prelude=None, optimize=True, use_cache=True, directory=None, budget=None):
+        sys.setrecursionlimit(max(sys.getrecursionlimit(), RECURSION_LIMIT))
+        self.optimize = optimize    # Settings the front end reads from its host, as from the Lox class
+        self.use_cache = use_cache  # Whether imported modules use __loxcache__
+        self.had_error = False
+        self.diagnostics = []
+        self.programs = {}  # Source -> (compiled program, its ResolverTables)
+        self.retired = []  # Tables of dropped programs whose functions may still be called; removed at reset()
+        self.budget = None  # Budget for runs that do not pass their own; None is unlimited
+        self.interpreter = backend()
+        self.interpreter.host = self
+        self.interpreter.directory = directory  # Imports are relative to it; None is the working directory
+        self.prelude = None
+        self.prelude_tables = None
+        if prelude is not None:
+            result = self.run(prelude)
+            if result.diagnostics:  # Scanning errors too: the prelude runs again on every reset
+                raise ValueError(f"prelude failed: {'; '.join(map(str, result.diagnostics))}")
+            self.prelude, self.prelude_tables = self.programs.pop(prelude)  # Never dropped with the other programs
+        self.budget = budget  # The prelude is trusted setup: it runs without limits, here and in reset()
+
+    # The host interface used by the front end (see Lox.front_end)
+
+    def error(self, token_or_line, message):
+        if isinstance(token_or_line, int):
+            self.diagnostics.append(Diagnostic("compile", token_or_line, message))
+        else:
+            token = token_or_line
+            where = " at end" if token.type.name == "EOF" else f" at '{token.lexeme}'"
+            self.diagnostics.append(Diagnostic("compile", token.line, message, where))
+        self.had_error = True
+
+    def runtime_error(self, error):
+        self.diagnostics.append(Diagnostic("runtime", error.token.line, str(error)))
+
+    def scan_error(self, line, message):  # Scanning errors are reported but, as on the command line, do not stop the run
+        self.diagnostics.append(Diagnostic("scan", line, message))
+
+    # Running code
+
+    def run(self, source, budget=None):  # Run a script on this runtime's globals; returns a RunResult
+        self.had_error = False
+        self.diagnostics = diagnostics = []
+        output = self.interpreter.output = io.StringIO()
+        self.interpreter.budget = budget or self.budget
+        start = time.perf_counter()
+        status = self.execute(source)
+        return RunResult(status, output.getvalue(), diagnostics, time.perf_counter() - start)
+
+    def execute(self, source):  # Exit status of running source, recording diagnostics
+        interpreter = self.interpreter
+        entry = self.programs.get(source)
+        if entry is None:
+            tables = ResolverTables()
+            statements, clean = Lox.front_end(source, tables, self)
+            if statements is None:
+                return 65
+            tables.install(interpreter)
+            entry = interpreter.prepare_module(statements), tables
+            if clean:  # Sources with scanning errors compile again, so every run reports them
+                if len(self.programs) >= PROGRAMS:
+                    self.drop(self.programs.pop(next(iter(self.programs)))[1])
+                self.programs[source] = entry
+        program, tables = entry
+        try:
+            interpreter.start_budget()  # After compiling, so only running counts
+            program()
+            return 65 if self.had_error else 0  # Compile errors in an imported module
+        except RuntimeError as error:
+            failure = error
+        except RecursionError as error:
+            failure = StackOverflow(call_line(error.__traceback__))
+        finally:
+            if source not in self.programs and tables is not self.prelude_tables:
+                self.drop(tables)
+        self.runtime_error(failure)
+        interpreter.environment = interpreter.globals  # An error can leave the tree-walker inside a block
+        return 70
+
+    def drop(self, tables):  # Take a program that is no longer remembered out of the interpreter's tables
+        if tables.defines_functions():
+            self.retired.append(tables)
+        else:
+            tables.uninstall(self.interpreter)
+
+    def reset(self):  # Forget everything the scripts did: back to the built-ins plus the prelude
+        interpreter = self.interpreter
+        interpreter.reset_globals()
+        kept = [tables for _, tables in self.programs.values()]
+        if self.prelude_tables is not None:
+            kept.append(self.prelude_tables)
+        interpreter.retain_tables(kept)  # Modules and retired programs go; the prelude imports its modules again
+        modules.forget(interpreter)
+        self.retired = []
+        interpreter.output = None
+        interpreter.budget = None
+        interpreter.start_budget()
+        self.diagnostics = []
+        if self.prelude is not None:
+            interpreter.output = io.StringIO()  # The prelude's output was seen when the runtime was built
+            self.prelude()
+            interpreter.output = None
+
+    def define(self, name, value):  # Set a global for the scripts to read; Python ints become Lox numbers
+        if type(value) is int:
+            value = float(value)
+        self.interpreter.globals.define(name, value)
+
+    def get(self, name, default=None):  # A global's value, or default if it is not defined
+        return flatten(self.interpreter.globals.values.get(name, default))
+
+class RuntimePool:  # Pre-built runtimes for concurrent callers; each is reset before it is handed out again
+    def __init__(self, size, **options):  # options are passed to LoxRuntime
+        self.idle = queue.LifoQueue()  # The most recently used runtime has the warmest caches
+        for _ in range(size):
+            self.idle.put(LoxRuntime(**options))
+
+    @contextlib.contextmanager
+    def runtime(self, timeout=None):  # Borrow a runtime, waiting up to timeout seconds (forever if None)
+        runtime = self.idle.get(timeout=timeout)
+        try:
+            yield runtime
+        finally:
+            runtime.reset()
+            self.idle.put(runtime)
+
+    def run(self, source, globals=None, timeout=None, budget=None):  # Run source on a borrowed runtime, with globals defined first
+        with self.runtime(timeout) as runtime:
+            for name, value in (globals or {}).items():
+                runtime.define(name, value)
+            return runtime.run(source, budget)
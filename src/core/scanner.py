@@ -1,5 +1,8 @@
+import re
+import sys
+
 from src.core.token_type import TokenType
-from src.core.token1 import Token
+from src.core.token1 import Token, TokenBuffer
 
 class Scanner:
     keywords = {                  # mapping keywords to their token types
@@ -10,6 +13,7 @@ class Scanner:
         "for":    TokenType.FOR,
         "fun":    TokenType.FUN,
         "if":     TokenType.IF,
+        "import": TokenType.IMPORT,
         "nil":    TokenType.NIL,
         "or":     TokenType.OR,
         "print":  TokenType.PRINT,
@@ -21,115 +25,103 @@ class Scanner:
         "while":  TokenType.WHILE
     }
 
-    def __init__(self, source):
+    operators = {                 # punctuation and operators, looked up by lexeme
+        "(": TokenType.LEFT_PAREN,
+        ")": TokenType.RIGHT_PAREN,
+        "{": TokenType.LEFT_BRACE,
+        "}": TokenType.RIGHT_BRACE,
+        "[": TokenType.LEFT_BRACKET,
+        "]": TokenType.RIGHT_BRACKET,
+        ":": TokenType.COLON,
+        ",": TokenType.COMMA,
+        ".": TokenType.DOT,
+        "-": TokenType.MINUS,
+        "+": TokenType.PLUS,
+        ";": TokenType.SEMICOLON,
+        "*": TokenType.STAR,
+        "/": TokenType.SLASH,
+        "!": TokenType.BANG,
+        "!=": TokenType.BANG_EQUAL,
+        "=": TokenType.EQUAL,
+        "==": TokenType.EQUAL_EQUAL,
+        "<": TokenType.LESS,
+        "<=": TokenType.LESS_EQUAL,
+        ">": TokenType.GREATER,
+        ">=": TokenType.GREATER_EQUAL,
+    }
+
+    # One master pattern; the number of the group that matched says what was found
+    SKIP, NEWLINE, NUMBER, IDENTIFIER, STRING, OPERATOR, UNTERMINATED, UNEXPECTED = range(1, 9)
+    pattern = re.compile(r"""
+        ([ \t\r]+|//[^\n]*)                 # whitespace and comments
+      | (\n)
+      | (\d+(?:\.\d+)?)                     # number: a trailing dot is not part of it
+      | ([^\W\d]\w*)                        # identifier or keyword
+      | "([^"]*)"                           # string, may span lines
+      | (!=|==|<=|>=|[(){}\[\]:,.\-+;*/!=<>])
+      | (")                                 # string with no closing quote
+      | (.)
+    """, re.VERBOSE)
+
+    def __init__(self, source, report=None):
         self.source = source # source code to be scanned
+        self.report = report or self.print_error  # Called with (line, message) for each scanning error
         self.tokens = []  # list to store tokens
-        self.start = 0   # start index of the current token
-        self.current = 0   # current index in the source code
         self.line = 1   # current line number in the source code
+        self.position = 0   # source offset just past the last token produced
+        self.errors = 0   # number of scanning errors reported
 
-    def scan_tokens(self):  
-        while not self.is_at_end():  #scans tokens until the end of the source code
-            self.start = self.current
-            self.scan_token()
+    @staticmethod
+    def print_error(line, message):
+        print(f"[line {line}] {message}")
 
-        self.tokens.append(Token(TokenType.EOF, "", None, self.line))  # add EOF token at the end
+    def scan_tokens(self):  # Scan the whole source into self.tokens
+        self.tokens = list(self.iter_tokens())
         return self.tokens
 
-    def is_at_end(self): # checks if the current index is at the end of the source code
-        return self.current >= len(self.source) # returns true if finishes scanning all characters
-
-    def scan_token(self):  
-        c = self.advance() # gets the current character and move to the next one
-        if c == '(': self.add_token(TokenType.LEFT_PAREN)
-        elif c == ')': self.add_token(TokenType.RIGHT_PAREN)
-        elif c == '{': self.add_token(TokenType.LEFT_BRACE)
-        elif c == '}': self.add_token(TokenType.RIGHT_BRACE)
-        elif c == ',': self.add_token(TokenType.COMMA)
-        elif c == '.': self.add_token(TokenType.DOT)
-        elif c == '-': self.add_token(TokenType.MINUS)
-        elif c == '+': self.add_token(TokenType.PLUS)
-        elif c == ';': self.add_token(TokenType.SEMICOLON)
-        elif c == '*': self.add_token(TokenType.STAR)
-        elif c == '!':    #here on checks for the respective token types
-            self.add_token(TokenType.BANG_EQUAL if self.match('=') else TokenType.BANG)
-        elif c == '=':
-            self.add_token(TokenType.EQUAL_EQUAL if self.match('=') else TokenType.EQUAL)
-        elif c == '<':
-            self.add_token(TokenType.LESS_EQUAL if self.match('=') else TokenType.LESS)
-        elif c == '>':
-            self.add_token(TokenType.GREATER_EQUAL if self.match('=') else TokenType.GREATER)
-        elif c == '/':
-            if self.match('/'):
-                while self.peek() != '\n' and not self.is_at_end():
-                    self.advance()
+    def scan_buffer(self):  # Scan the whole source into a compact TokenBuffer
+        buffer = TokenBuffer(self.source, {token_type.value: token_type for token_type in TokenType})
+        for token in self.iter_tokens():
+            start = self.position - len(token.lexeme)
+            buffer.append(token.type.value, start, len(token.lexeme), token.line, token.literal)
+        return buffer
+
+    def iter_tokens(self):  # Yield tokens one at a time, ending with EOF, so a parser can consume them on demand
+        keywords = self.keywords
+        operators = self.operators
+        identifier = TokenType.IDENTIFIER
+        intern = sys.intern
+        line = 1
+        for match in self.pattern.finditer(self.source):
+            kind = match.lastindex
+            if kind == self.SKIP:
+                continue
+            if kind == self.NEWLINE:
+                line += 1
+                continue
+            self.position = match.end()  # End of the token about to be yielded
+            if kind == self.IDENTIFIER:
+                # Interned, so every occurrence of a name shares one string and dict lookups compare by identity
+                text = intern(match.group())
+                yield Token(keywords.get(text, identifier), text, None, line)
+            elif kind == self.OPERATOR:
+                text = intern(match.group())
+                yield Token(operators[text], text, None, line)
+            elif kind == self.NUMBER:
+                text = match.group()
+                yield Token(TokenType.NUMBER, text, float(text), line)
+            elif kind == self.STRING:
+                value = match.group(self.STRING)
+                line += value.count("\n")  # a string token carries the line it ends on
+                yield Token(TokenType.STRING, match.group(), value, line)
+            elif kind == self.UNTERMINATED:
+                line += self.source.count("\n", match.start())
+                self.report(line, "Unterminated string.")
+                self.errors += 1
+                break
             else:
-                self.add_token(TokenType.SLASH)
-        elif c in (' ', '\r', '\t'): 
-            pass  # Ignore whitespace
-        elif c == '\n':   
-            self.line += 1  # Increment line number
-        elif c == '"': # Start of a string literal
-            self.string()
-        elif c.isdigit(): #start of a number literal
-            self.number()
-        elif c.isalpha() or c == '_':   # start of an identifier
-            self.identifier()
-        else:
-            print(f"[line {self.line}] Unexpected character: {c}")
-
-    def advance(self): #moves one character forward and returns the current character
-        self.current += 1
-        return self.source[self.current - 1]
-
-    def add_token(self, type, literal=None): # adds a token to the list of tokens
-        text = self.source[self.start:self.current]
-        self.tokens.append(Token(type, text, literal, self.line))
-
-    def match(self, expected): # checks if the next character matches the expected character
-        if self.is_at_end(): return False
-        if self.source[self.current] != expected: return False
-        self.current += 1
-        return True
-
-    def peek(self): # returns the current character without moving forward
-        if self.is_at_end(): return '\0'
-        return self.source[self.current]
-
-    def peek_next(self): # look at next character after the current one
-        if self.current + 1 >= len(self.source): return '\0'
-        return self.source[self.current + 1]
-
-    def string(self): # handles string literals
-        while self.peek() != '"' and not self.is_at_end():
-            if self.peek() == '\n':
-                self.line += 1
-            self.advance()
-
-        if self.is_at_end(): # if we reach the end of the source code without finding a closing quote
-            print(f"[line {self.line}] Unterminated string.")
-            return
-
-        self.advance()  # closing "
-        value = self.source[self.start + 1 : self.current - 1]
-        self.add_token(TokenType.STRING, value)
-
-    def number(self): # handles number literals(int and float)
-        while self.peek().isdigit():
-            self.advance()
-
-        if self.peek() == '.' and self.peek_next().isdigit():
-            self.advance()
-            while self.peek().isdigit():
-                self.advance()
-
-        value = float(self.source[self.start:self.current])
-        self.add_token(TokenType.NUMBER, value)
-
-    def identifier(self): # handles identifiers and keywords
-        while self.peek().isalnum() or self.peek() == '_':
-            self.advance()
-
-        text = self.source[self.start:self.current]
-        token_type = self.keywords.get(text, TokenType.IDENTIFIER)
-        self.add_token(token_type)
+                self.report(line, f"Unexpected character: {match.group()}")
+                self.errors += 1
+        self.line = line
+        self.position = len(self.source)
+        yield Token(TokenType.EOF, "", None, line)
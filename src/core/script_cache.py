@@ -0,0 +1,127 @@
+# On-disk cache of resolved programs, in the spirit of __pycache__/*.pyc.
+# A cache file holds the (optionally optimized) AST in flat form plus the resolver's
+# depth/slot and scope-size tables and the optimizer's report, keyed by a hash of the
+# source and of the format.
+import hashlib
+import io
+import os
+import pickle
+import sys
+from array import array
+
+from src.ast.expr import Get, Super
+from src.ast.flat import FlatAst, NODE_TYPES
+
+FORMAT_VERSION = 2  # Bump when the cached data changes meaning
+CACHE_DIR = "__loxcache__"
+MEMORY_ENTRIES = 256
+memory = None  # Source key -> resolved program; long-running processes such as `lox serve` turn this on with {}
+
+# Changing a node's fields changes the layout key, so stale files are never misread
+LAYOUT = hashlib.sha256(repr([(node.__name__, node.__match_args__) for node in NODE_TYPES]).encode()).hexdigest()[:16]
+MAGIC = f"lox-cache {FORMAT_VERSION} {LAYOUT} py{sys.version_info[0]}.{sys.version_info[1]}"
+
+class _Unpickler(pickle.Unpickler):  # Cache files may only rebuild arrays and FlatAst
+    ALLOWED = {("array", "_array_reconstructor"), ("array", "array"), ("src.ast.flat", "FlatAst")}
+
+    def find_class(self, module, name):
+        if (module, name) not in self.ALLOWED:
+            raise pickle.UnpicklingError(f"{module}.{name} is not allowed in a cache file")
+        return super().find_class(module, name)
+
+def cache_path(path):  # __loxcache__/<script name>.loxc next to the script
+    directory, name = os.path.split(os.path.abspath(path))
+    return os.path.join(directory, CACHE_DIR, name + "c")
+
+def source_key(source, optimized):
+    digest = hashlib.sha256(source.encode("utf-8")).hexdigest()
+    return f"{digest}:{'optimized' if optimized else 'plain'}"
+
+def _cache_sites(node, sites):  # Every Get and Super node in a tree
+    if isinstance(node, list):
+        for item in node:
+            _cache_sites(item, sites)
+    elif hasattr(node, "__match_args__"):
+        if type(node) is Get or type(node) is Super:
+            sites.append(node)
+        for field in node.__match_args__:
+            _cache_sites(getattr(node, field), sites)
+    return sites
+
+def recall(source, interpreter, optimized):  # (statements, optimizer report) kept by an earlier run in this process, or None
+    if memory is None:
+        return None
+    entry = memory.get(source_key(source, optimized))
+    if entry is None:
+        return None
+    statements, report, locals, scope_sizes, sites = entry
+    interpreter.locals.update(locals)
+    interpreter.scope_sizes.update(scope_sizes)
+    for node in sites:
+        interpreter.cache_site(node)
+    return statements, report
+
+def remember(source, interpreter, optimized, statements, report=None):  # Keep a freshly resolved program for later runs
+    if memory is None:
+        return
+    if len(memory) >= MEMORY_ENTRIES:
+        del memory[next(iter(memory))]  # Drop the oldest entry
+    sites = _cache_sites(statements, [])
+    memory[source_key(source, optimized)] = (statements, report, dict(interpreter.locals), dict(interpreter.scope_sizes), sites)
+
+def load(path, source, interpreter, optimized):  # (statements, optimizer report) with resolver data restored, or None on any mismatch
+    try:
+        with open(cache_path(path), "rb") as f:
+            data = _Unpickler(io.BytesIO(f.read())).load()
+        if data["magic"] != MAGIC or data["key"] != source_key(source, optimized):
+            return None
+        nodes = []
+        statements = data["flat"].to_nodes(nodes)
+        resolved, depths, slots = data["locals"]
+        sized, sizes = data["scope_sizes"]
+        report = data["report"]
+    except (OSError, EOFError, KeyError, IndexError, TypeError, ValueError, pickle.UnpicklingError):
+        return None  # Missing, unreadable or foreign file: fall back to compiling
+    for index, depth, slot in zip(resolved, depths, slots):
+        interpreter.resolve(nodes[index], depth, slot)
+    for index, size in zip(sized, sizes):
+        interpreter.size_scope(nodes[index], size)
+    for node in nodes:  # Inline caches start empty, as they do after resolving
+        if type(node) is Get or type(node) is Super:
+            interpreter.cache_site(node)
+    return statements, report
+
+def store(path, source, interpreter, optimized, statements, report=None):  # Best effort: an unwritable directory just means no cache
+    index = {}
+    flat = FlatAst.from_nodes(statements, index)
+    resolved, depths, slots = array("I"), array("I"), array("I")
+    for node, (depth, slot) in interpreter.locals.items():
+        if node in index:  # Skip nodes the optimizer removed
+            resolved.append(index[node])
+            depths.append(depth)
+            slots.append(slot)
+    sized, sizes = array("I"), array("I")
+    for node, size in interpreter.scope_sizes.items():
+        if node in index:
+            sized.append(index[node])
+            sizes.append(size)
+    data = {
+        "magic": MAGIC,
+        "key": source_key(source, optimized),
+        "flat": flat,
+        "locals": (resolved, depths, slots),
+        "scope_sizes": (sized, sizes),
+        "report": report,  # --opt-stats output, shown again when the entry is used
+    }
+    target = cache_path(path)
+    temporary = f"{target}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(temporary, "wb") as f:
+            pickle.dump(data, f, pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary, target)  # Readers never see a half-written file
+    except OSError:
+        try:
+            os.remove(temporary)
+        except OSError:
+            pass
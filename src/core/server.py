@@ -0,0 +1,185 @@
+# `lox serve`: a Unix-socket daemon with a pool of prewarmed worker processes.
+# Workers import the whole front end and every backend before forking, keep resolved
+# scripts in memory (script_cache.memory), and run one request at a time with fresh
+# Lox state. Requests and replies are newline-delimited JSON; see src/core/client.py.
+import gc
+import io
+import json
+import os
+import signal
+import socket
+import stat
+import sys
+import time
+import traceback
+
+from src.core import script_cache
+from src.core.client import check_private, default_socket
+from src.core.lox import Lox
+from src.core.main import main as run_command
+# Imported here so forked workers start with everything loaded
+from src.core import closure_compiler, optimizer, parser, resolver, scanner, vm  # noqa: F401
+
+class _Channel:  # Sends stdout/stderr text to the client as frames, coalescing small writes
+    FLUSH_BYTES = 4096
+    FLUSH_SECONDS = 0.05
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.stream = None
+        self.pending = []
+        self.size = 0
+        self.last_flush = time.monotonic()
+
+    def write(self, stream, text):
+        if stream != self.stream:
+            self.flush()
+            self.stream = stream
+        self.pending.append(text)
+        self.size += len(text)
+        if self.size >= self.FLUSH_BYTES or time.monotonic() - self.last_flush >= self.FLUSH_SECONDS:
+            self.flush()
+
+    def flush(self):
+        if self.pending:
+            self.send({"stream": self.stream, "data": "".join(self.pending)})
+            self.pending = []
+            self.size = 0
+        self.last_flush = time.monotonic()
+
+    def send(self, message):
+        self.connection.sendall(json.dumps(message).encode("utf-8") + b"\n")
+
+class _Stream(io.TextIOBase):  # sys.stdout/sys.stderr replacement for the duration of a request
+    def __init__(self, channel, name):
+        self.channel = channel
+        self.name = name
+
+    def writable(self):
+        return True
+
+    def write(self, text):
+        self.channel.write(self.name, text)
+        return len(text)
+
+def handle(connection):  # Run one request: {"argv": [...], "cwd": path, "stdin": text or null, "source": text or null}
+    with connection, connection.makefile("r", encoding="utf-8") as lines:
+        try:
+            message = json.loads(lines.readline())
+        except ValueError:
+            return
+        channel = _Channel(connection)
+        code = 0
+        saved = sys.stdin, sys.stdout, sys.stderr
+        sys.stdin = io.StringIO(message.get("stdin") or "")
+        sys.stdout, sys.stderr = _Stream(channel, "stdout"), _Stream(channel, "stderr")
+        try:
+            os.chdir(message.get("cwd") or "/")
+            Lox.reset()
+            run_command(list(message.get("argv", [])), message.get("source"))
+        except SystemExit as exit:
+            code = exit.code if isinstance(exit.code, int) else (0 if exit.code is None else 1)
+        except Exception:
+            traceback.print_exc()
+            code = 1
+        finally:
+            sys.stdin, sys.stdout, sys.stderr = saved
+        try:
+            channel.flush()
+            channel.send({"exit": code})
+        except OSError:
+            pass  # Client went away
+
+def _worker(listener):
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    script_cache.memory = {}
+    while True:
+        connection, _ = listener.accept()
+        handle(connection)
+
+def _spawn(listener):
+    pid = os.fork()
+    if pid == 0:
+        try:
+            _worker(listener)
+        finally:
+            os._exit(0)
+    return pid
+
+def _remove_stale(socket_path):  # Unlink a socket of ours left by a daemon that is gone; refuse to touch anything else
+    try:
+        info = os.lstat(socket_path)
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(info.st_mode) or info.st_uid != os.getuid():
+        print(f"lox serve: {socket_path} exists and is not a socket of this user's; not removing it", file=sys.stderr)
+        sys.exit(1)
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(socket_path)
+    except ConnectionRefusedError:
+        os.unlink(socket_path)
+        return
+    finally:
+        probe.close()
+    print(f"lox serve: a daemon is already listening on {socket_path}", file=sys.stderr)
+    sys.exit(1)
+
+def serve(socket_path=None, workers=4):
+    if socket_path is None:
+        socket_path = default_socket()
+        directory = os.path.dirname(socket_path)
+        try:
+            os.mkdir(directory, 0o700)
+        except FileExistsError:
+            pass
+        try:
+            check_private(directory)
+        except PermissionError as error:
+            print(f"lox serve: {error}", file=sys.stderr)
+            sys.exit(1)
+    _remove_stale(socket_path)
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(socket_path)
+    bound = os.lstat(socket_path).st_ino  # Only this socket is ours to remove on the way out
+    listener.listen(64)
+    gc.freeze()  # Keep the preloaded modules out of the workers' collections and their pages shared
+    children = {_spawn(listener) for _ in range(workers)}
+    print(f"lox serve: {workers} workers on {socket_path}", file=sys.stderr)
+
+    def stop(signum, frame):
+        raise KeyboardInterrupt
+    signal.signal(signal.SIGTERM, stop)
+    try:
+        while True:
+            pid, _ = os.wait()
+            if pid in children:  # Replace a worker that died, e.g. on a crash
+                children.discard(pid)
+                children.add(_spawn(listener))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        listener.close()
+        try:
+            if os.lstat(socket_path).st_ino == bound:
+                os.unlink(socket_path)
+        except FileNotFoundError:
+            pass
+
+def main(args):
+    socket_path, workers = None, 4
+    while args:
+        if args[0] == "--socket" and len(args) > 1:
+            socket_path, args = args[1], args[2:]
+        elif args[0] == "--workers" and len(args) > 1:
+            workers, args = int(args[1]), args[2:]
+        else:
+            print("Usage: lox serve [--socket PATH] [--workers N]")
+            sys.exit(64)
+    serve(socket_path, workers)
@@ -1,4 +1,9 @@
+import sys
+from array import array
+
 class Token: 
+    __slots__ = ("type", "lexeme", "literal", "line")  # Large scripts produce many tokens; keep them small
+
     def __init__(self, type, lexeme, literal, line): 
         self.type = type   
         self.lexeme = lexeme  
@@ -6,4 +11,37 @@ class Token:
         self.line = line  
     
     def __str__(self): 
-        return f"{self.type} {self.lexeme} {self.literal}" 
\ No newline at end of file
+        return f"{self.type} {self.lexeme} {self.literal}" 
+
+class TokenBuffer:  # Struct-of-arrays token storage: type codes, source offsets and lines instead of objects
+    def __init__(self, source, types):
+        self.source = source
+        self.types = types            # TokenType members, indexed by the codes below
+        self.codes = array("B")
+        self.starts = array("I")      # Offset of each lexeme in the source
+        self.lengths = array("I")
+        self.lines = array("I")
+        self.literals = {}            # Token index -> literal, for numbers and strings only
+
+    def append(self, code, start, length, line, literal=None):
+        if literal is not None:
+            self.literals[len(self.codes)] = literal
+        self.codes.append(code)
+        self.starts.append(start)
+        self.lengths.append(length)
+        self.lines.append(line)
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __getitem__(self, index):  # Build the Token on demand
+        start = self.starts[index]
+        lexeme = self.source[start:start + self.lengths[index]]
+        literal = self.literals.get(index)
+        if literal is None:
+            lexeme = sys.intern(lexeme)  # Names share one string, as they do when scanned directly
+        return Token(self.types[self.codes[index]], lexeme, literal, self.lines[index])
+
+    def __iter__(self):
+        for index in range(len(self.codes)):
+            yield self[index]
@@ -48,3 +48,11 @@ class TokenType(Enum):
     WHILE = 38
 
     EOF = 39
+
+    # Collection literals and subscripts
+    LEFT_BRACKET = 40
+    RIGHT_BRACKET = 41
+    COLON = 42
+
+    # Modules
+    IMPORT = 43
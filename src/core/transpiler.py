@@ -0,0 +1,469 @@
+import os
+
+from src.ast.expr import *
+from src.ast.stmt import *
+from src.core.compiler import CaptureAnalyzer
+from src.core.token_type import TokenType
+
+class _PyFunction:  # A Python function being generated
+    def __init__(self, kind, enclosing, this_name=None):
+        self.kind = kind  # "main", "function", "method", "initializer" or "block"
+        self.enclosing = enclosing
+        self.this_name = this_name
+        self.owned = set()      # Python names bound by this function
+        self.nonlocals = set()
+        self.globals = set()
+        self.header = 0         # Output index where global/nonlocal declarations go
+        self.temps = 0
+        self.loop_depth = 0
+
+    def owner(self):  # The real Lox function a block function belongs to
+        function = self
+        while function.kind == "block":
+            function = function.enclosing
+        return function
+
+class _Value:  # Python source for an expression plus what the generator knows about it
+    def __init__(self, code, simple=False, boolean=False, number=False):
+        self.code = code
+        self.simple = simple    # A name or literal: safe to repeat, no side effects
+        self.boolean = boolean  # Always a Python bool
+        self.number = number    # Always a float
+
+class Transpiler:  # Translates a resolved Lox program into a standalone Python module
+    NUMERIC_OPS = {
+        TokenType.MINUS: ("-", "_sub", False),
+        TokenType.STAR: ("*", "_mul", False),
+        TokenType.GREATER: (">", "_gt", True),
+        TokenType.GREATER_EQUAL: (">=", "_ge", True),
+        TokenType.LESS: ("<", "_lt", True),
+        TokenType.LESS_EQUAL: ("<=", "_le", True),
+    }
+
+    def __init__(self, locals):
+        self.locals = locals  # Resolver output: expressions that refer to a local variable
+        self.captured = set()
+        self.output = []      # (indent, text, lox line)
+        self.indent = 0
+        self.line = 0
+        self.scopes = []      # Lexeme -> (python name, owning _PyFunction)
+        self.function = None
+        self.defined_globals = set()  # Globals certainly defined at this point of the top-level code
+        self.counter = 0
+
+    def transpile(self, statements, source_name="<script>"):  # Returns the generated module source
+        self.captured = CaptureAnalyzer().analyze(statements)
+        self.function = _PyFunction("main", None)
+        self._begin_function("def _main():")
+        for stmt in statements:
+            self._statement(stmt)
+        self._end_function()
+
+        runtime_path = os.path.join(os.path.dirname(__file__), "transpiler_runtime.py")
+        with open(runtime_path, "r", encoding="utf-8") as f:
+            runtime = f.read().rstrip("\n").split("\n")
+        header = [f"# Generated by `lox compile` from {source_name}. Do not edit.", ""] + runtime + ["", "_G = globals()", ""]
+
+        lines = [0] * (len(header) + 1)  # Python line number -> Lox line number
+        text = list(header)
+        for indent, code, line in self.output:
+            text.append("    " * indent + code)
+            lines.append(line)
+        text.append("")
+        text.append(f"_LINES = {lines!r}")
+        text.append("")
+        text.append('if __name__ == "__main__":')
+        text.append("    sys.exit(_run(_main, _LINES))")
+        return "\n".join(text) + "\n"
+
+    # Output helpers
+
+    def _emit(self, code):
+        self.output.append((self.indent, code, self.line))
+
+    def _name(self, lexeme):  # Fresh Python name for a Lox local
+        self.counter += 1
+        return f"{lexeme}_{self.counter}"
+
+    def _temp(self):
+        self.function.temps += 1
+        return f"_t{self.function.temps}"
+
+    def _begin_function(self, signature):
+        self._emit(signature)
+        self.indent += 1
+        self.function.header = len(self.output)
+
+    def _end_function(self):  # Close the body and insert the scope declarations it turned out to need
+        function = self.function
+        if len(self.output) == function.header:
+            self._emit("pass")
+        declarations = []
+        if function.globals:
+            declarations.append((self.indent, "global " + ", ".join(sorted(function.globals)), self.line))
+        if function.nonlocals:
+            declarations.append((self.indent, "nonlocal " + ", ".join(sorted(function.nonlocals)), self.line))
+        self.output[function.header:function.header] = declarations
+        self.indent -= 1
+
+    def _declare(self, lexeme, name=None):  # Bind a Lox local in the innermost scope
+        name = name or self._name(lexeme)
+        self.scopes[-1][lexeme] = (name, self.function)
+        self.function.owned.add(name)
+        return name
+
+    def _lookup(self, expr, lexeme):  # Python name and owner of a resolved local, or None for a global
+        if expr is not None and expr not in self.locals:
+            return None
+        for scope in reversed(self.scopes):
+            if lexeme in scope:
+                return scope[lexeme]
+        return None
+
+    def _target(self, expr, lexeme):  # Name to assign, adding the global/nonlocal declaration it needs
+        binding = self._lookup(expr, lexeme)
+        if binding is None:
+            return None
+        name, owner = binding
+        if owner is not self.function:
+            self.function.nonlocals.add(name)
+        return name
+
+    def _global_target(self, lexeme):  # Direct global assignment when the global is known to exist
+        if self.function.kind == "main" and lexeme in self.defined_globals:
+            self.function.globals.add("v_" + lexeme)
+            return "v_" + lexeme
+        return None
+
+    def _define_global(self, lexeme):
+        self.function.globals.add("v_" + lexeme)
+        self.defined_globals.add(lexeme)
+        return "v_" + lexeme
+
+    def _return_code(self, value):  # A Lox return from the current Python function
+        if self.function.owner().kind == "initializer":
+            value = self.function.owner().this_name
+        if self.function.kind == "block":
+            return f"return ({value or 'None'},)"
+        return f"return {value}" if value else "return"
+
+    # Statements
+
+    def _statement(self, stmt):
+        stmt.accept(self)
+
+    def _statements(self, statements):
+        for stmt in statements:
+            self._statement(stmt)
+
+    def visit_expression_stmt(self, stmt: ExpressionStmt):
+        expr = stmt.expression
+        if isinstance(expr, Assign):  # Plain assignment statements avoid the walrus form
+            value = self._expr(expr.value)
+            self.line = expr.name.line
+            name = self._target(expr, expr.name.lexeme) or self._global_target(expr.name.lexeme)
+            if name is not None:
+                self._emit(f"{name} = {value.code}")
+                return
+            self._emit(f"_set_global(_G, {expr.name.lexeme!r}, {value.code}, {self.line})")
+            return
+        if isinstance(expr, Set) and isinstance(expr.object, This):
+            value = self._expr(expr.value)
+            this = self._expr(expr.object)
+            self._emit(f"{this.code}.fields[{expr.name.lexeme!r}] = {value.code}")
+            return
+        self._emit(self._expr(expr).code)
+
+    def visit_print_stmt(self, stmt: PrintStmt):
+        value = self._expr(stmt.expression)
+        self._emit(f"print(_to_string({value.code}))")
+
+    def visit_import_stmt(self, stmt: ImportStmt):  # A compiled module is standalone: it has no interpreter to load Lox files
+        from src.core.lox import Lox
+        Lox.error(stmt.keyword, "Can't import in a compiled module.")
+
+    def visit_var_stmt(self, stmt: VarStmt):
+        value = self._expr(stmt.initializer).code if stmt.initializer is not None else "None"
+        self.line = stmt.name.line
+        if not self.scopes:
+            self._emit(f"{self._define_global(stmt.name.lexeme)} = {value}")
+        else:
+            self._emit(f"{self._declare(stmt.name.lexeme)} = {value}")
+
+    def visit_block_stmt(self, stmt: BlockStmt):
+        if self.function.loop_depth and self._declares_captured(stmt.statements):
+            self._block_function(stmt)
+            return
+        self.scopes.append({})
+        self._statements(stmt.statements)
+        self.scopes.pop()
+
+    def _declares_captured(self, statements):  # Does this block bind something a closure keeps?
+        for stmt in statements:
+            if isinstance(stmt, (VarStmt, FunctionStmt, ClassStmt)) and stmt.name in self.captured:
+                return True
+            if isinstance(stmt, ClassStmt) and ("super", stmt) in self.captured:
+                return True
+        return False
+
+    def _block_function(self, stmt):  # Loop bodies whose locals are captured get a fresh scope per iteration
+        name = self._name("_block")
+        self.function = _PyFunction("block", self.function)
+        self._begin_function(f"def {name}():")
+        self.scopes.append({})
+        self._statements(stmt.statements)
+        self.scopes.pop()
+        self._end_function()
+        self.function = self.function.enclosing
+        if self.function.kind == "main":
+            self._emit(f"{name}()")
+            return
+        self._emit(f"_r = {name}()")
+        self._emit("if _r is not None:")
+        self._emit("    return _r" if self.function.kind == "block" else "    return _r[0]")
+
+    def visit_if_stmt(self, stmt: IfStmt):
+        condition = self._condition(stmt.condition)
+        self._emit(f"if {condition}:")
+        self._nested(stmt.then_branch)
+        if stmt.else_branch is not None:
+            self._emit("else:")
+            self._nested(stmt.else_branch)
+
+    def visit_while_stmt(self, stmt: WhileStmt):
+        condition = self._condition(stmt.condition)
+        self._emit(f"while {condition}:")
+        self.function.loop_depth += 1
+        self._nested(stmt.body)
+        self.function.loop_depth -= 1
+
+    def _nested(self, stmt):  # An indented statement body that may turn out empty
+        self.indent += 1
+        start = len(self.output)
+        self._statement(stmt)
+        if len(self.output) == start:
+            self._emit("pass")
+        self.indent -= 1
+
+    def visit_function_stmt(self, stmt: FunctionStmt):
+        self.line = stmt.name.line
+        lexeme = stmt.name.lexeme
+        if not self.scopes:
+            name = self._define_global(lexeme)
+        else:
+            name = self._declare(lexeme)
+        self._function(stmt, name, "function")
+
+    def _function(self, stmt, name, kind):  # Emit a def for a Lox function or method
+        self.function = _PyFunction(kind, self.function)
+        self.scopes.append({})
+        params = []
+        if kind in ("method", "initializer"):
+            self.function.this_name = self._declare("this")
+            params.append(self.function.this_name)
+        for param in stmt.params:
+            params.append(self._declare(param.lexeme))
+        self._begin_function(f"def {name}({', '.join(params)}):")
+        self._statements(stmt.body)
+        if kind == "initializer":
+            self._emit(f"return {self.function.this_name}")
+        self._end_function()
+        self.scopes.pop()
+        self.function = self.function.enclosing
+        self._emit(f"_fn({name}, {stmt.name.lexeme!r}, {len(stmt.params)})")
+
+    def visit_return_stmt(self, stmt: ReturnStmt):
+        self.line = stmt.keyword.line
+        value = self._expr(stmt.value).code if stmt.value is not None else None
+        self._emit(self._return_code(value))
+
+    def visit_class_stmt(self, stmt: ClassStmt):
+        self.line = stmt.name.line
+        lexeme = stmt.name.lexeme
+        name = self._define_global(lexeme) if not self.scopes else self._declare(lexeme)
+        self._emit(f"{name} = None")
+
+        superclass = "None"
+        if stmt.superclass is not None:
+            value = self._expr(stmt.superclass)
+            self.scopes.append({})
+            superclass = self._declare("super")
+            self._emit(f"{superclass} = _superclass({value.code}, {stmt.superclass.name.line})")
+
+        methods = []
+        for method in stmt.methods:
+            self.line = method.name.line
+            kind = "initializer" if method.name.lexeme == "init" else "method"
+            method_name = self._name(f"{lexeme}_{method.name.lexeme}")
+            self.function.owned.add(method_name)
+            self._function(method, method_name, kind)
+            methods.append(f"{method.name.lexeme!r}: {method_name}")
+
+        self.line = stmt.name.line
+        self._emit(f"{name} = _LoxClass({lexeme!r}, {superclass}, {{{', '.join(methods)}}})")
+        if stmt.superclass is not None:
+            self.scopes.pop()
+
+    # Expressions
+
+    def _expr(self, expr):
+        return expr.accept(self)
+
+    def _condition(self, expr):  # Python condition with Lox truthiness
+        value = self._expr(expr)
+        if value.boolean:
+            return value.code
+        if value.simple:
+            return f"{value.code} is not None and {value.code} is not False"
+        temp = self._temp()
+        return f"({temp} := {value.code}) is not None and {temp} is not False"
+
+    def _hold(self, value):  # Code to evaluate once, and a name (or literal) to reuse afterwards
+        if value.simple:
+            return value.code, value.code
+        temp = self._temp()
+        return f"({temp} := {value.code})", temp
+
+    def visit_literal_expr(self, expr: Literal):
+        if isinstance(expr.value, float):
+            return _Value(repr(expr.value), simple=True, number=True)
+        return _Value(repr(expr.value), simple=True, boolean=isinstance(expr.value, bool))
+
+    def visit_grouping_expr(self, expr: Grouping):
+        value = self._expr(expr.expression)
+        return _Value(f"({value.code})", value.simple, value.boolean, value.number)
+
+    def visit_unary_expr(self, expr: Unary):
+        right = self._expr(expr.right)
+        line = expr.operator.line
+        if expr.operator.type == TokenType.MINUS:
+            if right.number:
+                return _Value(f"(-{right.code})", number=True)
+            first, again = self._hold(right)
+            return _Value(f"(-{again} if type({first}) is float else _neg({again}, {line}))")
+        if right.boolean:
+            return _Value(f"(not {right.code})", boolean=True)
+        first, again = self._hold(right)
+        return _Value(f"({first} is None or {again} is False)", boolean=True)
+
+    def visit_binary_expr(self, expr: Binary):
+        left = self._expr(expr.left)
+        right = self._expr(expr.right)
+        kind = expr.operator.type
+        line = expr.operator.line
+        if kind == TokenType.EQUAL_EQUAL:
+            return _Value(f"({left.code} == {right.code})", boolean=True)
+        if kind == TokenType.BANG_EQUAL:
+            return _Value(f"(not {left.code} == {right.code})", boolean=True)
+        if kind == TokenType.PLUS:
+            operator, helper, boolean = "+", "_add", False
+        elif kind == TokenType.SLASH:
+            operator, helper, boolean = "/", "_div", False
+        else:
+            operator, helper, boolean = self.NUMERIC_OPS[kind]
+
+        # Fast path when both operands are numbers; the helper handles everything else and raises with the line
+        left_first, left_again = self._hold(left)
+        right_first, right_again = self._hold(right)
+        checks = []
+        if not left.number:
+            checks.append(f"(type({left_first}) is float)")
+        elif left_first != left_again:
+            checks.append(f"({left_first} is not None)")
+        if not right.number:
+            checks.append(f"(type({right_first}) is float)")
+        elif right_first != right_again:
+            checks.append(f"({right_first} is not None)")
+        test = " & ".join(checks) if checks else "True"
+        if kind == TokenType.SLASH:
+            test = f"{test} and {right_again} != 0"
+        fast = f"{left_again} {operator} {right_again}"
+        slow = f"{helper}({left_again}, {right_again}, {line})"
+        return _Value(f"({fast} if {test} else {slow})", boolean=boolean, number=not boolean and kind != TokenType.PLUS)
+
+    def visit_variable_expr(self, expr: Variable):
+        self.line = expr.name.line
+        binding = self._lookup(expr, expr.name.lexeme)
+        if binding is None:
+            return _Value("v_" + expr.name.lexeme, simple=True)
+        return _Value(binding[0], simple=True)
+
+    def visit_assign_expr(self, expr: Assign):
+        value = self._expr(expr.value)
+        self.line = expr.name.line
+        name = self._target(expr, expr.name.lexeme) or self._global_target(expr.name.lexeme)
+        if name is not None:
+            return _Value(f"({name} := {value.code})")
+        return _Value(f"_set_global(_G, {expr.name.lexeme!r}, {value.code}, {self.line})")
+
+    def visit_this_expr(self, expr: This):
+        return _Value(self._lookup(expr, "this")[0], simple=True)
+
+    def visit_super_expr(self, expr: Super):
+        superclass = self._lookup(expr, "super")[0]
+        this = self._lookup(expr, "this")[0]
+        return _Value(f"_super_get({superclass}, {this}, {expr.method.lexeme!r}, {expr.method.line})")
+
+    def visit_call_expr(self, expr: Call):
+        line = expr.paren.line
+        if isinstance(expr.callee, Get):
+            target = self._expr(expr.callee.object)
+            arguments = [self._expr(argument).code for argument in expr.arguments]
+            codes = ", ".join([target.code, repr(expr.callee.name.lexeme), str(line)] + arguments)
+            return _Value(f"_invoke({codes})")
+        if isinstance(expr.callee, Super):
+            superclass = self._lookup(expr.callee, "super")[0]
+            this = self._lookup(expr.callee, "this")[0]
+            arguments = [self._expr(argument).code for argument in expr.arguments]
+            codes = ", ".join([superclass, this, repr(expr.callee.method.lexeme), str(line)] + arguments)
+            return _Value(f"_super_invoke({codes})")
+
+        callee = self._expr(expr.callee)
+        arguments = [self._expr(argument) for argument in expr.arguments]
+        count = len(arguments)
+        if all(argument.simple for argument in arguments):
+            first, again = self._hold(callee)
+            codes = [argument.code for argument in arguments]
+            test = f"getattr({first}, 'arity', -1) == {count}"
+        else:  # Evaluate callee and arguments once, in order, before checking the callee
+            first, again = self._hold(callee)
+            held = [self._hold(argument) for argument in arguments]
+            codes = [argument_again for _, argument_again in held]
+            evaluated = ", ".join([f"getattr({first}, 'arity', -1)"] + [argument_first for argument_first, _ in held])
+            test = f"({evaluated})[0] == {count}"
+        fast = f"{again}({', '.join(codes)})"
+        slow = f"_call({', '.join([again, str(line)] + codes)})"
+        return _Value(f"({fast} if {test} else {slow})")
+
+    def visit_get_expr(self, expr: Get):
+        target = self._expr(expr.object)
+        return _Value(f"_get({target.code}, {expr.name.lexeme!r}, {expr.name.line})")
+
+    def visit_list_expr(self, expr: List):
+        elements = [self._expr(element).code for element in expr.elements]
+        return _Value(f"_List([{', '.join(elements)}])")
+
+    def visit_map_expr(self, expr: Map):
+        items = []
+        for key, value in zip(expr.keys, expr.values):
+            items.append(self._expr(key).code)
+            items.append(self._expr(value).code)
+        return _Value(f"_map({', '.join(items)})")
+
+    def visit_index_expr(self, expr: Index):
+        target = self._expr(expr.object)
+        index = self._expr(expr.index)
+        return _Value(f"_get_item({target.code}, {index.code}, {expr.bracket.line})")
+
+    def visit_setindex_expr(self, expr: SetIndex):
+        target = self._expr(expr.object)
+        index = self._expr(expr.index)
+        value = self._expr(expr.value)
+        return _Value(f"_set_item({target.code}, {index.code}, {value.code}, {expr.bracket.line})")
+
+    def visit_set_expr(self, expr: Set):
+        target = self._expr(expr.object)
+        if not isinstance(expr.object, This):
+            target = _Value(f"_instance({target.code}, {expr.name.line})")
+        value = self._expr(expr.value)
+        return _Value(f"_set({target.code}, {expr.name.lexeme!r}, {value.code})")
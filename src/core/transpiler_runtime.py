@@ -0,0 +1,470 @@
+# Runtime support for modules generated by `lox compile`.
+# The transpiler copies this file verbatim into every generated module, so it must stay standalone.
+import operator
+import sys
+import time
+import types
+from array import array
+from itertools import repeat
+
+_FunctionType = types.FunctionType
+
+class _LoxError(Exception):  # Lox runtime error carrying the original source line
+    def __init__(self, message, line):
+        super().__init__(message)
+        self.message = message
+        self.line = line
+
+class _Native:  # Built-in function such as clock()
+    __slots__ = ("name", "arity", "function")
+
+    def __init__(self, name, arity, function):
+        self.name = name
+        self.arity = arity
+        self.function = function
+
+    def __call__(self, *arguments):
+        return self.function(*arguments)
+
+    def __str__(self):
+        return "<native fn>"
+
+class _LoxClass:
+    __slots__ = ("name", "superclass", "methods", "initializer", "arity")
+
+    def __init__(self, name, superclass, methods):
+        self.name = name
+        self.superclass = superclass
+        self.methods = dict(superclass.methods) if superclass is not None else {}  # Copy down inherited methods
+        self.methods.update(methods)
+        self.initializer = self.methods.get("init")
+        self.arity = self.initializer.arity if self.initializer is not None else 0
+
+    def __call__(self, *arguments):
+        instance = _LoxInstance(self)
+        if self.initializer is not None:
+            self.initializer(instance, *arguments)
+        return instance
+
+    def __str__(self):
+        return self.name
+
+class _LoxInstance:
+    __slots__ = ("klass", "fields")
+
+    def __init__(self, klass):
+        self.klass = klass
+        self.fields = {}
+
+    def __str__(self):
+        return f"{self.klass.name} instance"
+
+class _BoundMethod:
+    __slots__ = ("receiver", "method", "arity")
+
+    def __init__(self, receiver, method):
+        self.receiver = receiver
+        self.method = method
+        self.arity = method.arity
+
+    def __call__(self, *arguments):
+        return self.method(self.receiver, *arguments)
+
+    def __str__(self):
+        if type(self.method) is _Native:
+            return "<native fn>"
+        return f"<fn {self.method.lox_name}>"
+
+def _fn(function, name, arity):  # Tag a generated Python function as a Lox function
+    function.lox_name = name
+    function.arity = arity
+    return function
+
+def _truthy(value):
+    return value is not None and value is not False
+
+def _str(value):  # Python str() of a Lox value, as used by string concatenation
+    if type(value) is _FunctionType:
+        return f"<fn {value.lox_name}>"
+    return str(value)
+
+def _to_string(value):  # Text shown by print
+    if value is None:
+        return "nil"
+    if type(value) is float:
+        text = str(value)
+        if text.endswith(".0"):
+            text = text[:-2]
+        return text
+    return _str(value)
+
+def _numbers(a, b, line):
+    if type(a) is not float or type(b) is not float:
+        raise _LoxError("Operands must be numbers.", line)
+
+def _add(a, b, line):
+    if type(a) is float and type(b) is float:
+        return a + b
+    if isinstance(a, str) or isinstance(b, str):
+        return _str(a) + _str(b)
+    raise _LoxError("Operands must be two numbers or two strings.", line)
+
+def _sub(a, b, line):
+    _numbers(a, b, line)
+    return a - b
+
+def _mul(a, b, line):
+    _numbers(a, b, line)
+    return a * b
+
+def _div(a, b, line):
+    _numbers(a, b, line)
+    if b == 0:
+        raise _LoxError("Division by zero.", line)
+    return a / b
+
+def _lt(a, b, line):
+    _numbers(a, b, line)
+    return a < b
+
+def _le(a, b, line):
+    _numbers(a, b, line)
+    return a <= b
+
+def _gt(a, b, line):
+    _numbers(a, b, line)
+    return a > b
+
+def _ge(a, b, line):
+    _numbers(a, b, line)
+    return a >= b
+
+def _neg(a, line):
+    if type(a) is not float:
+        raise _LoxError("Operand must be a number.", line)
+    return -a
+
+def _call(callee, line, *arguments):  # Slow path of a call: report what the fast path rejected
+    arity = getattr(callee, "arity", None)
+    if arity is None or not callable(callee):
+        raise _LoxError("Can only call functions and classes.", line)
+    if len(arguments) != arity:
+        raise _LoxError(f"Expected {arity} arguments but got {len(arguments)}.", line)
+    return callee(*arguments)
+
+def _get(instance, name, line):
+    if type(instance) is not _LoxInstance and not isinstance(instance, _LoxInstance):
+        raise _LoxError("Only instances have properties.", line)
+    fields = instance.fields
+    if name in fields:
+        return fields[name]
+    method = instance.klass.methods.get(name)
+    if method is None:
+        raise _LoxError(f"Undefined property '{name}'.", line)
+    return _BoundMethod(instance, method)
+
+def _instance(instance, line):  # Field assignment checks its target before evaluating the value
+    if type(instance) is not _LoxInstance and not isinstance(instance, _LoxInstance):
+        raise _LoxError("Only instances have fields.", line)
+    return instance
+
+def _set(instance, name, value):
+    instance.fields[name] = value
+    return value
+
+def _invoke(instance, name, line, *arguments):  # obj.name(...) without allocating a bound method
+    if type(instance) is not _LoxInstance and not isinstance(instance, _LoxInstance):
+        raise _LoxError("Only instances have properties.", line)
+    fields = instance.fields
+    if name in fields:
+        return _call(fields[name], line, *arguments)
+    method = instance.klass.methods.get(name)
+    if method is None:
+        raise _LoxError(f"Undefined property '{name}'.", line)
+    if len(arguments) != method.arity:
+        raise _LoxError(f"Expected {method.arity} arguments but got {len(arguments)}.", line)
+    return method(instance, *arguments)
+
+def _super_method(superclass, name, line):
+    method = superclass.methods.get(name)
+    if method is None:
+        raise _LoxError(f"Undefined property '{name}'.", line)
+    return method
+
+def _super_get(superclass, instance, name, line):
+    return _BoundMethod(instance, _super_method(superclass, name, line))
+
+def _super_invoke(superclass, instance, name, line, *arguments):
+    method = _super_method(superclass, name, line)
+    if len(arguments) != method.arity:
+        raise _LoxError(f"Expected {method.arity} arguments but got {len(arguments)}.", line)
+    return method(instance, *arguments)
+
+def _superclass(value, line):
+    if type(value) is not _LoxClass:
+        raise _LoxError("Superclass must be a class.", line)
+    return value
+
+def _set_global(namespace, name, value, line):  # Assigning an undeclared global is an error in Lox
+    if "v_" + name not in namespace:
+        raise _LoxError(f"Undefined variable '{name}'.", line)
+    namespace["v_" + name] = value
+    return value
+
+v_clock = _Native("clock", 0, time.time)
+
+# List and Map. Booleans get their own dict keys, since Python would merge true with 1.
+_TRUE_KEY = object()
+_FALSE_KEY = object()
+_showing = set()
+
+def _key(value):
+    return _TRUE_KEY if value is True else _FALSE_KEY if value is False else value
+
+def _unkey(value):
+    return True if value is _TRUE_KEY else False if value is _FALSE_KEY else value
+
+def _show(value):  # A value inside a printed collection
+    return f'"{value}"' if type(value) is str else _to_string(value)
+
+def _position(value, length, end=False):  # Lox number used as an index; errors come from inside a method call
+    if type(value) is not float or not value.is_integer():
+        raise _LoxError("Index must be an integer.", None)
+    if not 0 <= value < length + end:
+        raise _LoxError("Index out of range.", None)
+    return int(value)
+
+class _List(_LoxInstance):
+    __slots__ = ("values",)
+
+    def __init__(self, values):
+        self.klass = _LIST_CLASS
+        self.fields = {}
+        self.values = values
+
+    def __str__(self):
+        if id(self) in _showing:
+            return "[...]"
+        _showing.add(id(self))
+        try:
+            return f"[{', '.join(map(_show, self.values))}]"
+        finally:
+            _showing.discard(id(self))
+
+class _Map(_LoxInstance):
+    __slots__ = ("entries",)
+
+    def __init__(self, entries):
+        self.klass = _MAP_CLASS
+        self.fields = {}
+        self.entries = entries
+
+    def __str__(self):
+        if id(self) in _showing:
+            return "{...}"
+        _showing.add(id(self))
+        try:
+            return "{" + ", ".join(f"{_show(_unkey(k))}: {_show(v)}" for k, v in self.entries.items()) + "}"
+        finally:
+            _showing.discard(id(self))
+
+def _list_pop(self):
+    if not self.values:
+        raise _LoxError("List is empty.", None)
+    return self.values.pop()
+
+def _list_slice(self, start, end):
+    start = _position(start, len(self.values), True)
+    end = _position(end, len(self.values), True)
+    return _List(self.values[start:max(start, end)])
+
+_LIST_CLASS = _LoxClass("List", None, {
+    "len": _Native("len", 0, lambda self: float(len(self.values))),
+    "push": _Native("push", 1, lambda self, value: self.values.append(value)),
+    "pop": _Native("pop", 0, _list_pop),
+    "insert": _Native("insert", 2, lambda self, i, value: self.values.insert(_position(i, len(self.values), True), value)),
+    "remove": _Native("remove", 1, lambda self, i: self.values.pop(_position(i, len(self.values)))),
+    "slice": _Native("slice", 2, _list_slice),
+    "copy": _Native("copy", 0, lambda self: _List(list(self.values))),
+})
+
+_MAP_CLASS = _LoxClass("Map", None, {
+    "len": _Native("len", 0, lambda self: float(len(self.entries))),
+    "has": _Native("has", 1, lambda self, name: _key(name) in self.entries),
+    "remove": _Native("remove", 1, lambda self, name: self.entries.pop(_key(name), None)),
+    "keys": _Native("keys", 0, lambda self: _List([_unkey(name) for name in self.entries])),
+    "values": _Native("values", 0, lambda self: _List(list(self.entries.values()))),
+    "copy": _Native("copy", 0, lambda self: _Map(dict(self.entries))),
+})
+
+def _map(*items):  # Map literal from key, value, key, value, ...
+    entries = {}
+    for i in range(0, len(items), 2):
+        entries[_key(items[i])] = items[i + 1]
+    return _Map(entries)
+
+# NumArray: numbers packed in an array('d'), with the interpreter's methods and error messages
+def _number(value):
+    if type(value) is not float:
+        raise _LoxError("Operand must be a number.", None)
+    return value
+
+def _integer(value, what):
+    if type(value) is not float or not value.is_integer():
+        raise _LoxError(f"{what} must be an integer.", None)
+    return int(value)
+
+def _size(value):
+    value = _integer(value, "Size")
+    if value < 0:
+        raise _LoxError("Size must not be negative.", None)
+    return value
+
+class _NumArray(_LoxInstance):
+    __slots__ = ("values",)
+
+    def __init__(self, values):
+        self.klass = _NUMARRAY_CLASS
+        self.fields = {}
+        self.values = values
+
+    def __str__(self):
+        return f"[{', '.join(map(_to_string, self.values))}]"
+
+_OPERATORS = {"add": operator.add, "sub": operator.sub, "mul": operator.mul, "div": operator.truediv}
+
+def _combine(name, self, other):
+    if type(other) is _NumArray:
+        if len(other.values) != len(self.values):
+            raise _LoxError("NumArrays must have the same length.", None)
+        if name == "div" and 0.0 in other.values:
+            raise _LoxError("Division by zero.", None)
+        other = other.values
+    else:
+        if _number(other) == 0 and name == "div":
+            raise _LoxError("Division by zero.", None)
+        other = repeat(other, len(self.values))
+    return _NumArray(array("d", map(_OPERATORS[name], self.values, other)))
+
+def _reduce(function, self):
+    if not self.values:
+        raise _LoxError("NumArray is empty.", None)
+    return float(function(self.values))
+
+def _dot(self, other):
+    if type(other) is not _NumArray:
+        raise _LoxError("Operand must be a NumArray.", None)
+    if len(other.values) != len(self.values):
+        raise _LoxError("NumArrays must have the same length.", None)
+    return float(sum(map(operator.mul, self.values, other.values)))
+
+def _numarray_set(self, i, value):
+    self.values[_position(i, len(self.values))] = _number(value)
+    return value
+
+def _numarray_slice(self, start, end):
+    start = _position(start, len(self.values), True)
+    end = _position(end, len(self.values), True)
+    return _NumArray(self.values[start:max(start, end)])
+
+def _numarray_sort(self):  # Sorts in place and returns the array, so calls chain
+    self.values[:] = array("d", sorted(self.values))
+    return self
+
+_NUMARRAY_CLASS = _LoxClass("NumArray", None, {
+    "len": _Native("len", 0, lambda self: float(len(self.values))),
+    "get": _Native("get", 1, lambda self, i: self.values[_position(i, len(self.values))]),
+    "set": _Native("set", 2, _numarray_set),
+    "add": _Native("add", 1, lambda self, other: _combine("add", self, other)),
+    "sub": _Native("sub", 1, lambda self, other: _combine("sub", self, other)),
+    "mul": _Native("mul", 1, lambda self, other: _combine("mul", self, other)),
+    "div": _Native("div", 1, lambda self, other: _combine("div", self, other)),
+    "sum": _Native("sum", 0, lambda self: _reduce(sum, self)),
+    "min": _Native("min", 0, lambda self: _reduce(min, self)),
+    "max": _Native("max", 0, lambda self: _reduce(max, self)),
+    "dot": _Native("dot", 1, _dot),
+    "slice": _Native("slice", 2, _numarray_slice),
+    "sort": _Native("sort", 0, _numarray_sort),
+    "copy": _Native("copy", 0, lambda self: _NumArray(self.values[:])),
+})
+
+def _numarray_range(start, end):  # start, start + 1, ... up to but not including end
+    start, end = _integer(start, "Bound"), _integer(end, "Bound")
+    return _NumArray(array("d", map(float, range(start, max(start, end)))))
+
+class _NumArrayType(_LoxInstance):  # The global NumArray: NumArray(n) makes n zeros; constructors are fields
+    __slots__ = ()
+    arity = 1
+
+    def __init__(self):
+        self.klass = _NUMARRAY_CLASS
+        self.fields = {
+            "filled": _Native("filled", 2, lambda length, value: _NumArray(array("d", [_number(value)]) * _size(length))),
+            "range": _Native("range", 2, _numarray_range),
+        }
+
+    def __call__(self, length):
+        return _NumArray(array("d", bytes(8 * _size(length))))
+
+    def __str__(self):
+        return "NumArray"
+
+v_NumArray = _NumArrayType()
+
+def _get_item(container, subscript, line):
+    try:
+        kind = type(container)
+        if kind is _List:
+            return container.values[_position(subscript, len(container.values))]
+        if kind is _Map:
+            return container.entries.get(_key(subscript))
+        if kind is str:
+            return container[_position(subscript, len(container))]
+        if kind is _NumArray:
+            return container.values[_position(subscript, len(container.values))]
+    except _LoxError as error:
+        raise _LoxError(error.message, line)
+    raise _LoxError("Only lists, maps, strings and NumArrays can be indexed.", line)
+
+def _set_item(container, subscript, value, line):
+    try:
+        kind = type(container)
+        if kind is _List:
+            container.values[_position(subscript, len(container.values))] = value
+            return value
+        if kind is _Map:
+            container.entries[_key(subscript)] = value
+            return value
+        if kind is _NumArray:
+            return _numarray_set(container, subscript, value)
+    except _LoxError as error:
+        raise _LoxError(error.message, line)
+    raise _LoxError("Only lists, maps and NumArrays can be assigned by index.", line)
+
+def _source_line(traceback, lines):  # Map the innermost generated line back to its Lox line
+    line = 0
+    while traceback is not None:
+        if traceback.tb_frame.f_code.co_filename == __file__ and traceback.tb_lineno < len(lines):
+            line = lines[traceback.tb_lineno] or line
+        traceback = traceback.tb_next
+    return line
+
+def _run(main, lines):  # Run the program; returns the process exit status
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), 10000))
+    try:
+        main()
+    except _LoxError as error:
+        print(f"Runtime error: {error.message}")
+        line = error.line if error.line is not None else _source_line(error.__traceback__, lines)
+        print(f"[line {line}]", file=sys.stderr)
+        return 70
+    except NameError as error:
+        name = error.name[2:] if getattr(error, "name", "") else str(error)
+        print(f"Runtime error: Undefined variable '{name}'.")
+        print(f"[line {_source_line(error.__traceback__, lines)}]", file=sys.stderr)
+        return 70
+    except RecursionError as error:
+        print("Runtime error: Stack overflow.")
+        print(f"[line {_source_line(error.__traceback__, lines)}]", file=sys.stderr)
+        return 70
+    return 0
@@ -0,0 +1,464 @@
+from src.core.chunk import OpCode
+from src.core.compiler import Compiler
+from src.core.containers import LoxList, build_map, get_item, set_item
+from src.core.interpreter import Interpreter, RuntimeError, StackOverflow, NativeError, LoxCallable, LoxClass, LoxInstance
+from src.core.modules import import_module
+from src.core.rope import STRINGS, concat
+from src.core.token1 import Token
+
+FRAMES_MAX = 100000  # Default deepest Lox call stack before "Stack overflow."; frames live in a list, not on the Python stack
+
+# Plain ints so the dispatch loop compares against cheap module globals
+CONSTANT = OpCode.CONSTANT.value
+NIL = OpCode.NIL.value
+TRUE = OpCode.TRUE.value
+FALSE = OpCode.FALSE.value
+POP = OpCode.POP.value
+POPN = OpCode.POPN.value
+GET_LOCAL = OpCode.GET_LOCAL.value
+SET_LOCAL = OpCode.SET_LOCAL.value
+GET_CELL = OpCode.GET_CELL.value
+SET_CELL = OpCode.SET_CELL.value
+BOX = OpCode.BOX.value
+GET_UPVALUE = OpCode.GET_UPVALUE.value
+SET_UPVALUE = OpCode.SET_UPVALUE.value
+GET_GLOBAL = OpCode.GET_GLOBAL.value
+DEFINE_GLOBAL = OpCode.DEFINE_GLOBAL.value
+SET_GLOBAL = OpCode.SET_GLOBAL.value
+GET_PROPERTY = OpCode.GET_PROPERTY.value
+SET_PROPERTY = OpCode.SET_PROPERTY.value
+CHECK_INSTANCE = OpCode.CHECK_INSTANCE.value
+GET_SUPER = OpCode.GET_SUPER.value
+EQUAL = OpCode.EQUAL.value
+NOT_EQUAL = OpCode.NOT_EQUAL.value
+GREATER = OpCode.GREATER.value
+GREATER_EQUAL = OpCode.GREATER_EQUAL.value
+LESS = OpCode.LESS.value
+LESS_EQUAL = OpCode.LESS_EQUAL.value
+ADD = OpCode.ADD.value
+SUBTRACT = OpCode.SUBTRACT.value
+MULTIPLY = OpCode.MULTIPLY.value
+DIVIDE = OpCode.DIVIDE.value
+NOT = OpCode.NOT.value
+NEGATE = OpCode.NEGATE.value
+PRINT = OpCode.PRINT.value
+JUMP = OpCode.JUMP.value
+JUMP_IF_FALSE = OpCode.JUMP_IF_FALSE.value
+CALL = OpCode.CALL.value
+INVOKE = OpCode.INVOKE.value
+SUPER_INVOKE = OpCode.SUPER_INVOKE.value
+CLOSURE = OpCode.CLOSURE.value
+RETURN = OpCode.RETURN.value
+CLASS = OpCode.CLASS.value
+INHERIT = OpCode.INHERIT.value
+METHOD = OpCode.METHOD.value
+BUILD_LIST = OpCode.BUILD_LIST.value
+BUILD_MAP = OpCode.BUILD_MAP.value
+GET_INDEX = OpCode.GET_INDEX.value
+SET_INDEX = OpCode.SET_INDEX.value
+IMPORT = OpCode.IMPORT.value
+LOOP = OpCode.LOOP.value
+
+class Cell:  # Box for a local variable captured by a closure
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+class Closure:  # Runtime function value: compiled code plus captured cells
+    __slots__ = ("function", "upvalues")
+
+    def __init__(self, function, upvalues):
+        self.function = function
+        self.upvalues = upvalues
+
+    def __str__(self):
+        return f"<fn {self.function.name}>"
+
+class BoundMethod:  # Method closure paired with its receiver
+    __slots__ = ("receiver", "method")
+
+    def __init__(self, receiver, method):
+        self.receiver = receiver
+        self.method = method
+
+    def __str__(self):
+        return str(self.method)
+
+class VM(Interpreter):  # Bytecode backend: compiles the resolved AST and runs it on a stack machine
+    stack_limit = FRAMES_MAX
+
+    def interpret(self, statements):
+        try:
+            self.execute_module(statements)
+        except RuntimeError as error:
+            self.report_runtime_error(error)
+
+    def prepare_module(self, statements):
+        function = Compiler(self.locals, self.globals.values).compile(statements)
+        return lambda: self.run(Closure(function, []))
+
+    def error(self, frame_closure, ip, message):  # Runtime error located by the line table
+        line = frame_closure.function.chunk.lines[ip]
+        return RuntimeError(Token(None, "", None, line), message)
+
+    def run(self, closure):
+        stack = [closure]
+        push = stack.append
+        pop = stack.pop
+        frames = []
+        frames_max = self.stack_limit
+        globals = closure.function.globals  # Switched on every call and return: each function uses its module's globals
+        is_truthy = self.is_truthy
+        code = closure.function.chunk.code
+        constants = closure.function.chunk.constants
+        upvalues = closure.upvalues
+        ip = 0
+        base = 0
+        fuel = self.fuel  # Steps until the next budget check; kept local and stored back before other code runs
+
+        while True:
+            op = code[ip]
+
+            if op == GET_LOCAL:
+                push(stack[base + code[ip + 1]])
+                ip += 2
+            elif op == CONSTANT:
+                push(constants[code[ip + 1]])
+                ip += 2
+            elif op == GET_GLOBAL:
+                name = constants[code[ip + 1]]
+                if name not in globals:
+                    raise self.error(closure, ip, f"Undefined variable '{name}'.")
+                push(globals[name])
+                ip += 2
+            elif op == GET_PROPERTY:
+                instance = stack[-1]
+                if not isinstance(instance, LoxInstance):
+                    raise self.error(closure, ip, "Only instances have properties.")
+                name = constants[code[ip + 1]]
+                fields = instance.fields
+                if name in fields:
+                    stack[-1] = fields[name]
+                else:
+                    method = instance.klass.methods.get(name)
+                    if method is None:
+                        raise self.error(closure, ip, f"Undefined property '{name}'.")
+                    stack[-1] = BoundMethod(instance, method)
+                    self.allocated += 1
+                ip += 2
+            elif op == JUMP_IF_FALSE:
+                if is_truthy(pop()):
+                    ip += 2
+                else:
+                    ip = code[ip + 1]
+            elif op == ADD:
+                right = pop()
+                left = stack[-1]
+                if type(left) is float and type(right) is float:
+                    stack[-1] = left + right
+                elif isinstance(left, STRINGS) or isinstance(right, STRINGS):
+                    stack[-1] = concat(left, right)
+                else:
+                    raise self.error(closure, ip, "Operands must be two numbers or two strings.")
+                ip += 1
+            elif op == SUBTRACT:
+                right = pop()
+                left = stack[-1]
+                if type(left) is not float or type(right) is not float:
+                    raise self.error(closure, ip, "Operands must be numbers.")
+                stack[-1] = left - right
+                ip += 1
+            elif op == LESS:
+                right = pop()
+                left = stack[-1]
+                if type(left) is not float or type(right) is not float:
+                    raise self.error(closure, ip, "Operands must be numbers.")
+                stack[-1] = left < right
+                ip += 1
+            elif op == CALL or op == INVOKE or op == SUPER_INVOKE:
+                if op == CALL:
+                    argc = code[ip + 1]
+                    callee = stack[-1 - argc]
+                    next_ip = ip + 2
+                elif op == INVOKE:
+                    argc = code[ip + 2]
+                    receiver = stack[-1 - argc]
+                    if not isinstance(receiver, LoxInstance):
+                        raise self.error(closure, ip, "Only instances have properties.")
+                    name = constants[code[ip + 1]]
+                    if name in receiver.fields:
+                        callee = receiver.fields[name]
+                        stack[-1 - argc] = callee
+                    else:
+                        callee = receiver.klass.methods.get(name)
+                        if callee is None:
+                            raise self.error(closure, ip, f"Undefined property '{name}'.")
+                    next_ip = ip + 3
+                else:
+                    argc = code[ip + 2]
+                    superclass = pop()
+                    name = constants[code[ip + 1]]
+                    callee = superclass.methods.get(name)
+                    if callee is None:
+                        raise self.error(closure, ip, f"Undefined property '{name}'.")
+                    next_ip = ip + 3
+
+                if type(callee) is BoundMethod:
+                    stack[-1 - argc] = callee.receiver
+                    callee = callee.method
+                elif type(callee) is LoxClass:
+                    stack[-1 - argc] = LoxInstance(callee)
+                    self.allocated += 1
+                    initializer = callee.methods.get("init")
+                    if initializer is None:
+                        if argc != 0:
+                            raise self.error(closure, ip, f"Expected 0 arguments but got {argc}.")
+                        ip = next_ip
+                        if argc:
+                            del stack[-argc:]
+                        continue
+                    callee = initializer
+
+                if type(callee) is Closure:
+                    function = callee.function
+                    if argc != function.arity:
+                        raise self.error(closure, ip, f"Expected {function.arity} arguments but got {argc}.")
+                    fuel -= 1
+                    if not fuel:
+                        fuel = self.refuel(closure.function.chunk.lines[ip])
+                    if code[next_ip] == RETURN and frames:  # Tail call: the callee takes over this frame
+                        del stack[base:len(stack) - argc - 1]
+                    else:
+                        if len(frames) == frames_max:
+                            raise StackOverflow(closure.function.chunk.lines[ip])
+                        frames.append((closure, next_ip, base))
+                        base = len(stack) - argc - 1
+                    closure = callee
+                    code = function.chunk.code
+                    constants = function.chunk.constants
+                    globals = function.globals
+                    upvalues = callee.upvalues
+                    ip = 0
+                elif isinstance(callee, LoxCallable):
+                    if argc != callee.arity():
+                        raise self.error(closure, ip, f"Expected {callee.arity()} arguments but got {argc}.")
+                    arguments = stack[len(stack) - argc:]
+                    try:
+                        result = callee.call(self, arguments)
+                    except NativeError as error:  # A native function failed: locate it at this call
+                        raise self.error(closure, ip, str(error))
+                    del stack[len(stack) - argc - 1:]
+                    push(result)
+                    ip = next_ip
+                else:
+                    raise self.error(closure, ip, "Can only call functions and classes.")
+            elif op == RETURN:
+                result = pop()
+                if not frames:
+                    self.fuel = fuel
+                    return result
+                del stack[base:]
+                push(result)
+                closure, ip, base = frames.pop()
+                function = closure.function
+                code = function.chunk.code
+                constants = function.chunk.constants
+                globals = function.globals
+                upvalues = closure.upvalues
+            elif op == POP:
+                pop()
+                ip += 1
+            elif op == SET_LOCAL:
+                stack[base + code[ip + 1]] = stack[-1]
+                ip += 2
+            elif op == GET_CELL:
+                push(stack[base + code[ip + 1]].value)
+                ip += 2
+            elif op == GET_UPVALUE:
+                push(upvalues[code[ip + 1]].value)
+                ip += 2
+            elif op == LOOP:
+                fuel -= 1
+                if not fuel:
+                    fuel = self.refuel(closure.function.chunk.lines[ip])
+                ip = code[ip + 1]
+            elif op == JUMP:
+                ip = code[ip + 1]
+            elif op == NIL:
+                push(None)
+                ip += 1
+            elif op == TRUE:
+                push(True)
+                ip += 1
+            elif op == FALSE:
+                push(False)
+                ip += 1
+            elif op == MULTIPLY:
+                right = pop()
+                left = stack[-1]
+                if type(left) is not float or type(right) is not float:
+                    raise self.error(closure, ip, "Operands must be numbers.")
+                stack[-1] = left * right
+                ip += 1
+            elif op == DIVIDE:
+                right = pop()
+                left = stack[-1]
+                if type(left) is not float or type(right) is not float:
+                    raise self.error(closure, ip, "Operands must be numbers.")
+                if right == 0:
+                    raise self.error(closure, ip, "Division by zero.")
+                stack[-1] = left / right
+                ip += 1
+            elif op == GREATER:
+                right = pop()
+                left = stack[-1]
+                if type(left) is not float or type(right) is not float:
+                    raise self.error(closure, ip, "Operands must be numbers.")
+                stack[-1] = left > right
+                ip += 1
+            elif op == GREATER_EQUAL:
+                right = pop()
+                left = stack[-1]
+                if type(left) is not float or type(right) is not float:
+                    raise self.error(closure, ip, "Operands must be numbers.")
+                stack[-1] = left >= right
+                ip += 1
+            elif op == LESS_EQUAL:
+                right = pop()
+                left = stack[-1]
+                if type(left) is not float or type(right) is not float:
+                    raise self.error(closure, ip, "Operands must be numbers.")
+                stack[-1] = left <= right
+                ip += 1
+            elif op == EQUAL:
+                right = pop()
+                stack[-1] = stack[-1] == right
+                ip += 1
+            elif op == NOT_EQUAL:
+                right = pop()
+                stack[-1] = not stack[-1] == right
+                ip += 1
+            elif op == NOT:
+                stack[-1] = not is_truthy(stack[-1])
+                ip += 1
+            elif op == GET_INDEX:
+                subscript = pop()
+                try:
+                    stack[-1] = get_item(stack[-1], subscript)
+                except NativeError as error:
+                    raise self.error(closure, ip, str(error))
+                ip += 1
+            elif op == SET_INDEX:
+                value = pop()
+                subscript = pop()
+                try:
+                    stack[-1] = set_item(stack[-1], subscript, value)
+                except NativeError as error:
+                    raise self.error(closure, ip, str(error))
+                ip += 1
+            elif op == NEGATE:
+                if type(stack[-1]) is not float:
+                    raise self.error(closure, ip, "Operand must be a number.")
+                stack[-1] = -stack[-1]
+                ip += 1
+            elif op == SET_PROPERTY:
+                value = pop()
+                instance = stack[-1]
+                if not isinstance(instance, LoxInstance):
+                    raise self.error(closure, ip, "Only instances have fields.")
+                instance.fields[constants[code[ip + 1]]] = value
+                stack[-1] = value
+                ip += 2
+            elif op == CHECK_INSTANCE:
+                if not isinstance(stack[-1], LoxInstance):
+                    raise self.error(closure, ip, "Only instances have fields.")
+                ip += 1
+            elif op == SET_CELL:
+                stack[base + code[ip + 1]].value = stack[-1]
+                ip += 2
+            elif op == SET_UPVALUE:
+                upvalues[code[ip + 1]].value = stack[-1]
+                ip += 2
+            elif op == SET_GLOBAL:
+                name = constants[code[ip + 1]]
+                if name not in globals:
+                    raise self.error(closure, ip, f"Undefined variable '{name}'.")
+                globals[name] = stack[-1]
+                ip += 2
+            elif op == DEFINE_GLOBAL:
+                globals[constants[code[ip + 1]]] = pop()
+                ip += 2
+            elif op == POPN:
+                del stack[len(stack) - code[ip + 1]:]
+                ip += 2
+            elif op == BOX:
+                slot = base + code[ip + 1]
+                stack[slot] = Cell(stack[slot])
+                ip += 2
+            elif op == PRINT:
+                print(self.to_string(pop()), file=self.output)
+                ip += 1
+            elif op == BUILD_LIST:
+                count = code[ip + 1]
+                if count:
+                    values = stack[-count:]
+                    del stack[-count:]
+                else:
+                    values = []
+                push(LoxList(values))
+                self.allocated += 1
+                ip += 2
+            elif op == BUILD_MAP:
+                count = 2 * code[ip + 1]
+                if count:
+                    items = stack[-count:]
+                    del stack[-count:]
+                else:
+                    items = ()
+                push(build_map(items))
+                self.allocated += 1
+                ip += 2
+            elif op == CLOSURE:
+                function = constants[code[ip + 1]]
+                ip += 2
+                cells = []
+                for _ in range(function.upvalue_count):
+                    if code[ip]:
+                        cells.append(stack[base + code[ip + 1]])
+                    else:
+                        cells.append(upvalues[code[ip + 1]])
+                    ip += 2
+                push(Closure(function, cells))
+                self.allocated += 1
+            elif op == GET_SUPER:
+                superclass = pop()
+                name = constants[code[ip + 1]]
+                method = superclass.methods.get(name)
+                if method is None:
+                    raise self.error(closure, ip, f"Undefined property '{name}'.")
+                stack[-1] = BoundMethod(stack[-1], method)
+                self.allocated += 1
+                ip += 2
+            elif op == IMPORT:
+                self.fuel = fuel  # The module runs in a nested run() that counts against the same budget
+                import_module(self, constants[code[ip + 1]])
+                fuel = self.fuel
+                ip += 2
+            elif op == CLASS:
+                push(LoxClass(constants[code[ip + 1]], None, {}))
+                ip += 2
+            elif op == INHERIT:
+                superclass = pop()
+                if not isinstance(superclass, LoxClass):
+                    raise self.error(closure, ip, "Superclass must be a class.")
+                klass = stack[-1]
+                klass.superclass = superclass
+                klass.methods.update(superclass.methods)  # Copy down so lookups never walk the chain
+                ip += 1
+            elif op == METHOD:
+                method = pop()
+                stack[-1].methods[constants[code[ip + 1]]] = method
+                ip += 2
+            else:
+                raise self.error(closure, ip, f"Unknown opcode {op}.")
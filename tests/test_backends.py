@@ -0,0 +1,35 @@
+import glob
+import os
+
+import pytest
+
+from tests.test_compile import ROOT, compiled, lox
+
+SCRIPTS = sorted(glob.glob(os.path.join(ROOT, "tests", "*.lox")))
+
+@pytest.fixture(scope="module")
+def expected():  # (stdout, status) of each script on the tree-walker, run once
+    results = {}
+    def run(script):
+        if script not in results:
+            stdout, _, status = lox("--no-cache", script)
+            results[script] = stdout, status
+        return results[script]
+    return run
+
+@pytest.mark.parametrize("flag", ["--vm", "--closures"])
+@pytest.mark.parametrize("script", SCRIPTS, ids=os.path.basename)
+def test_backend_matches_the_tree_walker(expected, script, flag):
+    stdout, _, status = lox("--no-cache", flag, script)
+    assert (stdout, status) == expected(script)
+
+@pytest.mark.parametrize("script", SCRIPTS, ids=os.path.basename)
+def test_compiled_module_matches_the_tree_walker(expected, tmp_path, script):
+    with open(script, encoding="utf-8") as f:
+        imports = any(line.startswith("import ") for line in f)
+    if imports:  # A compiled module has no interpreter to load Lox files with
+        _, stderr, status = lox("compile", script, "-o", str(tmp_path / "script.py"))
+        assert status == 65 and "Can't import in a compiled module." in stderr
+        return
+    stdout, _, status = compiled(script, tmp_path / "script.py")
+    assert (stdout, status) == expected(script)
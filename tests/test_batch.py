@@ -0,0 +1,44 @@
+import gc
+import io
+import json
+
+import pytest
+
+from src.core.batch import main, run_many
+
+def run(tmp_path, sources, flags=()):  # Report records and failure count of running each source as a script
+    scripts = []
+    for name, source in sources.items():
+        path = tmp_path / name
+        path.write_text(source)
+        scripts.append(str(path))
+    report = io.StringIO()
+    count, failed = run_many(scripts, flags, workers=1, report=report)
+    assert count == len(sources)
+    return [json.loads(line) for line in report.getvalue().splitlines()], failed
+
+def test_runtime_error_records_status_70(tmp_path):
+    records, failed = run(tmp_path, {"ok.lox": "print 1;", "bad.lox": 'print "a";\nprint nil - 1;'})
+    assert [record["status"] for record in records] == [0, 70]
+    assert records[1]["stdout"] == "a\nRuntime error: Operands must be numbers.\n"
+    assert records[1]["stderr"] == "[line 2]\n"
+    assert failed == 1
+
+def test_budget_exceeded_records_status_70(tmp_path):
+    records, failed = run(tmp_path, {"loop.lox": "while (true) {}"}, ["--vm", "--max-steps", "100"])
+    assert records[0]["status"] == 70
+    assert failed == 1
+
+def test_flag_values_are_passed_on(tmp_path, capsys):
+    script, report = tmp_path / "deep.lox", tmp_path / "report.jsonl"
+    script.write_text("fun f(n) { return f(n + 1); }\nf(0);")
+    with pytest.raises(SystemExit):
+        main(["--workers", "1", "--report", str(report), "--stack-limit", "50", str(script)])
+    record = json.loads(report.read_text())
+    assert record["script"] == str(script)  # "50" went to --stack-limit, not into the scripts
+    assert "Stack overflow." in record["stdout"] and record["stderr"] == "[line 1]\n"
+    assert capsys.readouterr().err.startswith("run-many: 1 scripts, 1 failed")
+
+def test_callers_heap_is_not_left_frozen(tmp_path):
+    run(tmp_path, {"ok.lox": "print 1;"})
+    assert gc.get_freeze_count() == 0
@@ -0,0 +1,33 @@
+import pytest
+
+from src.core.closure_compiler import ClosureInterpreter
+from src.core.interpreter import Budget, Interpreter
+from src.core.runtime import LoxRuntime
+from src.core.vm import VM
+
+BACKENDS = [Interpreter, VM, ClosureInterpreter]
+
+LOOP = "var i = 0;\nwhile (i < 5000) {\n  %s\n  i = i + 1;\n}\nprint i;"  # Allocates once per iteration
+
+@pytest.mark.parametrize("backend", BACKENDS)
+@pytest.mark.parametrize("allocation", [
+    "class A {} var a = A();",
+    "var xs = [i];",
+    "var m = {1: i};",
+    "var xs = [1, 2].copy();",
+    "var ks = {1: 2}.keys();",
+    "var a = NumArray(3);",
+    "var a = NumArray.filled(3, 1).add(NumArray.range(0, 3));",
+])
+def test_allocation_limit(backend, allocation):
+    runtime = LoxRuntime(backend)
+    result = runtime.run(LOOP % allocation, Budget(allocations=1000))
+    assert result.status == 70
+    assert str(result.diagnostics[0]) == "[line 2] Allocation limit of 1000 exceeded."
+    assert runtime.run(LOOP % allocation, Budget(allocations=20000)).output == "5000\n"
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_step_limit(backend):
+    result = LoxRuntime(backend).run(LOOP % "", Budget(steps=100))
+    assert result.status == 70
+    assert str(result.diagnostics[0]) == "[line 2] Step limit of 100 exceeded."
@@ -0,0 +1,32 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def lox(*args):  # (stdout, stderr, status) of running the lox command
+    command = subprocess.run([sys.executable, "-m", "src.core.lox", *args], capture_output=True, text=True, cwd=ROOT)
+    return command.stdout, command.stderr, command.returncode
+
+def compiled(path, output):  # (stdout, stderr, status) of compiling path to output and running the module
+    assert lox("compile", str(path), "-o", str(output))[2] == 0
+    command = subprocess.run([sys.executable, str(output)], capture_output=True, text=True)
+    return command.stdout, command.stderr, command.returncode
+
+@pytest.mark.parametrize("source", [
+    "var a = NumArray.range(0, 5);\nprint a;\nprint a.mul(2).add(a).sum();\na.set(0, 10);\n"
+    "print a.slice(0, 2);\nprint a.sort().max();\nprint a.dot(NumArray.filled(5, 1));",
+    "var a = NumArray(3);\na[1] = 2.5;\nprint a[1] + a.len();\nprint [a.copy(), NumArray.range(3, 1)];\nprint a.div(2);\nprint NumArray;",
+    "var a = NumArray(2);\n\nprint a[2];",
+    "var a = NumArray(2);\n\nprint a.add(NumArray(3));",
+    "print 1;\n\nNumArray(-1);",
+    "print NumArray(0).max();",
+    "print NumArray.range(1, 3).div(NumArray(2));",
+    'NumArray(1).set(0, "x");',
+])
+def test_compiled_numarray_matches_the_tree_walker(tmp_path, source):
+    path = tmp_path / "script.lox"
+    path.write_text(source)
+    assert compiled(path, tmp_path / "script.py") == lox("--no-cache", str(path))
@@ -0,0 +1,66 @@
+import json
+
+import pytest
+
+from src.core.coverage import run_file
+from src.core.lox import Lox
+
+SOURCE = """fun square(n) {
+  return n * n;
+}
+class Shape {
+  area() { return 0; }
+  name() { return "shape"; }
+}
+var i = 0;
+while (i < 3) {
+  i = i + 1;
+}
+if (i > 5) {
+  print "big";
+}
+print square(i) + square(2) + Shape().area();
+"""
+
+def cover(tmp_path, source):  # (JSON report, annotated listing) of running source instrumented
+    path = tmp_path / "script.lox"
+    path.write_text(source)
+    output = str(tmp_path / "out")
+    Lox.reset()
+    try:
+        run_file(str(path), output)
+    finally:
+        Lox.reset()
+    with open(output + ".json", encoding="utf-8") as f:
+        report = json.load(f)
+    with open(output + ".cov", encoding="utf-8") as f:
+        return report, f.read().splitlines()
+
+def test_line_counts(tmp_path, capsys):
+    report, _ = cover(tmp_path, SOURCE)
+    assert capsys.readouterr().out == "13\n"
+    assert report["lines"] == {"1": 1, "2": 2, "4": 1, "5": 1, "6": 0, "8": 1, "9": 4, "10": 3,
+                               "12": 1, "13": 0, "15": 1}
+    assert report["summary"] == {"lines": 11, "covered": 9}
+
+def test_lines_that_never_ran_are_marked(tmp_path):
+    _, listing = cover(tmp_path, SOURCE)
+    assert listing[5] == '    #####:    6:   name() { return "shape"; }'
+    assert listing[12] == '    #####:   13:   print "big";'
+    assert listing[2] == "        -:    3: }"  # No code
+    assert listing[9] == "        3:   10:   i = i + 1;"
+
+def test_function_calls(tmp_path):
+    report, _ = cover(tmp_path, SOURCE)
+    assert report["functions"] == [
+        {"name": "square", "line": 1, "calls": 2},
+        {"name": "area", "line": 5, "calls": 1},
+        {"name": "name", "line": 6, "calls": 0},  # A method never called
+    ]
+
+def test_report_is_written_after_a_runtime_error(tmp_path):
+    with pytest.raises(SystemExit) as exit:
+        cover(tmp_path, 'print "a";\nprint nil - 1;\nprint "b";')
+    assert exit.value.code == 70
+    with open(tmp_path / "out.json", encoding="utf-8") as f:
+        assert json.load(f)["lines"] == {"1": 1, "2": 1, "3": 0}
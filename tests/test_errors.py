@@ -0,0 +1,60 @@
+import pytest
+
+from src.core.closure_compiler import ClosureInterpreter
+from src.core.interpreter import Interpreter
+from src.core.runtime import LoxRuntime
+from src.core.vm import VM
+from tests.test_compile import lox
+
+BACKENDS = [Interpreter, VM, ClosureInterpreter]
+
+def runtime_error(backend, source):  # The runtime diagnostic of running source, as "[line N] message"
+    result = LoxRuntime(backend).run(source)
+    assert result.status == 70
+    return str(result.diagnostics[0])
+
+@pytest.mark.parametrize("backend", BACKENDS)
+@pytest.mark.parametrize("source, expected", [
+    ("var xs = [1, 2];\nprint\n  xs[7];", "[line 3] Index out of range."),
+    ("var xs = [1, 2];\n\nxs[0.5] = 1;", "[line 3] Index must be an integer."),
+    ("var s = 3;\n\nprint s[0];", "[line 3] Only lists, maps, strings and NumArrays can be indexed."),
+    ("var n = 3;\n\nn[0] = 1;", "[line 3] Only lists, maps and NumArrays can be assigned by index."),
+    ("var a = NumArray(2);\n\nprint a[2];", "[line 3] Index out of range."),
+])
+def test_subscript_errors_report_the_bracket_line(backend, source, expected):
+    assert runtime_error(backend, source) == expected
+
+@pytest.mark.parametrize("backend", BACKENDS)
+@pytest.mark.parametrize("source, expected", [
+    ("var a = NumArray(3);\nprint\n  a.get(7);", "[line 3] Index out of range."),
+    ("var xs = [];\n\nxs.pop();", "[line 3] List is empty."),
+    ("var f = [].pop;\n\nf();", "[line 3] List is empty."),
+    ("print 1;\n\nNumArray(-1);", "[line 3] Size must not be negative."),
+    ("var a = NumArray(2);\n\nprint a.add(NumArray(3));", "[line 3] NumArrays must have the same length."),
+])
+def test_native_errors_report_the_call_line(backend, source, expected):
+    assert runtime_error(backend, source) == expected
+
+DEEP = "fun f(n) {\n  if (n == 0) return 0;\n  return 1 + f(n - 1);\n}\nprint f(200000);"
+TAIL = 'fun loop(n) {\n  if (n == 0) return "done";\n  return loop(n - 1);\n}\nprint loop(200000);'
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_deep_recursion_overflows_at_the_call(backend):
+    assert runtime_error(backend, DEEP) == "[line 3] Stack overflow."
+
+def test_tail_calls_reuse_the_frame():  # Only the VM claims this; the other backends recurse in Python
+    runtime = LoxRuntime(VM)
+    runtime.interpreter.stack_limit = 50
+    result = runtime.run(TAIL)
+    assert (result.status, result.output) == (0, "done\n")
+
+@pytest.mark.parametrize("depth, status", [(40, 0), (60, 70)])
+def test_stack_limit_flag(tmp_path, depth, status):
+    path = tmp_path / "deep.lox"
+    path.write_text(DEEP.replace("200000", str(depth)))
+    stdout, stderr, returncode = lox("--no-cache", "--vm", "--stack-limit", "50", str(path))
+    assert returncode == status
+    if status:
+        assert (stdout, stderr) == ("Runtime error: Stack overflow.\n", "[line 3]\n")
+    else:
+        assert stdout == f"{depth}\n"
@@ -0,0 +1,95 @@
+import os
+import pickle
+from array import array
+
+import pytest
+
+from src.core import image, numarray
+from src.core.closure_compiler import ClosureInterpreter
+from src.core.interpreter import Interpreter
+from src.core.lox import Lox
+from src.core.vm import VM
+
+def write_image(path, payload, backend="Interpreter"):  # An image file with a valid header around payload
+    with open(path, "wb") as f:
+        f.write(f"{image.MAGIC} {backend}\n".encode())
+        f.write(pickle.dumps(({}, {}, []), pickle.HIGHEST_PROTOCOL))
+        f.write(payload)
+
+def test_image_round_trip(tmp_path):
+    Lox.reset(Interpreter())
+    Lox.use_cache = False
+    Lox.run("var xs = [1, 2]; var push = xs.push; fun twice(n) { return n * 2; }")
+    path = str(tmp_path / "prelude.img")
+    image.save(Lox.interpreter, path)
+
+    interpreter = Interpreter()
+    image.load(interpreter, path)
+    interpreter.globals.values["push"].call(interpreter, [3.0])
+    assert str(interpreter.globals.values["xs"]) == "[1, 2, 3]"
+    assert interpreter.globals.values["twice"].call(interpreter, [4.0]) == 8.0
+
+@pytest.mark.parametrize("module, name", [
+    ("src.core.image", "os.system"),  # A dotted name reaches any module the allowed one imports
+    ("os", "system"),
+    ("src.core.image", "save"),       # Inside src, but not something images contain
+])
+def test_hostile_image_is_rejected(tmp_path, module, name):
+    marker = tmp_path / "ran"
+    payload = f"c{module}\n{name}\n(Vtouch {marker}\ntR.".encode()  # Protocol 0: module.name("touch ...")
+    path = str(tmp_path / "hostile.img")
+    write_image(path, payload)
+    with pytest.raises(image.ImageError, match="is not allowed in an image"):
+        image.load(Interpreter(), path)
+    assert not os.path.exists(marker)
+
+@pytest.mark.parametrize("source, name, damaged", [
+    ("class A { f() {} } var a = A(); a.f();", b"megamorphic", b"megamorphiX"),  # An InlineCache slot that does not exist
+    ("var xs = [1, 2]; var push = xs.push;", b"push", b"pusX"),                    # A List method that does not exist
+])
+def test_damaged_image_is_rejected(tmp_path, source, name, damaged):
+    Lox.reset(Interpreter())
+    Lox.use_cache = False
+    Lox.run(source)
+    path = tmp_path / "prelude.img"
+    image.save(Lox.interpreter, str(path))
+    contents = path.read_bytes()
+    assert name in contents
+    path.write_bytes(contents.replace(name, damaged))
+    with pytest.raises(image.ImageError, match="Cannot load image .*: the file is damaged"):
+        image.load(Interpreter(), str(path))
+
+@pytest.mark.parametrize("backend", [Interpreter, VM, ClosureInterpreter])
+def test_numarray_round_trip(tmp_path, backend):
+    Lox.reset(backend())
+    Lox.use_cache = False
+    Lox.run("var a = NumArray.range(0, 3); a.tag = a; var b = a.mul(2);")
+    path = str(tmp_path / "prelude.img")
+    image.save(Lox.interpreter, path)
+
+    interpreter = backend()
+    image.load(interpreter, path)
+    values = interpreter.globals.values
+    assert str(values["b"]) == "[0, 2, 4]"
+    assert values["a"].fields["tag"] is values["a"]
+    assert values["a"].fields["sum"].call(interpreter, []) == 3.0
+
+class ListBackend(numarray.PackedBackend):  # Storage that is not an array('d'), as with NumPy
+    from_array = staticmethod(list)
+
+def test_numarray_is_saved_as_an_array_whatever_the_backend(tmp_path, monkeypatch):
+    monkeypatch.setattr(numarray, "_backend", ListBackend)
+    Lox.reset(Interpreter())
+    Lox.use_cache = False
+    Lox.run("var a = NumArray(0); var b = NumArray.filled(2, 1.5);")
+    Lox.interpreter.globals.values["a"].values = [1.0, 2.0]
+    path = str(tmp_path / "prelude.img")
+    image.save(Lox.interpreter, path)
+
+    monkeypatch.setattr(numarray, "_backend", numarray.PackedBackend)
+    interpreter = Interpreter()
+    image.load(interpreter, path)
+    assert interpreter.globals.values["a"].values == array("d", [1.0, 2.0])
+    monkeypatch.setattr(numarray, "_backend", ListBackend)
+    image.load(interpreter, path)
+    assert interpreter.globals.values["b"].values == [1.5, 1.5]  # Converted to the storage of the backend in use
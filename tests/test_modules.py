@@ -0,0 +1,91 @@
+import os
+
+import pytest
+
+from src.core.closure_compiler import ClosureInterpreter
+from src.core.interpreter import Interpreter
+from src.core.runtime import LoxRuntime
+from src.core.vm import VM
+
+LIBRARY = "class A { f() { return 1; } }\nfun call(a) { return a.f(); }"
+MAIN = 'import "lib.lox";\nprint call(A());'
+
+@pytest.mark.parametrize("backend", [Interpreter, ClosureInterpreter])
+def test_interpreters_keep_their_own_caches_for_a_shared_module(tmp_path, backend):
+    (tmp_path / "lib.lox").write_text(LIBRARY)
+    first, second = (LoxRuntime(backend, directory=str(tmp_path), use_cache=False) for _ in range(2))
+    assert first.run(MAIN).output == "1\n"
+    assert second.run(MAIN).output == "1\n"  # Shares the module's resolved AST with first
+    assert first.run("print call(A());").output == "1\n"
+    stats = first.interpreter.inline_cache_stats()
+    assert (stats["hits"], stats["misses"]) == (1, 1)
+    assert second.interpreter.inline_cache_stats()["misses"] == 1
+
+    second.reset()  # Its classes must not stay reachable from any cache it uses
+    caches = second.interpreter.inline_caches.values()
+    assert all(not cache.entries for cache in caches)
+    assert any(klass.name == "A" for cache in first.interpreter.inline_caches.values() for klass in cache.entries)
+
+def runtime(tmp_path, files, backend=Interpreter):  # A runtime importing relative to tmp_path, where files have been written
+    for name, source in files.items():
+        (tmp_path / name).write_text(source)
+    return LoxRuntime(backend, directory=str(tmp_path), use_cache=False)
+
+SHAPES = """print "loading";
+var made = 0;
+fun square(n) {
+  made = made + 1;
+  return n * n;
+}
+fun count() { return made; }"""
+
+@pytest.mark.parametrize("backend", [Interpreter, VM, ClosureInterpreter])
+def test_module_runs_once_and_keeps_its_own_globals(tmp_path, backend):
+    result = runtime(tmp_path, {"shapes.lox": SHAPES}, backend).run(
+        'import "shapes.lox";\nimport "shapes.lox";\nprint square(3);\nprint square(4);\n'
+        "print count();\nprint made;\nmade = 10;\nprint count();\nprint made;")
+    assert result.status == 0
+    assert result.output.splitlines() == [
+        "loading",  # Once, although imported twice
+        "9", "16",
+        "2",        # The module's made, counted by its own functions
+        "0",        # The importer's copy, taken at import
+        "2",        # Rebinding made in the importer leaves the module's alone
+        "10",
+    ]
+
+@pytest.mark.parametrize("backend", [Interpreter, VM, ClosureInterpreter])
+def test_cyclic_import_is_a_runtime_error(tmp_path, backend):
+    lox = runtime(tmp_path, {"a.lox": 'import "b.lox";', "b.lox": 'print "b";\n\nimport "a.lox";'}, backend)
+    result = lox.run('import "a.lox";')
+    assert result.status == 70
+    assert result.output == "b\n"
+    assert str(result.diagnostics[0]) == "[line 3] Cannot import 'a.lox': it is already being imported."
+    assert lox.run('import "b.lox";').output == "b\n"  # The failed imports left nothing behind
+
+@pytest.mark.parametrize("backend", [Interpreter, VM, ClosureInterpreter])
+def test_missing_module_is_a_runtime_error(tmp_path, backend):
+    result = runtime(tmp_path, {}, backend).run('print 1;\nimport "missing.lox";')
+    assert result.status == 70
+    assert str(result.diagnostics[0]) == "[line 2] Cannot import 'missing.lox': No such file or directory."
+
+@pytest.mark.parametrize("backend", [Interpreter, VM, ClosureInterpreter])
+def test_changed_module_is_imported_again(tmp_path, backend):
+    lox = runtime(tmp_path, {"lib.lox": "fun f() { return 1; }"}, backend)
+    assert lox.run('import "lib.lox";\nprint f();').output == "1\n"
+    path = tmp_path / "lib.lox"
+    mtime = path.stat().st_mtime_ns
+    path.write_text("fun f() { return 2; }")
+    os.utime(path, ns=(mtime + 10**9, mtime + 10**9))  # A later modification time, even on coarse clocks
+    assert lox.run('import "lib.lox";\nprint f();').output == "2\n"
+    assert lox.run('import "lib.lox";\nprint f();').output == "2\n"
+
+def test_compile_errors_name_the_module(tmp_path):
+    lox = runtime(tmp_path, {"lib.lox": "var a = 1;\nprint a +;", "scan.lox": 'var s = "x;'})
+    result = lox.run('print 1;\nimport "lib.lox";')
+    assert [str(diagnostic) for diagnostic in result.diagnostics] == [
+        f"[line 2] Error at ';': Expect expression. (in '{tmp_path / 'lib.lox'}')",
+        "[line 2] Cannot import 'lib.lox': it has compile errors.",
+    ]
+    result = lox.run('import "scan.lox";')
+    assert str(result.diagnostics[0]).startswith("[line 1] Unterminated string. (in '")
@@ -0,0 +1,81 @@
+import pytest
+
+from src.ast.expr import Literal
+from src.ast.stmt import FunctionStmt, PrintStmt
+from src.core.closure_compiler import ClosureInterpreter
+from src.core.interpreter import Interpreter
+from src.core.optimizer import Optimizer
+from src.core.parser import Parser
+from src.core.resolver import Resolver
+from src.core.runtime import LoxRuntime
+from src.core.scanner import Scanner
+from src.core.vm import VM
+from tests.test_compile import lox
+
+def optimize(source):  # (optimized statements, optimizer) for a script that compiles cleanly
+    interpreter = Interpreter()
+    statements = Parser(Scanner(source).iter_tokens()).parse()
+    Resolver(interpreter).resolve(statements)
+    optimizer = Optimizer(interpreter)
+    return optimizer.optimize(statements), optimizer
+
+@pytest.mark.parametrize("source, value", [
+    ("print 60 * 60 * 24;", 86400.0),
+    ("print !true;", False),
+    ('print "a" + "b" + "c";', "abc"),
+    ("print -(2 - 5);", 3.0),
+    ("print 1 < 2 == true;", True),
+])
+def test_constants_are_folded(source, value):
+    statements, _ = optimize(source)
+    expression = statements[0].expression
+    assert type(expression) is Literal and expression.value == value
+
+@pytest.mark.parametrize("source, printed", [
+    ("if (false) print 1;", []),
+    ("if (false) print 1; else print 2;", [2.0]),
+    ("if (1 > 2) print 1; else print 2;", [2.0]),
+    ("if (true) print 1; else print 2;", [1.0]),
+    ("while (false) print 1;", []),
+])
+def test_constant_branches_are_removed(source, printed):
+    statements, _ = optimize(source)
+    assert [stmt.expression.value for stmt in statements if type(stmt) is PrintStmt] == printed
+    assert len(statements) == len(printed)
+
+def test_code_after_return_is_removed():
+    statements, _ = optimize("fun f() {\n  return 1;\n  print 2;\n  print 3;\n}")
+    assert type(statements[0]) is FunctionStmt
+    assert len(statements[0].body) == 1
+
+@pytest.mark.parametrize("source", ["print 1 / 0;", "print -nil;", 'print 1 - "a";'])
+def test_failing_expressions_are_kept(source):
+    statements, _ = optimize(source)
+    assert type(statements[0].expression) is not Literal
+
+@pytest.mark.parametrize("backend", [Interpreter, VM, ClosureInterpreter])
+def test_division_by_zero_fails_at_its_line(backend):
+    result = LoxRuntime(backend).run("print 1;\n\nprint 1 / 0;")
+    assert result.status == 70
+    assert result.output == "1\n"
+    assert str(result.diagnostics[0]) == "[line 3] Division by zero."
+
+def test_opt_stats_reports_each_pass(tmp_path):
+    path = tmp_path / "script.lox"
+    path.write_text("print 60 * 60 * 24;\n"         # Folding: 5 nodes become 1
+                    "if (false) print 1;\n"          # Dead branch: if, literal, print and literal
+                    "fun f() { return 1; print 2; }\n"  # Unreachable: print and literal
+                    "print (1 + x) * (1 + x);")      # (1 + x) repeats once
+    stdout, stderr, status = lox("--no-cache", "--opt-stats", str(path))
+    assert status == 70  # x is undefined, but the stats come first
+    assert stderr.splitlines()[:4] == [
+        "constant folding: 25 -> 21 nodes (-4)",
+        "dead branches: 21 -> 17 nodes (-4)",
+        "unreachable code: 17 -> 15 nodes (-2)",
+        "common subexpressions: 1 repeated",
+    ]
+
+def test_optimizer_records_what_each_pass_removed():
+    _, optimizer = optimize("print 2 * 3;\nif (false) print 1;")
+    assert [(name, before - after) for name, before, after in optimizer.stats] == [
+        ("constant folding", 2), ("dead branches", 4), ("unreachable code", 0)]
@@ -0,0 +1,33 @@
+import sys
+
+import pytest
+
+from src.core.closure_compiler import ClosureInterpreter
+from src.core.interpreter import Interpreter
+from src.core.lox import Lox
+from src.core.native import Native
+from src.core.profiler import SCRIPT, StackReader
+from src.core.vm import VM
+
+SOURCE = """fun down(n) {
+  sample();
+  if (n > 0) down(n - 1);
+  sample();
+}
+down(2);"""
+
+@pytest.mark.parametrize("backend", [Interpreter, VM, ClosureInterpreter])
+def test_stack_reader_reuses_unchanged_calls(backend):
+    reader, stacks = StackReader(), []
+    def sample():  # The stack as seen by the reader that has followed the run, and by a fresh one
+        frame = sys._getframe(1)
+        stacks.append((reader.read(frame), StackReader().read(frame)))
+    Lox.reset(backend())
+    Lox.use_cache = False
+    Lox.interpreter.globals.values["sample"] = Native(sample, 0)
+    Lox.run(SOURCE)
+    assert not Lox.had_error and not Lox.had_runtime_error
+    down = lambda depth, line: [(SCRIPT, 6)] + [("down", 3)] * depth + [("down", line)]
+    assert [followed for followed, _ in stacks] == [
+        down(0, 2), down(1, 2), down(2, 2), down(2, 4), down(1, 4), down(0, 4)]
+    assert all(followed == fresh for followed, fresh in stacks)
@@ -0,0 +1,61 @@
+import pytest
+
+from src.core.closure_compiler import ClosureInterpreter
+from src.core.interpreter import Interpreter
+from src.core.rope import ROPE_MIN, Rope, concat
+from src.core.runtime import LoxRuntime
+from src.core.vm import VM
+from tests.test_compile import compiled
+
+LONG = "x" * (ROPE_MIN + 44)
+
+SOURCE = f"""var s = "";
+var i = 0;
+while (i < {len(LONG)}) {{
+  s = s + "x";
+  i = i + 1;
+}}
+var long = "{LONG}";
+if (s == long) print "rope == string";
+if (long == s) print "string == rope";
+if (s != long + "y") print "rope != longer string";
+var m = {{}};
+m[s] = 1;
+m[long] = m[long] + 1;
+print m.len();
+print m[s];
+var xs = [s, long];
+if (xs[0] == xs[1]) print "list elements equal";
+print xs[0] + "|" + xs[1] == long + "|" + long;
+print "s" + 1;
+print s + 1 == long + "1.0";
+var a = s + "a";
+var b = s + "b";
+print a == long + "a";
+print b == long + "b";
+print s == long;
+print a;
+"""
+
+EXPECTED = ["rope == string", "string == rope", "rope != longer string", "1", "2", "list elements equal",
+            "True", "s1.0", "True", "True", "True", "True", LONG + "a"]
+
+@pytest.mark.parametrize("backend", [Interpreter, VM, ClosureInterpreter])
+def test_ropes_compare_and_print_like_strings(backend):
+    result = LoxRuntime(backend).run(SOURCE)
+    assert result.status == 0
+    assert result.output.splitlines() == EXPECTED
+
+def test_compiled_strings_compare_and_print_the_same(tmp_path):
+    path = tmp_path / "script.lox"
+    path.write_text(SOURCE)
+    stdout, _, status = compiled(path, tmp_path / "script.py")
+    assert status == 0
+    assert stdout.splitlines() == EXPECTED
+
+def test_append_to_an_extended_rope_copies():
+    rope = concat("a" * ROPE_MIN, "b")
+    first, second = rope.append("c"), rope.append("d")  # Only the first may share rope's parts
+    assert (str(rope), str(first), str(second)) == ("a" * ROPE_MIN + "b", "a" * ROPE_MIN + "bc", "a" * ROPE_MIN + "bd")
+    assert first.parts is rope.parts and second.parts is not rope.parts
+    assert type(second) is Rope and second == str(second) and hash(second) == hash(str(second))
@@ -0,0 +1,60 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from src.core.closure_compiler import ClosureInterpreter
+from src.core.interpreter import Interpreter
+from src.core.runtime import PROGRAMS, LoxRuntime
+from src.core.vm import VM
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+@pytest.mark.parametrize("source", [
+    "print 1;",
+    "print 1 +;",                  # Compile error
+    'print "a";\nprint nil - 1;',  # Runtime error
+    "print 1;\nprint missing;",    # Undefined global
+])
+def test_status_matches_the_command_line(tmp_path, source):
+    path = tmp_path / "script.lox"
+    path.write_text(source)
+    command = subprocess.run([sys.executable, "-m", "src.core.lox", "--no-cache", str(path)], capture_output=True, text=True, cwd=ROOT)
+    result = LoxRuntime().run(source)
+    assert result.status == command.returncode
+    assert result.output == command.stdout.split("Runtime error: ")[0]
+    if result.status == 70:
+        assert command.stderr == f"[line {result.diagnostics[0].line}]\n"
+
+def table_sizes(runtime):
+    interpreter = runtime.interpreter
+    return len(interpreter.locals), len(interpreter.scope_sizes), len(interpreter.inline_caches)
+
+@pytest.mark.parametrize("backend", [Interpreter, VM, ClosureInterpreter])
+def test_resolver_tables_stay_bounded(backend):
+    prelude = "class P { get() { return 1; } }\nfun helper(n) { return P().get() + n; }"
+    runtime = LoxRuntime(backend, prelude=prelude)
+    source = "{{ var a = {0}; var b = [a]; print helper(b[0]); }}"
+    for i in range(PROGRAMS * 3):  # Every run a new source, none defining functions
+        assert runtime.run(source.format(i)).output == f"{i + 1}\n"
+    full = table_sizes(runtime)
+    for i in range(PROGRAMS * 3, PROGRAMS * 6):
+        runtime.run(source.format(i))
+    assert table_sizes(runtime) == full
+    for i in range(PROGRAMS * 3):  # Functions keep their programs' data until reset
+        runtime.run(f"fun f{i}(x) {{ var y = x; return P().get() + y; }}\nprint f{i}({i});")
+    assert runtime.run("print f0(1);").output == "2\n"
+    runtime.reset()
+    assert table_sizes(runtime) <= full
+    assert runtime.run("print helper(1);").output == "2\n"
+
+def test_reset_keeps_only_the_prelude_and_remembered_programs(tmp_path):
+    (tmp_path / "lib.lox").write_text("fun twice(n) { var m = n * 2; return m; }")
+    runtime = LoxRuntime(prelude="fun one() { var x = 1; return x; }", directory=str(tmp_path), use_cache=False)
+    fresh = table_sizes(runtime)
+    assert runtime.run('import "lib.lox";\nprint twice(one());').output == "2\n"
+    runtime.programs.clear()
+    runtime.reset()
+    assert table_sizes(runtime) == fresh
+    assert runtime.run('import "lib.lox";\nprint twice(3);').output == "6\n"  # The module's data comes back with it
@@ -0,0 +1,70 @@
+import pytest
+
+from src.core.scanner import Scanner
+from src.core.token_type import TokenType as T
+
+def scan(source):  # (type, lexeme, literal, line) of each token, and the errors reported
+    errors = []
+    scanner = Scanner(source, lambda line, message: errors.append((line, message)))
+    tokens = [(token.type, token.lexeme, token.literal, token.line) for token in scanner.iter_tokens()]
+    assert scanner.errors == len(errors)
+    return tokens, errors
+
+CASES = [
+    ("var x = 42;\nprint x + 5;", [
+        (T.VAR, "var", None, 1), (T.IDENTIFIER, "x", None, 1), (T.EQUAL, "=", None, 1),
+        (T.NUMBER, "42", 42.0, 1), (T.SEMICOLON, ";", None, 1),
+        (T.PRINT, "print", None, 2), (T.IDENTIFIER, "x", None, 2), (T.PLUS, "+", None, 2),
+        (T.NUMBER, "5", 5.0, 2), (T.SEMICOLON, ";", None, 2), (T.EOF, "", None, 2),
+    ]),
+    ('print "a\nb";\nx "";', [  # A string carries the line it ends on
+        (T.PRINT, "print", None, 1), (T.STRING, '"a\nb"', "a\nb", 2), (T.SEMICOLON, ";", None, 2),
+        (T.IDENTIFIER, "x", None, 3), (T.STRING, '""', "", 3), (T.SEMICOLON, ";", None, 3), (T.EOF, "", None, 3),
+    ]),
+    ("a // b; \"c\n// d\n\t/ b //", [
+        (T.IDENTIFIER, "a", None, 1), (T.SLASH, "/", None, 3), (T.IDENTIFIER, "b", None, 3), (T.EOF, "", None, 3),
+    ]),
+    ("1 2.5 3. .4 10.25.x", [  # A dot needs a digit after it to be part of a number
+        (T.NUMBER, "1", 1.0, 1), (T.NUMBER, "2.5", 2.5, 1), (T.NUMBER, "3", 3.0, 1), (T.DOT, ".", None, 1),
+        (T.DOT, ".", None, 1), (T.NUMBER, "4", 4.0, 1), (T.NUMBER, "10.25", 10.25, 1), (T.DOT, ".", None, 1),
+        (T.IDENTIFIER, "x", None, 1), (T.EOF, "", None, 1),
+    ]),
+    ("<= >= != == ! = [a]: {}", [
+        (T.LESS_EQUAL, "<=", None, 1), (T.GREATER_EQUAL, ">=", None, 1), (T.BANG_EQUAL, "!=", None, 1),
+        (T.EQUAL_EQUAL, "==", None, 1), (T.BANG, "!", None, 1), (T.EQUAL, "=", None, 1),
+        (T.LEFT_BRACKET, "[", None, 1), (T.IDENTIFIER, "a", None, 1), (T.RIGHT_BRACKET, "]", None, 1),
+        (T.COLON, ":", None, 1), (T.LEFT_BRACE, "{", None, 1), (T.RIGHT_BRACE, "}", None, 1), (T.EOF, "", None, 1),
+    ]),
+]
+
+@pytest.mark.parametrize("source, expected", CASES)
+def test_tokens_and_lines(source, expected):
+    assert scan(source) == (expected, [])
+
+@pytest.mark.parametrize("source, expected", CASES)
+def test_buffer_matches_the_tokens(source, expected):
+    buffer = Scanner(source).scan_buffer()
+    assert [(token.type, token.lexeme, token.literal, token.line) for token in buffer] == expected
+    assert list(buffer.lines) == [line for *_, line in expected]
+    assert [source[start:start + length] for start, length in zip(buffer.starts, buffer.lengths)] == [
+        lexeme for _, lexeme, _, _ in expected]
+
+def test_unterminated_string_ends_the_tokens():
+    assert scan('print 1;\n"abc\ndef') == (
+        [(T.PRINT, "print", None, 1), (T.NUMBER, "1", 1.0, 1), (T.SEMICOLON, ";", None, 1), (T.EOF, "", None, 3)],
+        [(3, "Unterminated string.")],
+    )
+
+def test_unexpected_character_is_skipped():
+    assert scan("a @\nb") == (
+        [(T.IDENTIFIER, "a", None, 1), (T.IDENTIFIER, "b", None, 2), (T.EOF, "", None, 2)],
+        [(1, "Unexpected character: @")],
+    )
+
+def test_tokens_are_scanned_on_demand():
+    errors = []
+    tokens = Scanner('a "unterminated', lambda line, message: errors.append(message)).iter_tokens()
+    assert next(tokens).lexeme == "a"
+    assert errors == []  # The rest of the source has not been looked at yet
+    assert next(tokens).type is T.EOF
+    assert errors == ["Unterminated string."]
@@ -0,0 +1,58 @@
+import os
+import pickle
+
+import pytest
+
+from src.core import script_cache
+from src.core.interpreter import Interpreter
+from src.core.lox import Lox
+
+SOURCE = "fun twice(n) { return n * 2; }\nprint twice(60 * 60);"
+
+def run(path, capsys, opt_stats=False):  # (stdout, stderr) of running the script at path
+    Lox.reset(Interpreter())
+    Lox.report_optimizations = opt_stats
+    with open(path, encoding="utf-8") as f:
+        Lox.run(f.read(), path=str(path))
+    assert not Lox.had_error and not Lox.had_runtime_error
+    return capsys.readouterr()
+
+@pytest.fixture
+def script(tmp_path):
+    path = tmp_path / "script.lox"
+    path.write_text(SOURCE)
+    return path
+
+def test_cache_hit_skips_the_front_end(script, capsys, monkeypatch):
+    assert run(script, capsys).out == "7200\n"
+    assert os.path.exists(script_cache.cache_path(str(script)))
+    monkeypatch.setattr(Lox, "front_end", lambda *args: pytest.fail("compiled a cached script"))
+    assert run(script, capsys).out == "7200\n"
+
+def test_opt_stats_on_a_cache_hit(script, capsys):
+    compiled = run(script, capsys, opt_stats=True).err
+    assert compiled.startswith("constant folding: ")
+    assert run(script, capsys, opt_stats=True).err == compiled + "(recorded when the script was cached)\n"
+
+def test_edited_script_is_recompiled(script, capsys):
+    run(script, capsys)
+    script.write_text(SOURCE.replace("60 * 60", "3"))
+    assert run(script, capsys).out == "6\n"
+    assert script_cache.load(str(script), SOURCE, Interpreter(), True) is None  # The entry now belongs to the new source
+
+@pytest.mark.parametrize("contents", [
+    b"",
+    b"not a pickle",
+    pickle.dumps({"magic": "lox-cache 0", "key": "x"}),  # Another format version
+    pickle.dumps([1, 2, 3]),
+    b"cos\nsystem\n(Vtouch ran\ntR.",                      # Refused: only arrays and FlatAst may be loaded
+])
+def test_corrupt_or_foreign_cache_file_falls_back(script, capsys, contents, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    cache = script_cache.cache_path(str(script))
+    os.makedirs(os.path.dirname(cache))
+    with open(cache, "wb") as f:
+        f.write(contents)
+    assert run(script, capsys).out == "7200\n"
+    assert not os.path.exists(tmp_path / "ran")
+    assert script_cache.load(str(script), SOURCE, Interpreter(), True) is not None  # Replaced by a good entry
@@ -0,0 +1,51 @@
+import io
+import os
+import signal
+import subprocess
+import sys
+import time
+
+import pytest
+
+from src.core.client import request
+from src.core.flags import script_arguments
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+@pytest.fixture(scope="module")
+def daemon(tmp_path_factory):  # Socket path of a one-worker daemon
+    path = str(tmp_path_factory.mktemp("serve") / "lox.sock")
+    process = subprocess.Popen([sys.executable, "-m", "src.core.lox", "serve", "--socket", path, "--workers", "1"],
+                               cwd=ROOT, stderr=subprocess.DEVNULL)
+    for _ in range(200):
+        if os.path.exists(path):
+            break
+        time.sleep(0.05)
+    yield path
+    process.send_signal(signal.SIGTERM)
+    process.wait()
+
+@pytest.mark.parametrize("args, rest", [
+    (["--vm", "a.lox"], ["a.lox"]),
+    (["--image", "pre.img"], []),
+    (["--stack-limit", "10", "--max-steps", "5", "--time-limit", "1.5", "--max-allocations", "9"], []),
+    (["--save-image", "out.img", "a.lox"], ["a.lox"]),
+])
+def test_script_arguments_skip_flag_values(args, rest):
+    assert script_arguments(args) == rest
+
+def test_client_forwards_stdin_to_the_repl_after_a_flag_value(daemon, tmp_path):
+    image = str(tmp_path / "pre.img")
+    prelude = tmp_path / "prelude.lox"
+    prelude.write_text('var greeting = "hi";')
+    assert request(["--no-cache", "--save-image", image, str(prelude)], daemon) == 0
+    command = subprocess.run([sys.executable, "-m", "src.core.client", "--socket", daemon, "--image", image],
+                             input="print greeting;\n", capture_output=True, text=True, cwd=ROOT)
+    assert "> hi\n" in command.stdout
+    assert command.returncode == 0
+
+def test_request_runs_source(daemon):
+    stdout, stderr = io.StringIO(), io.StringIO()
+    assert request(["--vm"], daemon, source="print 1 + 2;\nprint nil - 1;", stdout=stdout, stderr=stderr) == 70
+    assert stdout.getvalue() == "3\nRuntime error: Operands must be numbers.\n"
+    assert stderr.getvalue() == "[line 2]\n"
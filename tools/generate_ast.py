@@ -1,60 +1,70 @@
-import os 
+import os
+import sys
+
+# The node definitions below are the single source of truth for src/ast/expr.py and src/ast/stmt.py.
+# Each entry is (class name, fields, comment, __str__ expression or None). Nodes may be shared between
+# interpreters (see src/core/modules.py), so per-interpreter state such as inline caches lives in
+# side tables instead of on the nodes.
+EXPR_TYPES = [
+    ("Binary",   "left, operator, right",     "Represents a binary expressions",         'f"({self.left} {self.operator.lexeme} {self.right})"'),
+    ("Grouping", "expression",                "Represents a grouping expression",        'f"(group {self.expression})"'),
+    ("Literal",  "value",                     "Represents a literal expression",         'str(self.value) if self.value is not None else "nil"'),
+    ("Unary",    "operator, right",           "Represents a unary expression",           'f"({self.operator.lexeme} {self.right})"'),
+    ("Variable", "name",                      "Represents a variable expression",        "str(self.name)"),
+    ("Assign",   "name, value",               "Represents an assignment expression",     'f"({self.name} = {self.value})"'),
+    ("Call",     "callee, paren, arguments",  "Represents a function call expression",   'f"({self.callee}({\', \'.join(map(str, self.arguments))}))"'),
+    ("Logical",  "left, operator, right",     "Represents a logical expression",         'f"({self.left} {self.operator.lexeme} {self.right})"'),
+    ("Get",      "object, name",              "Property access",                         'f"({self.object}.{self.name.lexeme})"'),
+    ("Set",      "object, name, value",       "Property assignment",                     'f"({self.object}.{self.name.lexeme} = {self.value})"'),
+    ("This",     "keyword",                   "The 'this' keyword",                      '"this"'),
+    ("Super",    "keyword, method",           "Superclass method access",                'f"super.{self.method.lexeme}"'),
+    ("List",     "bracket, elements",         "List literal",                            'f"[{\', \'.join(map(str, self.elements))}]"'),
+    ("Map",      "brace, keys, values",       "Map literal",                             'f"{{{\', \'.join(f\'{k}: {v}\' for k, v in zip(self.keys, self.values))}}}"'),
+    ("Index",    "object, bracket, index",    "Subscript access",                        'f"({self.object}[{self.index}])"'),
+    ("SetIndex", "object, bracket, index, value", "Subscript assignment",                'f"({self.object}[{self.index}] = {self.value})"'),
+]
+
+STMT_TYPES = [
+    ("ExpressionStmt", "expression",                          "Expression statement", None),
+    ("PrintStmt",      "expression",                          "Print statement",      None),
+    ("VarStmt",        "name, initializer",                   "Variable declaration", None),
+    ("BlockStmt",      "statements",                          "Block statement",      None),
+    ("IfStmt",         "condition, then_branch, else_branch", "If statement",         None),
+    ("WhileStmt",      "keyword, condition, body",            "While statement",      None),
+    ("FunctionStmt",   "name, params, body",                  "Function declaration", None),
+    ("ReturnStmt",     "keyword, value",                      "Return statement",     None),
+    ("ClassStmt",      "name, superclass, methods",           "Class declaration",    None),
+    ("ImportStmt",     "keyword, path",                       "Import statement",     None),
+]
 
 def main():  # Generate the AST classes
-    output_dir = "generated"
+    output_dir = sys.argv[1] if len(sys.argv) > 1 else os.path.join(os.path.dirname(__file__), "..", "src", "ast")
     os.makedirs(output_dir, exist_ok=True) # Create the output directory if it doesn't exist
-    define_ast(output_dir, "Expr", [       # List of AST node types
-        "Binary   : left, operator, right",
-        "Grouping : expression",
-        "Literal  : value",
-        "Unary    : operator, right",
-        "Variable : name",
-        "Assign   : name, value",
-        "Logical  : left, operator, right",
-        "Call     : callee, paren, arguments",  
-        "Get      : object, name",
-        "Set      : object, name, value",
-        "This     : keyword",
-        "Super    : keyword, method"
-    ])
-    
-    define_ast(output_dir, "Stmt", [
-        "Expression : expression", 
-        "Print      : expression",
-        "Var        : name, initializer",
-        "Block      : statements",
-        "If         : condition, then_branch, else_branch",
-        "While      : condition, body"
-        "Function   : name, params, body",
-        "Return     : keyword, value"
-        "Class      : name, superclass, methods",
-    ])
+    define_ast(output_dir, "Expr", EXPR_TYPES)
+    define_ast(output_dir, "Stmt", STMT_TYPES)
 
-def define_ast(output_dir, base_name, types):   
+def define_ast(output_dir, base_name, types):
     path = os.path.join(output_dir, f"{base_name.lower()}.py")   # Path to the generated file
     with open(path, "w") as f:   # Open the file for writing
-        f.write("from abc import ABC, abstractmethod\n\n")   # Import ABC and abstractmethod for defining abstract classes
-        f.write(f"class {base_name}(ABC):\n")   # Base class for all AST nodes
-        f.write("    @abstractmethod\n")  # Abstract method to be implemented by subclasses
+        f.write("# Generated by tools/generate_ast.py. Edit the node list there and regenerate.\n\n")
+        f.write(f"class {base_name}:   # Base class for all {base_name.lower()} nodes\n")
+        f.write("    __slots__ = ()\n\n")
         f.write("    def accept(self, visitor):\n")  # Accept method for the visitor pattern
-        f.write("        pass\n\n")
+        f.write("        raise NotImplementedError\n")
 
-        for type_def in types:         # Iterate over the types to define
-            class_name, fields = map(str.strip, type_def.split(":"))     # Split the type definition into class name and fields
-            define_type(f, base_name, class_name, fields)    
+        for class_name, fields, comment, text in types:   # Iterate over the types to define
+            define_type(f, base_name, class_name, fields, comment, text)
 
-        # Visitor interface
-        f.write("\nclass Visitor(ABC):\n")
-        for type_def in types:
-            type_name = type_def.split(":")[0].strip()
-            f.write(f"    @abstractmethod\n")
-            f.write(f"    def visit_{type_name.lower()}_{base_name.lower()}(self, {base_name.lower()}):\n")
-            f.write(f"        pass\n")
+        # Node kinds in a fixed order, used as type codes by the flat AST form (src/ast/flat.py)
+        f.write(f"\nNODE_TYPES = ({', '.join(class_name for class_name, *_ in types)})\n")
 
-def define_type(f, base_name, class_name, field_list):
+def define_type(f, base_name, class_name, field_list, comment, text):
     fields = [field.strip() for field in field_list.split(",")]
+    visit_name = class_name[:-len(base_name)] if class_name.endswith(base_name) else class_name
 
-    f.write(f"class {class_name}({base_name}):\n")
+    f.write(f"\nclass {class_name}({base_name}): # {comment}\n")
+    f.write(f"    __slots__ = {tuple(fields)!r}\n")
+    f.write(f"    __match_args__ = {tuple(fields)!r}  # Child fields, in constructor order\n\n")
 
     # Constructor
     f.write("    def __init__(self, " + ", ".join(fields) + "):\n")
@@ -64,8 +74,12 @@ def define_type(f, base_name, class_name, field_list):
 
     # Accept method
     f.write("    def accept(self, visitor):\n")
-    f.write(f"        return visitor.visit_{class_name.lower()}_{base_name.lower()}(self)\n\n")
+    f.write(f"        return visitor.visit_{visit_name.lower()}_{base_name.lower()}(self)\n")
+
+    if text is not None:
+        f.write("\n    def __str__(self):\n")
+        f.write(f"        return {text}\n")
 
 if __name__ == "__main__":
     main()
-    print("AST classes generated successfully.")
\ No newline at end of file
+    print("AST classes generated successfully.")